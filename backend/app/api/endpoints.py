@@ -1,52 +1,71 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Header, Request
+from fastapi.responses import StreamingResponse, PlainTextResponse, Response
+from pydantic import ValidationError
 import uuid
 import json
 import asyncio
-from google.api_core import exceptions as google_exceptions
-from ..models.schemas import VerifyRequest, ClaimStatus, CitationStatus, VerificationResponse
+import contextvars
+import os
+import time
+from collections import Counter
+from typing import Optional
+from contextlib import asynccontextmanager
+from ..models.llm import (
+    BatchVerdictReply, CitationReply, ExtractionReply, IndexedQuery, IndexedVerdict, QueriesReply, VerdictReply,
+)
+from ..models.schemas import (
+    VerifyRequest, ClaimStatus, CitationStatus, ParagraphStatus, VerificationResponse,
+    BatchVerifyRequest, BatchJobResponse, JobStatus,
+)
 from ..services.gemini import gemini_manager
-from ..services.search import search_web_async
-from ..core.utils import clean_json_response
+from ..services.llm import call_llm, new_request_budget
+from ..services.search import close_http_client, search_web_async
+from ..services.query_builder import build_search_query
+from ..services.evidence import rank_evidence, estimate_tokens
+from ..services.cache import SingleFlight, cacheable, mark_fallback, paragraph_store, result_cache, verdict_cache
+from ..services.citations import citation_checker
+from ..services.extraction import split_into_chunks, split_paragraphs, merge_extractions, extract_locally
+from ..services.dedup import group_near_duplicates
+from ..services.jobs import JobQueue, JobWorkerPool
+from ..services.scheduler import PRIORITY_INTERACTIVE
+from ..services.warmup import warmup
+from ..core.config import settings
+from ..core.deadline import remaining, set_deadline
+from ..core.errors import LLMError, classify_error, RATE_LIMIT
+from ..core.utils import etag_matches
+from ..core.metrics import CACHE_LOOKUPS, CITATION_CHECKS, EVIDENCE_TOKENS, EXTRACTIONS, FALLBACKS, registry, request_timings, record_stage, timed
 
-router = APIRouter()
+async def run_batch_item(text: str) -> dict:
+    """Runs one batch text through the same pipeline as /verify."""
+    response = await run_verification(VerifyRequest(text=text))
+    return response.model_dump()
 
-async def verify_single_claim(claim_text: str, language: str = "en"):
-    """Verifies a single claim in parallel with retries."""
-    max_retries = 5
-    search_result = None
-    
-    # Step 0: Generate a better search query
-    search_query = claim_text
-    try:
-        # We ask for a query that works best for verification. 
-        # Often English queries are better, but we let the model decide based on the claim.
-        query_prompt = f"Generate a simple, effective search engine query to verify this claim: '{claim_text}'. Return ONLY the query string, no quotes."
-        query_resp = await gemini_manager.model.generate_content_async(query_prompt)
-        if query_resp.text:
-            candidate_query = query_resp.text.strip().strip('"').strip("'")
-            if 0 < len(candidate_query) < 150:
-                search_query = candidate_query
-    except Exception as e:
-        print(f"Query generation failed: {e}")
+job_queue = JobQueue(os.path.join(settings.CACHE_DIR, "jobs.sqlite3"), lease_seconds=settings.JOB_LEASE_SECONDS)
+job_workers = JobWorkerPool(
+    job_queue,
+    handler=run_batch_item,
+    workers=settings.JOB_WORKERS,
+    poll_interval=settings.JOB_POLL_INTERVAL,
+    interactive_backlog=lambda: gemini_manager.scheduler.pending(max_priority=PRIORITY_INTERACTIVE),
+)
 
-    for attempt in range(max_retries):
-        try:
-            if search_result is None:
-                search_result = await search_web_async(search_query)
-            
-            evidence = f"Source: {search_result.get('title')} - {search_result.get('body')} (URL: {search_result.get('href')})" if search_result and search_result.get('body') else "No relevant search results found."
-            
-            verification_prompt = f"""
-            You are an expert Fact Checker. 
-            Claim: "{claim_text}"
-            Evidence from Search: "{evidence}"
-            
-            Task: Determine verification status based on the evidence.
+@asynccontextmanager
+async def lifespan(app):
+    job_workers.start()
+    warmup.start()
+    yield
+    await warmup.stop()
+    await job_workers.stop()
+    await close_http_client()
+
+router = APIRouter(lifespan=lifespan)
+
+VERDICT_GUIDELINES = """
             - "verified": Evidence directly and clearly supports the claim from a reliable source.
             - "uncertain": Evidence is missing, unrelated, inconclusive, or from a low-authority source.
             - "hallucinated": Evidence directly contradicts the claim or the claim is a known common AI hallucination.
             
-            Source Reliability Guidelines:
+            Source Reliability Guidelines (each source is tagged with its authority level):
             1. HIGH AUTHORITY: Official news (Reuters, AP, BBC, NYT), government (.gov), academic (.edu), and established organizations (WHO, NASA).
             2. MEDIUM AUTHORITY: Wikipedia, specialized technical blogs, reputable niche news.
             3. LOW AUTHORITY: Quora, Reddit, personal blogs, social media, forums.
@@ -56,7 +75,98 @@ async def verify_single_claim(claim_text: str, language: str = "en"):
             - Provide a detailed, in-depth explanation (2-3 sentences) in {language}. 
             - If there is a nuance (e.g., "tallest" vs "highest"), explain it clearly.
             - Mention the specific source name used for verification.
+"""
+
+# Fallbacks (e.g. "extraction") taken while serving the current request or paragraph; results
+# built on one are not cached, so the next request makes a real attempt
+request_fallbacks = contextvars.ContextVar("request_fallbacks", default=None)
+
+def note_fallback(kind: str):
+    used = request_fallbacks.get()
+    if used is not None:
+        used.add(kind)
+
+def failure_message(e: Exception) -> str:
+    if classify_error(e) == RATE_LIMIT:
+        return "Rate limit reached. Please wait a minute or add more API keys to .env"
+    return str(e)
+
+def format_evidence(search_result: dict) -> str:
+    if search_result and search_result.get('body'):
+        return f"Source: {search_result.get('title')} - {search_result.get('body')} (URL: {search_result.get('href')})"
+    return "No relevant search results found."
+
+def rank_search_result(claim_text: str, search_result: dict) -> dict:
+    """Keeps only the claim-relevant sentences of a search result (see rank_evidence)."""
+    if not search_result:
+        return search_result
+    with timed("evidence_ranking"):
+        ranked = rank_evidence(
+            claim_text, search_result,
+            settings.EVIDENCE_TOKEN_BUDGET, settings.EVIDENCE_MAX_SENTENCES, settings.LOW_AUTHORITY_THRESHOLD,
+        )
+    EVIDENCE_TOKENS.inc(estimate_tokens(search_result.get("body") or ""), stage="raw")
+    EVIDENCE_TOKENS.inc(estimate_tokens(ranked.get("body") or ""), stage="kept")
+    return ranked
+
+def low_authority_verdict(claim_text: str, search_result: dict) -> ClaimStatus:
+    """"uncertain" without an LLM call: the guidelines never allow more from low-authority evidence alone."""
+    FALLBACKS.inc(kind="low_authority_uncertain")
+    return ClaimStatus(
+        id=str(uuid.uuid4()),
+        text=claim_text,
+        status="uncertain",
+        confidence=30.0,
+        source=search_result.get("title"),
+        sourceUrl=search_result.get("href"),
+        explanation="Only low-authority sources (forums, blogs, user-generated content) were found for this claim, so it could not be verified.",
+    )
+
+async def generate_search_query(claim_text: str) -> Optional[str]:
+    """Asks the LLM for a search query (a single pass, no backoff); None if it can't."""
+    try:
+        # We ask for a query that works best for verification. 
+        # Often English queries are better, but we let the model decide based on the claim.
+        query_prompt = f"Generate a simple, effective search engine query to verify this claim: '{claim_text}'. Return ONLY the query string, no quotes."
+        with timed("query_generation"):
+            query_text = await call_llm(query_prompt, "query_generation", parse=str, optional=True)
+    except LLMError as e:
+        print(f"Query generation failed: {e}")
+        return None
+    candidate_query = query_text.strip().strip('"').strip("'")
+    return candidate_query if 0 < len(candidate_query) < 150 else None
+
+async def verify_single_claim(claim_text: str, language: str = "en"):
+    """Verifies a single claim: query generation, search, then a verdict from the LLM call layer."""
+    # A cached verdict skips query generation, search and verification entirely
+    cached = verdict_cache.get(claim_text, language)
+    if cached:
+        print(f"Verdict cache hit for '{claim_text[:30]}'")
+        return cached
+
+    # Step 0: Build a search query locally; the LLM only writes one when that query finds nothing
+    if settings.LOCAL_QUERY_BUILDER:
+        search_query = build_search_query(claim_text, settings.QUERY_MAX_TERMS)
+        search_result = await search_web_async(search_query)
+        if not search_result:
+            llm_query = await generate_search_query(claim_text)
+            if llm_query and llm_query != search_query:
+                FALLBACKS.inc(kind="llm_query")
+                search_result = await search_web_async(llm_query)
+    else:
+        search_result = await search_web_async(await generate_search_query(claim_text) or claim_text)
+    search_result = rank_search_result(claim_text, search_result)
+    if search_result and search_result.get("low_authority"):
+        return low_authority_verdict(claim_text, search_result)
+    evidence = format_evidence(search_result)
+    
+    verification_prompt = f"""
+            You are an expert Fact Checker. 
+            Claim: "{claim_text}"
+            Evidence from Search: "{evidence}"
             
+            Task: Determine verification status based on the evidence.
+            {VERDICT_GUIDELINES.format(language=language)}
             Return ONLY a JSON object:
             {{ 
                 "status": "verified" | "uncertain" | "hallucinated", 
@@ -64,81 +174,50 @@ async def verify_single_claim(claim_text: str, language: str = "en"):
                 "explanation": "A detailed explanation in {language} including source names and any nuances." 
             }}
             """
-            
-            verification_resp = await gemini_manager.model.generate_content_async(verification_prompt)
-            if not verification_resp.text:
-                raise ValueError("Empty verification response")
-                
-            v_text = clean_json_response(verification_resp.text)
-            data = json.loads(v_text)
-            
-            return ClaimStatus(
-                id=str(uuid.uuid4()),
-                text=claim_text,
-                status=data.get("status", "uncertain"),
-                confidence=data.get("confidence", 0.5) * 100,
-                source=search_result.get("title") if search_result else None,
-                sourceUrl=search_result.get("href") if search_result else None,
-                explanation=data.get("explanation", "")
-            )
-        except Exception as e:
-            err_str = str(e).lower()
-            is_rate_limit = "429" in err_str or "quota" in err_str or "limit" in err_str or isinstance(e, google_exceptions.ResourceExhausted)
-            
-            if is_rate_limit and attempt < max_retries - 1:
-                # Try switching key if rate limited
-                if gemini_manager.switch_key():
-                    print(f"Retrying with new API key for '{claim_text[:20]}'. Waiting 2s...")
-                    await asyncio.sleep(2)
-                    continue
-                
-                # If all Gemini keys fail, try Groq as the ultimate fallback
-                if gemini_manager.groq_client:
-                    try:
-                        print(f"Gemini exhausted. Falling back to Groq for '{claim_text[:20]}'")
-                        groq_resp = await gemini_manager.call_groq_async(verification_prompt)
-                        v_text = clean_json_response(groq_resp)
-                        data = json.loads(v_text)
-                        return ClaimStatus(
-                            id=str(uuid.uuid4()),
-                            text=claim_text,
-                            status=data.get("status", "uncertain"),
-                            confidence=data.get("confidence", 0.5) * 100,
-                            source=search_result.get("title") if search_result else None,
-                            sourceUrl=search_result.get("href") if search_result else None,
-                            explanation=data.get("explanation", "")
-                        )
-                    except Exception as groq_err:
-                        print(f"Groq Fallback Error: {groq_err}")
-
-                wait_time = (attempt + 1) * 10
-                print(f"All keys exhausted. Waiting {wait_time}s...")
-                await asyncio.sleep(wait_time)
-                continue
-            
-            error_msg = str(e)
-            if is_rate_limit:
-                error_msg = "Rate limit reached. Please wait a minute or add more API keys to .env"
-            
-            print(f"Claim Verification Error: {error_msg}")
-            return ClaimStatus(
-                id=str(uuid.uuid4()),
-                text=claim_text,
-                status="uncertain",
-                confidence=50.0,
-                explanation=f"Verification failed: {error_msg}"
-            )
+    try:
+        with timed("verification"):
+            reply = await call_llm(verification_prompt, "verification", schema=VerdictReply)
+    except LLMError as e:
+        error_msg = failure_message(e)
+        print(f"Claim Verification Error: {error_msg}")
+        return mark_fallback(ClaimStatus(
+            id=str(uuid.uuid4()),
+            text=claim_text,
+            status="uncertain",
+            confidence=50.0,
+            explanation=f"Verification failed: {error_msg}"
+        ))
+
+    result = ClaimStatus(
+        id=str(uuid.uuid4()),
+        text=claim_text,
+        status=reply.status,
+        confidence=reply.confidence * 100,
+        source=search_result.get("title") if search_result else None,
+        sourceUrl=search_result.get("href") if search_result else None,
+        explanation=reply.explanation
+    )
+    verdict_cache.set(claim_text, language, result)
+    return result
 
 async def verify_single_citation(cit_text: str):
-    """Verifies a single citation in parallel with retries."""
-    max_retries = 5
-    search_result = None
-    for attempt in range(max_retries):
-        try:
-            if search_result is None:
-                search_result = await search_web_async(cit_text)
-            
-            citation_prompt = f"""
+    """Verifies a single citation: by its identifier when it has one (see citations.py),
+    otherwise against its best search result and the LLM."""
+    reference = await citation_checker.check(cit_text)
+    if reference is not None:
+        CITATION_CHECKS.inc(path=reference["via"])
+        return CitationStatus(
+            id=str(uuid.uuid4()),
+            text=cit_text,
+            exists=reference["exists"],
+            url=reference["url"],
+            checkingStatus="complete"
+        )
+    CITATION_CHECKS.inc(path="search_llm")
+
+    search_result = await search_web_async(cit_text)
+    
+    citation_prompt = f"""
             You are a Citation Validator.
             Citation: "{cit_text}"
             Search Result: "{search_result.get('title') if search_result else 'No results'}"
@@ -150,73 +229,209 @@ async def verify_single_citation(cit_text: str):
                 "confidence": 0.0-1.0
             }}
             """
+    try:
+        with timed("citation"):
+            reply = await call_llm(citation_prompt, "citation", schema=CitationReply)
+    except LLMError as e:
+        print(f"Citation Verification Error: {failure_message(e)}")
+        reply = None
+
+    result = CitationStatus(
+        id=str(uuid.uuid4()),
+        text=cit_text,
+        exists=(reply is not None and reply.isReal) or (search_result is not None),
+        url=search_result.get("href") if search_result else None,
+        checkingStatus="complete"
+    )
+    return result if reply is not None else mark_fallback(result)
+
+def _indexed_items(items: list, model, count: int) -> dict:
+    """Maps item index -> `model` instance for a batch reply, ignoring invalid or out-of-range entries."""
+    by_index = {}
+    for item in items:
+        try:
+            item = model.model_validate(item)
+        except ValidationError:
+            continue
+        if 0 <= item.index < count:
+            by_index[item.index] = item
+    return by_index
+
+async def generate_search_queries(claims: list) -> dict:
+    """One LLM prompt writing search queries for several claims; returns {index: query}."""
+    numbered = "\n".join(f"{n}. {c}" for n, c in enumerate(claims))
+    query_prompt = f"""
+    For each numbered claim below, generate a simple, effective search engine query to verify it.
+    Return ONLY a JSON object: {{ "queries": [{{ "index": 0, "query": "..." }}, ...] }}
+    
+    Claims:
+    {numbered}
+    """
+    queries = {}
+    try:
+        with timed("query_generation"):
+            reply = await call_llm(query_prompt, "query_generation", schema=QueriesReply, optional=True)
+        for n, item in _indexed_items(reply.queries, IndexedQuery, len(claims)).items():
+            candidate = item.query.strip().strip('"').strip("'")
+            if 0 < len(candidate) < 150:
+                queries[n] = candidate
+    except LLMError as e:
+        print(f"Batch query generation failed: {e}")
+    return queries
+
+async def verify_claims_batch(claims: list, language: str = "en", on_result=None):
+    """Verifies several claims with one query-generation and one verification LLM call.
+
+    `on_result(index, verdict)` is called as soon as each verdict is known, so a caller
+    that cancels this on a deadline still has the finished ones.
+    """
+    results = [None] * len(claims)
+
+    def publish(i, result):
+        results[i] = result
+        if on_result is not None:
+            on_result(i, result)
+
+    for i, claim in enumerate(claims):
+        cached = verdict_cache.get(claim, language)
+        if cached is not None:
+            publish(i, cached)
+    pending = [i for i, r in enumerate(results) if r is None]
+    if not pending:
+        return results
+    pending_claims = [claims[i] for i in pending]
+
+    if settings.LOCAL_QUERY_BUILDER:
+        # Local queries first; one LLM prompt writes queries only for the claims they found nothing for
+        queries = [build_search_query(c, settings.QUERY_MAX_TERMS) for c in pending_claims]
+        search_results = list(await asyncio.gather(*[search_web_async(q) for q in queries]))
+        empty = [n for n, r in enumerate(search_results) if not r]
+        if empty:
+            llm_queries = await generate_search_queries([pending_claims[n] for n in empty])
+            retry = {empty[k]: q for k, q in llm_queries.items() if q != queries[empty[k]]}
+            FALLBACKS.inc(len(retry), kind="llm_query")
+            for n, result in zip(retry, await asyncio.gather(*[search_web_async(q) for q in retry.values()])):
+                search_results[n] = result
+    else:
+        # One prompt for all search queries; a claim without a usable query is searched verbatim
+        llm_queries = await generate_search_queries(pending_claims)
+        queries = [llm_queries.get(n, c) for n, c in enumerate(pending_claims)]
+        search_results = await asyncio.gather(*[search_web_async(q) for q in queries])
+    search_results = [rank_search_result(c, r) for c, r in zip(pending_claims, search_results)]
+
+    # Claims backed only by low-authority sources are settled without the model
+    to_verify = []
+    for n, i in enumerate(pending):
+        if search_results[n] and search_results[n].get("low_authority"):
+            publish(i, low_authority_verdict(claims[i], search_results[n]))
+        else:
+            to_verify.append(n)
+    if not to_verify:
+        return results
+    evidence_block = "\n\n".join(
+        f"[{n}] Claim: \"{pending_claims[n]}\"\n    Evidence from Search: \"{format_evidence(search_results[n])}\""
+        for n in to_verify
+    )
+    verification_prompt = f"""
+            You are an expert Fact Checker. 
+            Below are numbered claims, each with the evidence found for it.
             
-            citation_resp = await gemini_manager.model.generate_content_async(citation_prompt)
-            if not citation_resp.text:
-                raise ValueError("Empty citation response")
-                
-            c_text = clean_json_response(citation_resp.text)
-            data = json.loads(c_text)
-            
-            return CitationStatus(
-                id=str(uuid.uuid4()),
-                text=cit_text,
-                exists=data.get("isReal", False) or (search_result is not None),
-                url=search_result.get("href") if search_result else None,
-                checkingStatus="complete"
-            )
-        except Exception as e:
-            err_str = str(e).lower()
-            is_rate_limit = "429" in err_str or "quota" in err_str or "limit" in err_str or isinstance(e, google_exceptions.ResourceExhausted)
+            {evidence_block}
             
-            if is_rate_limit and attempt < max_retries - 1:
-                if gemini_manager.switch_key():
-                    print(f"Retrying citation with new API key. Waiting 2s...")
-                    await asyncio.sleep(2)
-                    continue
-                
-                # Groq Fallback for Citations
-                if gemini_manager.groq_client:
-                    try:
-                        print(f"Gemini exhausted. Falling back to Groq for citation '{cit_text[:20]}'")
-                        groq_resp = await gemini_manager.call_groq_async(citation_prompt)
-                        c_text = clean_json_response(groq_resp)
-                        data = json.loads(c_text)
-                        return CitationStatus(
-                            id=str(uuid.uuid4()),
-                            text=cit_text,
-                            exists=data.get("isReal", False) or (search_result is not None),
-                            url=search_result.get("href") if search_result else None,
-                            checkingStatus="complete"
-                        )
-                    except Exception as groq_err:
-                        print(f"Groq Fallback Error (Citation): {groq_err}")
-
-                wait_time = (attempt + 1) * 10
-                print(f"All keys exhausted for citation. Waiting {wait_time}s...")
-                await asyncio.sleep(wait_time)
-                continue
-                
-            print(f"Citation Verification Error: {e}")
-            return CitationStatus(
-                id=str(uuid.uuid4()),
-                text=cit_text,
-                exists=search_result is not None,
-                url=search_result.get("href") if search_result else None,
-                checkingStatus="complete"
-            )
+            Task: Determine the verification status of EVERY claim based only on its own evidence.
+            {VERDICT_GUIDELINES.format(language=language)}
+            Return ONLY a JSON object with one entry per claim, using the claim's number as "index":
+            {{ 
+                "results": [
+                    {{ 
+                        "index": 0,
+                        "status": "verified" | "uncertain" | "hallucinated", 
+                        "confidence": 0.0-1.0, 
+                        "explanation": "A detailed explanation in {language} including source names and any nuances." 
+                    }}
+                ]
+            }}
+            """
+    verdicts = {}
+    try:
+        with timed("verification"):
+            reply = await call_llm(verification_prompt, "verification", schema=BatchVerdictReply)
+        verdicts = _indexed_items(reply.results, IndexedVerdict, len(pending_claims))
+    except LLMError as e:
+        print(f"Batch verification failed, falling back to per-claim calls: {e}")
 
-@router.post("/verify", response_model=VerificationResponse)
-async def verify_claims(request: VerifyRequest):
-    print(f"Received verification request for text: {request.text[:50]}...")
-    
-    # Step 1: Extract Claims and Citations
+    fallback = []
+    for n in to_verify:
+        i = pending[n]
+        item = verdicts.get(n)
+        search_result = search_results[n]
+        if item is None:
+            fallback.append(i)
+            continue
+        result = ClaimStatus(
+            id=str(uuid.uuid4()),
+            text=claims[i],
+            status=item.status,
+            confidence=item.confidence * 100,
+            source=search_result.get("title") if search_result else None,
+            sourceUrl=search_result.get("href") if search_result else None,
+            explanation=item.explanation
+        )
+        verdict_cache.set(claims[i], language, result)
+        publish(i, result)
+
+    if fallback:
+        print(f"Batch verification missing {len(fallback)} result(s); verifying them individually.")
+        FALLBACKS.inc(len(fallback), kind="batch_per_claim")
+
+        async def verify_one(i):
+            publish(i, await verify_single_claim(claims[i], language=language))
+
+        await asyncio.gather(*[verify_one(i) for i in fallback])
+    return results
+
+async def extract_claims(text: str):
+    """Extracts (language, claims, citations) from the text with language detection.
+
+    Short, clearly English texts whose sentences are unambiguous are handled by the local
+    rule-based extractor without an LLM call. Long documents are split into
+    paragraph/sentence-aligned chunks that are extracted in parallel (under the shared LLM
+    rate limit), then merged, deduplicated and ranked by check-worthiness down to the
+    long-document claim budget.
+    """
     print("Step 1: Extracting claims and citations with language detection...")
+    if settings.FAST_EXTRACTION and len(text) <= settings.FAST_EXTRACTION_MAX_CHARS:
+        with timed("extraction"):
+            local = extract_locally(text)
+        if local is not None:
+            EXTRACTIONS.inc(path="local")
+            print(f"Extracted {len(local[1])} claims and {len(local[2])} citations locally.")
+            return local
+    if len(text) <= settings.LONG_DOC_THRESHOLD:
+        EXTRACTIONS.inc(path="llm")
+        return await extract_from_chunk(text)
+
+    chunks = split_into_chunks(text, settings.LONG_DOC_CHUNK_CHARS)
+    EXTRACTIONS.inc(len(chunks), path="llm")
+    print(f"Long document: extracting from {len(chunks)} chunks in parallel...")
+    extractions = await asyncio.gather(*[extract_from_chunk(chunk) for chunk in chunks])
+    language, claims_list, citations_list = merge_extractions(
+        extractions, settings.LONG_DOC_CLAIM_BUDGET, settings.LONG_DOC_CITATION_BUDGET
+    )
+    print(f"Merged {len(claims_list)} claims and {len(citations_list)} citations from {len(chunks)} chunks.")
+    return language, claims_list, citations_list
+
+def fallback_claims(text: str) -> list:
+    """Naive sentence split used when LLM extraction fails or runs out of time."""
+    return [line.strip() for line in text.split('.') if len(line.strip()) > 20][:2]
+
+async def extract_from_chunk(text: str, max_claims: int = 6, max_citations: int = 4):
+    """Runs the LLM extraction prompt on one piece of text."""
     extraction_prompt = f"""
     Analyze the following text and extract:
     1. The ISO 639-1 language code of the text (e.g., 'en', 'hi', 'es'). Default to 'en' if unsure.
-    2. Key factual claims (dates, facts, numbers, quotes, scientific statements). Extract up to 6 distinct claims.
-    3. Any citations or references mentioned (papers, journals, authors, specific studies). Extract up to 4.
+    2. Key factual claims (dates, facts, numbers, quotes, scientific statements). Extract up to {max_claims} distinct claims.
+    3. Any citations or references mentioned (papers, journals, authors, specific studies). Extract up to {max_citations}.
     
     Return ONLY a JSON object with this structure:
     {{
@@ -225,114 +440,406 @@ async def verify_claims(request: VerifyRequest):
         "citations": ["citation 1", "citation 2", ...]
     }}
     
-    Text: "{request.text}"
+    Text: "{text}"
     """
+    try:
+        with timed("extraction"):
+            reply = await call_llm(extraction_prompt, "extraction", schema=ExtractionReply)
+        claims_list = reply.claims[:max_claims]
+        citations_list = reply.citations[:max_citations]
+        detected_language = reply.language
+        print(f"Extracted {len(claims_list)} claims and {len(citations_list)} citations in language '{detected_language}'.")
+    except LLMError as e:
+        print(f"Extraction Error: {failure_message(e)}")
+        # Fallback to simple split if JSON fails
+        note_fallback("extraction")
+        claims_list = fallback_claims(text)
+        citations_list = []
+        detected_language = "en"
+        print(f"Fallback: Extracted {len(claims_list)} claims.")
+
+    return detected_language, claims_list, citations_list
+
+def compute_overall_score(verified_claims) -> int:
+    """Computes the 0-100 trust score over the given claim verdicts (pending claims are left out)."""
+    verified_claims = [c for c in verified_claims if c.status.lower() != "pending"]
+    if not verified_claims:
+        return 0
+    # Scoring Logic: 
+    # Verified = 1.0 (100%)
+    # Uncertain = 0.3 (30%) - Conservative score for unproven claims
+    # Hallucinated = 0.0 (0%)
+    score_map = {"verified": 1.0, "uncertain": 0.3, "hallucinated": 0.0}
     
-    claims_list = []
-    citations_list = []
-    detected_language = "en"
-    
-    for attempt in range(3):
-        try:
-            if not gemini_manager.model:
-                raise ValueError("Gemini model not initialized. Check your API keys.")
-                
-            extraction_response = await gemini_manager.model.generate_content_async(extraction_prompt)
-            if not extraction_response.text:
-                raise ValueError("Empty response from model")
-            resp_text = clean_json_response(extraction_response.text)
-            extracted_data = json.loads(resp_text)
-            claims_list = extracted_data.get("claims", [])[:6]
-            citations_list = extracted_data.get("citations", [])[:4]
-            detected_language = extracted_data.get("language", "en")
-            print(f"Extracted {len(claims_list)} claims in language '{detected_language}'.")
-            break
-        except Exception as e:
-            err_str = str(e).lower()
-            is_rate_limit = "429" in err_str or "quota" in err_str or "limit" in err_str or isinstance(e, google_exceptions.ResourceExhausted)
-            if is_rate_limit and attempt < 2:
-                if gemini_manager.switch_key():
-                    print("Switched API key during extraction. Waiting 2s...")
-                    await asyncio.sleep(2)
-                    continue
-                
-                # Groq Fallback for Extraction
-                if gemini_manager.groq_client:
-                    try:
-                        print("Gemini exhausted. Falling back to Groq for extraction...")
-                        groq_resp = await gemini_manager.call_groq_async(extraction_prompt)
-                        resp_text = clean_json_response(groq_resp)
-                        extracted_data = json.loads(resp_text)
-                        claims_list = extracted_data.get("claims", [])[:6]
-                        citations_list = extracted_data.get("citations", [])[:4]
-                        detected_language = extracted_data.get("language", "en")
-                        print(f"Extracted {len(claims_list)} claims and {len(citations_list)} citations via Groq.")
-                        break
-                    except Exception as groq_err:
-                        print(f"Groq Fallback Error (Extraction): {groq_err}")
-
-                wait_time = (attempt + 1) * 10
-                print(f"Extraction rate limit hit, all keys exhausted. Waiting {wait_time}s...")
-                await asyncio.sleep(wait_time)
-                continue
-            
-            error_msg = "Rate limit reached" if is_rate_limit else str(e)
-            print(f"Extraction Error: {error_msg}")
-            # Fallback to simple split if JSON fails
-            claims_list = [line.strip() for line in request.text.split('.') if len(line.strip()) > 20][:2]
-            citations_list = []
-            print(f"Fallback: Extracted {len(claims_list)} claims.")
-            break
-
-    # Step 2 & 3: Verify in Parallel with Concurrency Limit
-    print("Step 2 & 3: Verifying claims and citations in parallel...")
-    
-    semaphore = asyncio.Semaphore(2) # Increased to 2 since we have rotation
-    
-    async def sem_verify_claim(c):
-        async with semaphore:
-            await asyncio.sleep(1) # Small delay between requests
-            # Pass the detected language to the verification function
-            return await verify_single_claim(c, language=detected_language)
+    total_weighted_score = 0.0
+    for c in verified_claims:
+        base_score = score_map.get(c.status.lower(), 0.0)
+        # If uncertain, we factor in confidence to penalize "I don't know" even more
+        if c.status.lower() == "uncertain":
+            # Confidence is 0-100. 
+            # If confidence is 0, score is 0. If confidence is 100, score is 0.3
+            total_weighted_score += base_score * (c.confidence / 100.0)
+        else:
+            total_weighted_score += base_score
             
-    async def sem_verify_citation(c):
-        async with semaphore:
-            return await verify_single_citation(c)
-    
-    claim_tasks = [sem_verify_claim(c) for c in claims_list]
-    citation_tasks = [sem_verify_citation(c) for c in citations_list]
-    
-    results = await asyncio.gather(*claim_tasks, *citation_tasks)
+    return int((total_weighted_score / len(verified_claims)) * 100)
+
+def copy_verdict(verdict: ClaimStatus, claim_text: str) -> ClaimStatus:
+    """Reuses a representative's verdict for a near-duplicate claim."""
+    return verdict.model_copy(update={"id": str(uuid.uuid4()), "text": claim_text})
+
+def pending_claim(claim_text: str) -> ClaimStatus:
+    return ClaimStatus(
+        id=str(uuid.uuid4()),
+        text=claim_text,
+        status="pending",
+        confidence=0.0,
+        explanation="Verification did not finish before the request deadline."
+    )
+
+async def verify_claim_list(claims_list: list, language: str, results: list = None):
+    """Verifies claims, running the pipeline once per group of near-duplicate claims.
+
+    Verdicts are written into `results` (one slot per claim) as they arrive, so a caller
+    that cancels this on a deadline can still read the finished ones.
+    """
+    results = [None] * len(claims_list) if results is None else results
+    groups = group_near_duplicates(claims_list, settings.DEDUP_THRESHOLD)
+    representatives = [claims_list[group[0]] for group in groups]
+    if len(groups) < len(claims_list):
+        print(f"Collapsed {len(claims_list)} claims into {len(groups)} near-duplicate groups.")
+
+    def publish(n, verdict):
+        # Fan the representative's verdict out to every near-duplicate in its group
+        group = groups[n]
+        results[group[0]] = verdict
+        for i in group[1:]:
+            results[i] = copy_verdict(verdict, claims_list[i])
+
+    if settings.BATCH_VERIFICATION and len(representatives) > 1:
+        # One query-generation and one verification call for all claims
+        await verify_claims_batch(representatives, language=language, on_result=publish)
+    else:
+        async def verify_one(n):
+            publish(n, await verify_single_claim(representatives[n], language=language))
+
+        await asyncio.gather(*[verify_one(n) for n in range(len(groups))])
+    return results
+
+async def verify_extraction(claims_list: list, citations_list: list, language: str):
+    """Verifies extracted claims and citations in parallel (LLM calls are throttled by the
+    shared scheduler). Whatever hasn't finished by the deadline is cancelled and reported as
+    pending. Returns (claims, citations, partial)."""
+    claim_results = [None] * len(claims_list)
+    claims_task = asyncio.ensure_future(verify_claim_list(claims_list, language, results=claim_results))
+    citation_tasks = [asyncio.ensure_future(verify_single_citation(c)) for c in citations_list]
+    try:
+        await asyncio.wait([claims_task, *citation_tasks], timeout=remaining())
+    finally:
+        for task in (claims_task, *citation_tasks):
+            task.cancel()
+
+    partial = not claims_task.done() or claims_task.cancelled()
+    if partial:
+        verified_claims = [r or pending_claim(c) for r, c in zip(claim_results, claims_list)]
+    else:
+        verified_claims = claims_task.result()
+    verified_citations = []
+    for task, cit_text in zip(citation_tasks, citations_list):
+        if task.done() and not task.cancelled():
+            verified_citations.append(task.result())
+        else:
+            partial = True
+            verified_citations.append(CitationStatus(id=str(uuid.uuid4()), text=cit_text, checkingStatus="pending"))
+    return verified_claims, verified_citations, partial
+
+async def run_verification(request: VerifyRequest) -> VerificationResponse:
+    """The full extraction + verification pipeline behind /verify."""
+    print(f"Received verification request for text: {request.text[:50]}...")
+    # Every LLM call of this request draws its retries from one shared budget
+    new_request_budget()
+    if request.incremental:
+        return await run_incremental_verification(request)
     
-    verified_claims = results[:len(claim_tasks)]
-    verified_citations = results[len(claim_tasks):]
+    # Step 1: Extract Claims and Citations
+    try:
+        detected_language, claims_list, citations_list = await asyncio.wait_for(
+            extract_claims(request.text), timeout=remaining()
+        )
+    except asyncio.TimeoutError:
+        print("Deadline reached during extraction; returning unverified claims.")
+        claims = [pending_claim(c) for c in fallback_claims(request.text)]
+        return VerificationResponse(claims=claims, citations=[], overallScore=0, partial=True)
 
-    # Calculate Overall Score
-    if not verified_claims:
-        overall_score = 0
+    # Step 2 & 3: Verify in Parallel
+    print("Step 2 & 3: Verifying claims and citations in parallel...")
+    verified_claims, verified_citations, partial = await verify_extraction(claims_list, citations_list, detected_language)
+
+    overall_score = compute_overall_score(verified_claims)
+
+    if partial:
+        print(f"Deadline reached; returning partial results. Overall Score: {overall_score}")
     else:
-        # Scoring Logic: 
-        # Verified = 1.0 (100%)
-        # Uncertain = 0.3 (30%) - Conservative score for unproven claims
-        # Hallucinated = 0.0 (0%)
-        score_map = {"verified": 1.0, "uncertain": 0.3, "hallucinated": 0.0}
-        
-        total_weighted_score = 0.0
-        for c in verified_claims:
-            base_score = score_map.get(c.status.lower(), 0.0)
-            # If uncertain, we factor in confidence to penalize "I don't know" even more
-            if c.status.lower() == "uncertain":
-                # Confidence is 0-100. 
-                # If confidence is 0, score is 0. If confidence is 100, score is 0.3
-                total_weighted_score += base_score * (c.confidence / 100.0)
-            else:
-                total_weighted_score += base_score
-                
-        overall_score = int((total_weighted_score / len(verified_claims)) * 100)
-
-    print(f"Verification complete. Overall Score: {overall_score}")
+        print(f"Verification complete. Overall Score: {overall_score}")
     return VerificationResponse(
         claims=verified_claims,
         citations=verified_citations,
-        overallScore=overall_score
+        overallScore=overall_score,
+        partial=partial
+    )
+
+async def verify_new_paragraphs(paragraphs: dict) -> tuple:
+    """Runs {hash: paragraph} through extraction and verification. Paragraphs are extracted in
+    parallel and all their claims verified together (one batch, deduplicated across
+    paragraphs). Returns ({hash: {"claims", "citations", "fallback"}}, partial), "fallback"
+    being True for paragraphs whose extraction fell back to the naive split."""
+
+    async def extract(paragraph):
+        # Runs in its own task (and context), so its fallbacks are its own
+        fallbacks = set()
+        request_fallbacks.set(fallbacks)
+        return await extract_claims(paragraph), fallbacks
+
+    try:
+        extracted = await asyncio.wait_for(
+            asyncio.gather(*[extract(p) for p in paragraphs.values()]), timeout=remaining()
+        )
+    except asyncio.TimeoutError:
+        print("Deadline reached during extraction; new paragraphs come back unverified.")
+        return {
+            key: {"claims": [pending_claim(c) for c in fallback_claims(p)], "citations": [], "fallback": True}
+            for key, p in paragraphs.items()
+        }, True
+
+    extractions = [extraction for extraction, _ in extracted]
+    for _, fallbacks in extracted:
+        for kind in fallbacks:
+            note_fallback(kind)
+
+    claims_list, claim_owners, citations_list, citation_owners = [], [], [], []
+    for key, (_, claims, citations) in zip(paragraphs, extractions):
+        claims_list += claims
+        claim_owners += [key] * len(claims)
+        citations_list += citations
+        citation_owners += [key] * len(citations)
+    language = Counter(language for language, _, _ in extractions).most_common(1)[0][0]
+    verified_claims, verified_citations, partial = await verify_extraction(claims_list, citations_list, language)
+
+    results = {
+        key: {"claims": [], "citations": [], "fallback": bool(fallbacks)}
+        for key, (_, fallbacks) in zip(paragraphs, extracted)
+    }
+    for key, claim in zip(claim_owners, verified_claims):
+        results[key]["claims"].append(claim)
+    for key, citation in zip(citation_owners, verified_citations):
+        results[key]["citations"].append(citation)
+    return results, partial
+
+async def run_incremental_verification(request: VerifyRequest) -> VerificationResponse:
+    """Incremental /verify: only paragraphs missing from the paragraph store are extracted and
+    verified; the others reuse their stored claims and verdicts. Claims and citations come
+    back in paragraph order and the score is recomputed over all of them."""
+    paragraphs = request.paragraphs or split_paragraphs(request.text, settings.PARAGRAPH_MIN_CHARS)
+    paragraphs = [p for p in paragraphs if p.strip()]
+    keys = [paragraph_store.make_key(p) for p in paragraphs]
+    results, new = {}, {}
+    for key, paragraph in zip(keys, paragraphs):
+        if key in results or key in new:
+            continue
+        stored = paragraph_store.get(key)
+        if stored is None:
+            new[key] = paragraph
+        else:
+            results[key] = stored
+    print(f"Incremental verification: reusing {len(results)} paragraphs, verifying {len(new)}.")
+
+    partial = False
+    if new:
+        fresh, partial = await verify_new_paragraphs(new)
+        results.update(fresh)
+        for key, result in fresh.items():
+            # Only complete, successful results are stored; a paragraph with a failed or
+            # unfinished check (or a fallback extraction) runs again next time
+            if not result["fallback"] and all(cacheable(c) for c in result["claims"] + result["citations"]):
+                paragraph_store.set(key, result["claims"], result["citations"])
+
+    claims, citations, statuses = [], [], []
+    seen = set()
+    for key in keys:
+        result = results[key]
+        paragraph_claims, paragraph_citations = result["claims"], result["citations"]
+        if key in seen:
+            # A repeated paragraph gets its own copies (ids must stay unique within a response)
+            paragraph_claims = [copy_verdict(c, c.text) for c in paragraph_claims]
+            paragraph_citations = [c.model_copy(update={"id": str(uuid.uuid4())}) for c in paragraph_citations]
+        seen.add(key)
+        claims += paragraph_claims
+        citations += paragraph_citations
+        statuses.append(ParagraphStatus(
+            hash=key, reused=key not in new, claims=len(paragraph_claims), citations=len(paragraph_citations)
+        ))
+
+    overall_score = compute_overall_score(claims)
+    print(f"Incremental verification complete. Overall Score: {overall_score}")
+    return VerificationResponse(
+        claims=claims,
+        citations=citations,
+        overallScore=overall_score,
+        partial=partial,
+        paragraphs=statuses,
     )
+
+async def cancel_on_disconnect(http_request: Request, coro):
+    """Runs `coro`, cancelling it if the client goes away first (returns None in that case)."""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=settings.DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                print("Client disconnected; cancelling its verification.")
+                return None
+    finally:
+        task.cancel()
+
+# Identical /verify requests in flight share one pipeline run (per worker process)
+verification_flight = SingleFlight(cancel_abandoned=True)
+
+async def verify_and_cache(request: VerifyRequest, key: str):
+    """Runs the pipeline and caches the response unless the deadline cut it short, a check
+    failed or extraction fell back; returns (response, etag), with no ETag for a response
+    that was not cached."""
+    fallbacks = set()
+    request_fallbacks.set(fallbacks)
+    response = await run_verification(request)
+    if response.partial or fallbacks or not all(cacheable(c) for c in response.claims + response.citations):
+        return response, None
+    return response, result_cache.set(key, response)
+
+@router.post("/verify", response_model=VerificationResponse)
+async def verify_claims(
+    request: VerifyRequest,
+    http_request: Request,
+    http_response: Response,
+    x_debug_timing: Optional[str] = Header(None),
+    x_deadline_ms: Optional[int] = Header(None, gt=0),
+    if_none_match: Optional[str] = Header(None),
+):
+    """Verifies a text.
+
+    A deadline (`deadlineMs` field or `X-Deadline-Ms` header, falling back to
+    REQUEST_DEADLINE_MS) bounds the whole pipeline: claims not verified by then come back
+    "pending" and the score covers the completed ones. Work stops if the client disconnects.
+    With an `X-Debug-Timing: 1` header the response also carries a per-stage timing
+    breakdown in ms (stages running in parallel are summed, so they can add up to more
+    than `total`).
+
+    Complete responses are cached for RESULT_CACHE_TTL and carry an ETag; sending it back in
+    If-None-Match gets a 304 while the entry lasts. An identical request arriving while one
+    is running waits for that run instead of starting its own.
+    """
+    deadline_ms = request.deadlineMs or x_deadline_ms or settings.REQUEST_DEADLINE_MS
+    set_deadline(deadline_ms / 1000 if deadline_ms else None)
+    timings = {} if x_debug_timing else None
+    request_timings.set(timings)
+    started = time.perf_counter()
+    key = result_cache.make_key(request)
+    cached = result_cache.get(key)
+    if cached is not None:
+        CACHE_LOOKUPS.inc(cache="result", result="hit")
+        response, etag = cached
+    else:
+        # Different deadlines can end differently (partial or not), so only equal ones share a run
+        flight_key = (key, deadline_ms)
+
+        async def join_run():
+            CACHE_LOOKUPS.inc(cache="result", result="coalesced" if flight_key in verification_flight else "miss")
+            return await verification_flight.do(flight_key, lambda: verify_and_cache(request, key))
+
+        shared = await cancel_on_disconnect(http_request, join_run())
+        if shared is None:
+            # Nobody is listening any more; 499 is the conventional "client closed request"
+            return Response(status_code=499)
+        response, etag = shared
+        # Every caller of a shared run gets the same object; copy it before adding timings
+        response = response.model_copy()
+    record_stage("total", time.perf_counter() - started)
+    if etag is not None:
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        http_response.headers["ETag"] = etag
+    if timings is not None:
+        response.timings = {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()}
+    return response
+
+@router.post("/verify/stream")
+async def verify_claims_stream(request: VerifyRequest):
+    """Streams NDJSON events: the extraction result, each claim/citation as it finishes, then the final score."""
+    print(f"Received streaming verification request for text: {request.text[:50]}...")
+
+    async def events():
+        new_request_budget()
+        detected_language, claims_list, citations_list = await extract_claims(request.text)
+        yield json.dumps({
+            "type": "extraction",
+            "language": detected_language,
+            "claims": claims_list,
+            "citations": citations_list,
+        }) + "\n"
+
+        async def tagged(kind, group, coro):
+            return kind, group, await coro
+
+        groups = group_near_duplicates(claims_list, settings.DEDUP_THRESHOLD)
+        tasks = [
+            asyncio.ensure_future(tagged("claim", group, verify_single_claim(claims_list[group[0]], language=detected_language)))
+            for group in groups
+        ]
+        tasks += [asyncio.ensure_future(tagged("citation", None, verify_single_citation(c))) for c in citations_list]
+        verified_claims = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                kind, group, result = await next_done
+                if kind == "citation":
+                    yield json.dumps({"type": kind, "data": result.model_dump()}) + "\n"
+                    continue
+                # Fan the representative's verdict out to every near-duplicate in its group
+                for i in group:
+                    claim = result if i == group[0] else copy_verdict(result, claims_list[i])
+                    verified_claims.append(claim)
+                    yield json.dumps({
+                        "type": kind,
+                        "data": claim.model_dump(),
+                        "overallScore": compute_overall_score(verified_claims),
+                    }) + "\n"
+        finally:
+            # The client may have disconnected mid-stream; don't keep verifying for nobody
+            for task in tasks:
+                task.cancel()
+
+        overall_score = compute_overall_score(verified_claims)
+        print(f"Streaming verification complete. Overall Score: {overall_score}")
+        yield json.dumps({"type": "complete", "overallScore": overall_score}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@router.post("/verify/batch", response_model=BatchJobResponse, status_code=202)
+async def submit_batch(request: BatchVerifyRequest):
+    """Queues many texts for background verification and returns a job id to poll."""
+    job_id = job_queue.submit(request.texts)
+    print(f"Queued batch job {job_id} with {len(request.texts)} texts.")
+    return BatchJobResponse(jobId=job_id, status="queued", total=len(request.texts))
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint: stage latencies, LLM/search/cache counters and key health."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Reports progress and the results finished so far for a batch job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -9,4 +9,132 @@ class Settings:
     GROQ_API_KEY = os.getenv("GROQ_API_KEY", "").strip()
     TAVILY_API_KEY = os.getenv("TAVILY_API_KEY", "").strip()
 
+    # Local cache storage (SQLite files live here)
+    CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+
+    # Claim verdict cache: in-memory LRU size and per-status TTLs (seconds)
+    VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "2048"))
+    VERDICT_TTL_VERIFIED = int(os.getenv("VERDICT_TTL_VERIFIED", str(7 * 24 * 3600)))
+    VERDICT_TTL_HALLUCINATED = int(os.getenv("VERDICT_TTL_HALLUCINATED", str(7 * 24 * 3600)))
+    VERDICT_TTL_UNCERTAIN = int(os.getenv("VERDICT_TTL_UNCERTAIN", "3600"))
+
+    # Whole-response cache for /verify (entries, TTL in seconds); identical requests in flight share one run
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "512"))
+    RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "600"))
+    # Incremental /verify: paragraphs shorter than this many characters are joined to the next
+    # one, and this many paragraph results are kept in memory in front of the SQLite store
+    PARAGRAPH_MIN_CHARS = int(os.getenv("PARAGRAPH_MIN_CHARS", "200"))
+    PARAGRAPH_CACHE_SIZE = int(os.getenv("PARAGRAPH_CACHE_SIZE", "2048"))
+
+    # Near-duplicate claims: estimated Jaccard similarity needed to share a verdict, and
+    # how many recently verified claims are kept for cross-request matching
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.7"))
+    DEDUP_INDEX_SIZE = int(os.getenv("DEDUP_INDEX_SIZE", "5000"))
+
+    # Search providers: per-provider timeouts (seconds), max concurrent searches, DuckDuckGo and
+    # local evidence index worker threads
+    TAVILY_TIMEOUT = float(os.getenv("TAVILY_TIMEOUT", "15"))
+    DDG_TIMEOUT = float(os.getenv("DDG_TIMEOUT", "10"))
+    SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", "8"))
+    DDG_MAX_WORKERS = int(os.getenv("DDG_MAX_WORKERS", "4"))
+    LOCAL_SEARCH_MAX_WORKERS = int(os.getenv("LOCAL_SEARCH_MAX_WORKERS", "2"))
+
+    # Search result cache: entry count, TTL for hits and a shorter TTL for empty results (seconds)
+    SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+    SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "21600"))
+    SEARCH_CACHE_EMPTY_TTL = int(os.getenv("SEARCH_CACHE_EMPTY_TTL", "120"))
+
+    # Verify all claims of a request with one query-generation and one verification LLM call
+    BATCH_VERIFICATION = os.getenv("BATCH_VERIFICATION", "true").lower() == "true"
+
+    # Per-key Gemini rate limits used by the shared LLM scheduler
+    GEMINI_KEY_RPM = int(os.getenv("GEMINI_KEY_RPM", "10"))
+    GEMINI_KEY_TPM = int(os.getenv("GEMINI_KEY_TPM", "250000"))
+    GEMINI_MASTER_RPM = int(os.getenv("GEMINI_MASTER_RPM", "1000"))
+    GEMINI_MASTER_TPM = int(os.getenv("GEMINI_MASTER_TPM", "4000000"))
+    # Where key cooldowns, failure counts and rate-limit buckets live: "sqlite" shares them between
+    # every worker process on the host through a WAL file, "memory" keeps them per process. Reads
+    # of the shared file are served from a copy at most STATE_REFRESH_INTERVAL seconds old
+    STATE_BACKEND = os.getenv("STATE_BACKEND", "sqlite")
+    STATE_PATH = os.getenv("STATE_PATH", os.path.join(CACHE_DIR, "state.sqlite3"))
+    STATE_REFRESH_INTERVAL = float(os.getenv("STATE_REFRESH_INTERVAL", "0.5"))
+    # How long a rate-limited (or repeatedly failing) key is kept out of rotation (seconds)
+    GEMINI_KEY_COOLDOWN = int(os.getenv("GEMINI_KEY_COOLDOWN", "60"))
+    # Send a call to Groq instead when the expected Gemini queue wait exceeds this (seconds)
+    GROQ_WAIT_THRESHOLD = float(os.getenv("GROQ_WAIT_THRESHOLD", "15"))
+
+    # Hedging: race slow Gemini JSON calls against Groq so that Groq's typical answer arrives
+    # by this Gemini latency percentile
+    HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.9"))
+    # Hedge delay (seconds) used until enough Gemini latency samples exist
+    HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "8"))
+
+    # Long-document mode: texts above LONG_DOC_THRESHOLD characters are extracted in chunks
+    LONG_DOC_THRESHOLD = int(os.getenv("LONG_DOC_THRESHOLD", "4000"))
+    LONG_DOC_CHUNK_CHARS = int(os.getenv("LONG_DOC_CHUNK_CHARS", "3000"))
+    LONG_DOC_CLAIM_BUDGET = int(os.getenv("LONG_DOC_CLAIM_BUDGET", "12"))
+    LONG_DOC_CITATION_BUDGET = int(os.getenv("LONG_DOC_CITATION_BUDGET", "8"))
+
+    # Batch verification jobs: worker coroutines, how often idle workers poll the queue and how
+    # long a claimed item stays leased to its worker without a renewal (seconds)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+    JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+    # Resilient LLM calls: retries shared by all LLM calls of one request (LLM_CALL_RETRIES
+    # applies to calls made outside a request), full-jitter exponential backoff (seconds)
+    LLM_RETRY_BUDGET = int(os.getenv("LLM_RETRY_BUDGET", "8"))
+    LLM_CALL_RETRIES = int(os.getenv("LLM_CALL_RETRIES", "3"))
+    BACKOFF_BASE = float(os.getenv("BACKOFF_BASE", "1.0"))
+    BACKOFF_MAX = float(os.getenv("BACKOFF_MAX", "20"))
+    # Per-provider circuit breaker: open after this many consecutive failures, probe again after the timeout (seconds)
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+
+    # Ask Gemini for schema-constrained JSON and Groq for JSON-object mode (disable if a model rejects it)
+    STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "true").lower() == "true"
+
+    # Rule-based claim/citation extraction for short English texts (skips the LLM extraction call)
+    FAST_EXTRACTION = os.getenv("FAST_EXTRACTION", "true").lower() == "true"
+    FAST_EXTRACTION_MAX_CHARS = int(os.getenv("FAST_EXTRACTION_MAX_CHARS", "600"))
+
+    # Local BM25 evidence index consulted before web search (build it with `python -m app.services.evidence_index add ...`)
+    EVIDENCE_INDEX_DIR = os.getenv("EVIDENCE_INDEX_DIR", os.path.join(CACHE_DIR, "evidence"))
+    # Normalized BM25 score (0-1) the best local passage needs to be used instead of web search
+    EVIDENCE_MIN_SCORE = float(os.getenv("EVIDENCE_MIN_SCORE", "0.6"))
+    EVIDENCE_TOP_K = int(os.getenv("EVIDENCE_TOP_K", "3"))
+
+    # Evidence ranking between search and verification: the most relevant sentences (claim-term
+    # overlap x domain authority) up to this many estimated tokens per claim go into the prompt
+    EVIDENCE_TOKEN_BUDGET = int(os.getenv("EVIDENCE_TOKEN_BUDGET", "300"))
+    EVIDENCE_MAX_SENTENCES = int(os.getenv("EVIDENCE_MAX_SENTENCES", "8"))
+    # Claims whose sources all score below this authority (0-1) are "uncertain" without an LLM call
+    LOW_AUTHORITY_THRESHOLD = float(os.getenv("LOW_AUTHORITY_THRESHOLD", "0.3"))
+
+    # Citations with a DOI, arXiv id, ISBN, PMID or URL are checked without search or an LLM call:
+    # "http" resolves unknown identifiers through public metadata APIs, "stub" only uses the local store
+    CITATION_RESOLVER = os.getenv("CITATION_RESOLVER", "http")
+    CITATION_RESOLVER_TIMEOUT = float(os.getenv("CITATION_RESOLVER_TIMEOUT", "5"))
+    # Send HEAD requests to cited URLs (public hosts only); off by default since the URLs come from user text
+    CITATION_PROBE_URLS = os.getenv("CITATION_PROBE_URLS", "false").lower() == "true"
+    # Identifier lookups arriving within this window share one resolver request (seconds)
+    CITATION_BATCH_WINDOW = float(os.getenv("CITATION_BATCH_WINDOW", "0.02"))
+    # How long resolved references stay in the local store: found / not found (seconds)
+    REFERENCE_TTL_FOUND = int(os.getenv("REFERENCE_TTL_FOUND", str(30 * 24 * 3600)))
+    REFERENCE_TTL_MISSING = int(os.getenv("REFERENCE_TTL_MISSING", str(24 * 3600)))
+
+    # Build search queries locally (stopwords + IDF); the LLM writes one only when that search finds nothing
+    LOCAL_QUERY_BUILDER = os.getenv("LOCAL_QUERY_BUILDER", "true").lower() == "true"
+    QUERY_MAX_TERMS = int(os.getenv("QUERY_MAX_TERMS", "8"))
+
+    # Default /verify deadline in ms when the client sends none (0 = no deadline); unfinished claims come back "pending"
+    REQUEST_DEADLINE_MS = int(os.getenv("REQUEST_DEADLINE_MS", "0"))
+    # How often a running /verify request checks whether its client has disconnected (seconds)
+    DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.5"))
+
+    # Provider clients and lookup tables are built on first use; with warm-up on, a background
+    # thread builds them right after startup and /ready reports not ready until it finishes
+    WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
 settings = Settings()
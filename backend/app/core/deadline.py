@@ -0,0 +1,18 @@
+import contextvars
+import time
+from typing import Optional
+
+# Absolute time.monotonic() by which the current request must answer (None = no deadline).
+# Tasks spawned while serving the request inherit it, so every stage can see how long is left.
+request_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+def set_deadline(seconds: Optional[float]):
+    """Starts the current request's deadline `seconds` from now (None or 0 clears it)."""
+    request_deadline.set(time.monotonic() + seconds if seconds else None)
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline, or None when there is no deadline."""
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
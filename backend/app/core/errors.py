@@ -0,0 +1,46 @@
+import asyncio
+
+# Error kinds used to decide how an LLM failure is retried
+RATE_LIMIT = "rate_limit"   # 429 / quota: another key or provider may still have capacity
+TRANSIENT = "transient"     # timeouts, connection errors, 5xx: worth retrying after a backoff
+MALFORMED = "malformed"     # the provider answered, but not with what we asked for
+PERMANENT = "permanent"     # bad request, auth, missing configuration: retrying won't help
+
+class MalformedResponseError(ValueError):
+    """The model replied with an empty or unparseable answer."""
+
+class LLMError(Exception):
+    """An LLM call that failed in an already classified way (`kind`), e.g. once every provider
+    and the request's retry budget are exhausted."""
+
+    def __init__(self, message: str, kind: str = TRANSIENT):
+        super().__init__(message)
+        self.kind = kind
+
+def _status_code(e: Exception):
+    # google.api_core exceptions carry `.code`, the Groq/OpenAI-style SDK errors `.status_code`
+    for attr in ("status_code", "code"):
+        try:
+            return int(getattr(e, attr, None))
+        except (TypeError, ValueError):
+            continue
+    return None
+
+def classify_error(e: Exception) -> str:
+    """Maps a provider exception to RATE_LIMIT, TRANSIENT, MALFORMED or PERMANENT by type and
+    HTTP status rather than by searching the error message."""
+    if isinstance(e, LLMError):
+        return e.kind
+    if isinstance(e, MalformedResponseError):
+        return MALFORMED
+    if isinstance(e, (asyncio.TimeoutError, ConnectionError)):
+        return TRANSIENT
+    status = _status_code(e)
+    if status == 429:
+        return RATE_LIMIT
+    if status == 408 or (status is not None and status >= 500):
+        return TRANSIENT
+    if status is not None or isinstance(e, (ValueError, TypeError)):
+        return PERMANENT
+    # Connection-level failures (no HTTP status) are assumed to be temporary
+    return TRANSIENT
@@ -0,0 +1,215 @@
+"""Tolerant JSON decoding for LLM replies.
+
+`loads_lenient` first tries a strict parse (orjson when installed), then the JSON found inside
+code fences or surrounding prose, and finally `repair_json`: one pass over the text that fixes
+what models commonly get wrong instead of asking them again:
+
+    - single-quoted strings, unquoted keys and bare-word values ({status: verified})
+    - Python literals (True, False, None) and // or /* */ comments
+    - trailing, doubled and missing commas
+    - raw newlines and unescaped quotes inside strings ("the "tallest" tower")
+    - output cut off mid-string or with unclosed objects/arrays
+"""
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # optional: a faster strict parser
+    orjson = None
+
+_CLOSERS = {"{": "}", "[": "]"}
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+# Last characters of a complete value (string, object, array, number, true/false/null)
+_VALUE_END = set('"}]0123456789el')
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_WORD = re.compile(r"[A-Za-z_][\w-]*")
+_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+def loads(text):
+    """Strict JSON parse (orjson when available); raises ValueError."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+def _last(out: list) -> str:
+    return out[-1][-1] if out else ""
+
+def _string_end(text: str, i: int):
+    """Index of the unescaped quote ending the string that starts at i, or None when it runs
+    to the end of the text."""
+    j = i + 1
+    while j < len(text):
+        if text[j] == "\\":
+            j += 2
+            continue
+        if text[j] == text[i]:
+            return j
+        j += 1
+    return None
+
+def _closes_string(text: str, i: int, depth: int = 0) -> bool:
+    """Whether a quote at i-1 really ends the string: it is followed by a delimiter, the end of
+    the text, a line break, or another string that itself ends properly ("a" "b" is two
+    strings missing a comma). A quote followed by more words is part of the string."""
+    j = i
+    while j < len(text) and text[j] in " \t\r\n":
+        if text[j] == "\n":
+            return True
+        j += 1
+    if j == len(text) or text[j] in ",:}]":
+        return True
+    if text[j] in "\"'" and depth < 8:
+        end = _string_end(text, j)
+        return end is None or _closes_string(text, end + 1, depth + 1)
+    return False
+
+def _read_string(text: str, i: int):
+    quote = text[i]
+    buf = ['"']
+    j = i + 1
+    while j < len(text):
+        ch = text[j]
+        if ch == "\\":
+            nxt = text[j + 1] if j + 1 < len(text) else ""
+            if nxt == "'":
+                buf.append("'")
+            elif nxt and nxt in '"\\/bfnrtu':
+                buf.append(ch + nxt)
+            elif nxt:
+                buf.append("\\\\" + nxt)
+            j += 2
+            continue
+        if ch == quote:
+            if _closes_string(text, j + 1):
+                return j + 1, "".join(buf) + '"'
+            buf.append('\\"' if ch == '"' else ch)
+        elif ch == '"':
+            buf.append('\\"')
+        elif ch in _ESCAPES:
+            buf.append(_ESCAPES[ch])
+        elif ch < " ":
+            buf.append(f"\\u{ord(ch):04x}")
+        else:
+            buf.append(ch)
+        j += 1
+    # Cut off mid-string
+    return len(text), "".join(buf) + '"'
+
+def _drop_trailing_commas(out: list):
+    while out and out[-1] == ",":
+        out.pop()
+
+def repair_json(text: str) -> str:
+    """Rewrites almost-JSON (starting at its first bracket) into valid JSON; text after the
+    outermost value is dropped. The result may still fail to parse when the damage is worse
+    than the cases listed in the module docstring."""
+    out = []
+    stack = []
+    i = 0
+
+    def separate():
+        # A value right after a complete value is missing its comma
+        if stack and _last(out) in _VALUE_END:
+            out.append(",")
+
+    while i < len(text):
+        c = text[i]
+        if c in "\"'":
+            separate()
+            i, chunk = _read_string(text, i)
+            out.append(chunk)
+        elif c in "{[":
+            separate()
+            stack.append(c)
+            out.append(c)
+            i += 1
+        elif c in "}]":
+            if not stack:
+                break
+            _drop_trailing_commas(out)
+            if _last(out) == ":":
+                out.append("null")
+            out.append(_CLOSERS[stack.pop()])
+            i += 1
+            if not stack:
+                break
+        elif c == ",":
+            if _last(out) not in ",[{":
+                out.append(",")
+            i += 1
+        elif c == ":":
+            out.append(":")
+            i += 1
+        elif text.startswith("//", i):
+            end = text.find("\n", i)
+            i = len(text) if end == -1 else end
+        elif text.startswith("/*", i):
+            end = text.find("*/", i)
+            i = len(text) if end == -1 else end + 2
+        elif c.isdigit() or (c in "-+." and _NUMBER.match(text, i)):
+            match = _NUMBER.match(text, i)
+            number = match.group().lstrip("+")
+            if number.startswith((".", "-.")):
+                number = number.replace(".", "0.", 1)
+            if number.endswith("."):
+                number += "0"
+            separate()
+            out.append(number)
+            i = match.end()
+        elif c.isalpha() or c == "_":
+            separate()
+            if _last(out) == ":":
+                # Bare value: everything up to the next delimiter
+                end = i
+                while end < len(text) and text[end] not in ",}]\n":
+                    end += 1
+                value = text[i:end].strip()
+                out.append(_LITERALS.get(value) or json.dumps(value, ensure_ascii=False))
+                i = end
+            else:
+                word = _WORD.match(text, i).group()
+                i += len(word)
+                key = text[i:].lstrip().startswith(":")
+                out.append(_LITERALS[word] if word in _LITERALS and not key else json.dumps(word))
+        else:
+            # Whitespace and stray characters
+            i += 1
+
+    _drop_trailing_commas(out)
+    if _last(out) == ":":
+        out.append("null")
+    while stack:
+        out.append(_CLOSERS[stack.pop()])
+    return "".join(out)
+
+def _extract(text: str) -> str:
+    """The JSON part of a reply: inside a ```json fence if present, from the first bracket on."""
+    if "```" in text:
+        fenced = text.split("```")[1]
+        if fenced.startswith("json"):
+            fenced = fenced[4:]
+        if fenced.strip():
+            text = fenced
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise ValueError("No JSON object in response")
+    return text[min(starts):].strip()
+
+def loads_lenient(text: str):
+    """Parses an LLM reply; returns (value, repaired) where `repaired` says the strict parsers
+    failed and repair_json was needed. Raises ValueError when nothing usable is found."""
+    text = (text or "").strip()
+    if not text:
+        raise ValueError("Empty response")
+    try:
+        return loads(text), False
+    except ValueError:
+        pass
+    body = _extract(text)
+    end = max(body.rfind("}"), body.rfind("]"))
+    try:
+        return loads(body[:end + 1]), False
+    except ValueError:
+        pass
+    return loads(repair_json(body)), True
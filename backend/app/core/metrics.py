@@ -0,0 +1,174 @@
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Per-request stage breakdown (stage -> seconds), only set when a client asks for it
+request_timings = contextvars.ContextVar("request_timings", default=None)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_str(labelnames, values) -> str:
+    if not labelnames:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(labelnames, values)) + "}"
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(n, "") for n in self.labelnames), 0.0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_label_str(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        for key, state in sorted(self._values.items()):
+            for bound, count in zip(self.buckets, state):
+                lines.append(f"{self.name}_bucket{_label_str(names, key + (bound,))} {count}")
+            lines.append(f"{self.name}_bucket{_label_str(names, key + ('+Inf',))} {state[-1]}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {state[-2]}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {state[-1]}")
+        return lines
+
+class CallbackGauge:
+    """Gauge whose samples are read from `collect() -> [(label values tuple, value), ...]` at scrape time."""
+
+    def __init__(self, name: str, documentation: str, labelnames, collect):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            samples = self.collect()
+        except Exception as e:
+            print(f"Metrics collector {self.name} failed: {e}")
+            samples = []
+        for key, value in samples:
+            lines.append(f"{self.name}{_label_str(self.labelnames, key)} {value}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self._add(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self._add(Histogram(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> CallbackGauge:
+        return self._add(CallbackGauge(*args, **kwargs))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "trustguard_stage_seconds", "Time spent per pipeline stage.", ["stage"]
+)
+LLM_CALLS = registry.counter(
+    "trustguard_llm_calls_total", "LLM calls by provider, key and outcome.", ["provider", "key", "outcome"]
+)
+RATE_LIMITED = registry.counter(
+    "trustguard_rate_limited_total", "Rate-limit (429) responses by provider and key.", ["provider", "key"]
+)
+FALLBACKS = registry.counter(
+    "trustguard_fallbacks_total", "Fallback paths taken (Groq fallback, hedges, per-claim retries...).", ["kind"]
+)
+CACHE_LOOKUPS = registry.counter(
+    "trustguard_cache_lookups_total", "Cache lookups by cache and result (hit tier or miss).", ["cache", "result"]
+)
+SEARCHES = registry.counter(
+    "trustguard_search_requests_total", "Upstream search calls by provider and outcome.", ["provider", "outcome"]
+)
+EXTRACTIONS = registry.counter(
+    "trustguard_extractions_total", "Claim extractions by path (local rules or LLM).", ["path"]
+)
+LLM_PARSES = registry.counter(
+    "trustguard_llm_parses_total",
+    "LLM JSON replies by stage and outcome (ok, repaired without a retry, unparseable, schema-invalid).",
+    ["stage", "outcome"],
+)
+CITATION_CHECKS = registry.counter(
+    "trustguard_citation_checks_total",
+    "Citation checks by path (invalid_identifier, known, resolved, search_llm).", ["path"]
+)
+EVIDENCE_TOKENS = registry.counter(
+    "trustguard_evidence_tokens_total", "Estimated evidence tokens before and after ranking.", ["stage"]
+)
+BACKOFF_SECONDS = registry.counter(
+    "trustguard_backoff_seconds_total", "Seconds spent sleeping in retry backoff, by stage.", ["stage"]
+)
+
+def record_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+@contextmanager
+def timed(stage: str):
+    """Times the enclosed block into the stage histogram (and the request breakdown, if enabled)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+async def backoff_sleep(seconds: float, stage: str):
+    """asyncio.sleep that is accounted as retry backoff for `stage`."""
+    BACKOFF_SECONDS.inc(seconds, stage=stage)
+    with timed("backoff"):
+        await asyncio.sleep(seconds)
@@ -1,15 +1,14 @@
-def clean_json_response(text: str) -> str:
-    """Cleans the response text from the LLM to ensure it's valid JSON."""
-    text = text.strip()
-    if "```json" in text:
-        text = text.split("```json")[1].split("```")[0].strip()
-    elif "```" in text:
-        text = text.split("```")[1].split("```")[0].strip()
-    
-    # Remove any leading/trailing non-JSON characters
-    start_idx = text.find('{')
-    end_idx = text.rfind('}')
-    if start_idx != -1 and end_idx != -1:
-        text = text[start_idx:end_idx+1]
-    
-    return text
+import unicodedata
+
+def normalize_text(text: str) -> str:
+    """Normalizes free text for use as a cache key (case, unicode form, whitespace, trailing punctuation)."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = " ".join(text.split())
+    return text.strip(" \t\n\"'.,;:!?")
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header value ("*" or a list of possibly weak ETags) matches `etag`."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
@@ -0,0 +1,79 @@
+from pydantic import BaseModel, field_validator
+from typing import Any, ClassVar, Dict, List
+
+# Shapes of the JSON the LLM prompts ask for. Every reply (from either provider) is validated
+# into these models; `response_schema` is the same shape in the OpenAPI subset Gemini accepts
+# for schema-constrained output. The field each prompt is about has no default, so a reply
+# missing it counts as malformed and is retried instead of silently meaning "nothing found".
+
+def _object(properties: dict, required: list) -> dict:
+    return {"type": "object", "properties": properties, "required": required}
+
+_STRING = {"type": "string"}
+_NUMBER = {"type": "number"}
+_INTEGER = {"type": "integer"}
+_STATUS = {"type": "string", "format": "enum", "enum": ["verified", "uncertain", "hallucinated"]}
+_VERDICT = {"status": _STATUS, "confidence": _NUMBER, "explanation": _STRING}
+
+class ExtractionReply(BaseModel):
+    language: str = "en"
+    claims: List[str]
+    citations: List[str] = []
+
+    response_schema: ClassVar[dict] = _object(
+        {"language": _STRING, "claims": {"type": "array", "items": _STRING}, "citations": {"type": "array", "items": _STRING}},
+        ["language", "claims", "citations"],
+    )
+
+class VerdictReply(BaseModel):
+    status: str
+    confidence: float = 0.5
+    explanation: str = ""
+
+    response_schema: ClassVar[dict] = _object(_VERDICT, ["status", "confidence", "explanation"])
+
+    @field_validator("status")
+    @classmethod
+    def known_status(cls, value: str) -> str:
+        value = value.strip().lower()
+        if value not in _STATUS["enum"]:
+            raise ValueError(f"invalid status {value!r}")
+        return value
+
+    @field_validator("confidence")
+    @classmethod
+    def unit_interval(cls, value: float) -> float:
+        # Models sometimes answer in percent
+        if value > 1:
+            value /= 100
+        return min(1.0, max(0.0, value))
+
+class IndexedVerdict(VerdictReply):
+    index: int
+
+class BatchVerdictReply(BaseModel):
+    # Items are validated one by one (IndexedVerdict), so a bad entry only costs its own claim
+    results: List[Dict[str, Any]]
+
+    response_schema: ClassVar[dict] = _object(
+        {"results": {"type": "array", "items": _object({"index": _INTEGER, **_VERDICT}, ["index", "status", "confidence", "explanation"])}},
+        ["results"],
+    )
+
+class IndexedQuery(BaseModel):
+    index: int
+    query: str
+
+class QueriesReply(BaseModel):
+    queries: List[Dict[str, Any]]
+
+    response_schema: ClassVar[dict] = _object(
+        {"queries": {"type": "array", "items": _object({"index": _INTEGER, "query": _STRING}, ["index", "query"])}},
+        ["queries"],
+    )
+
+class CitationReply(BaseModel):
+    isReal: bool
+    confidence: float = 0.5
+
+    response_schema: ClassVar[dict] = _object({"isReal": {"type": "boolean"}, "confidence": _NUMBER}, ["isReal", "confidence"])
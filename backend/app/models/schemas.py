@@ -1,18 +1,28 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
+from pydantic import Field
 
 class VerifyRequest(BaseModel):
     text: str
     context_url: Optional[str] = None
+    # Relative deadline in ms (the X-Deadline-Ms header does the same); unfinished claims come back "pending"
+    deadlineMs: Optional[int] = Field(None, gt=0)
+    # Only extract and verify paragraphs not seen before; the others reuse their stored results
+    incremental: bool = False
+    # The client's own paragraph split of `text` for incremental mode (default: split at blank lines)
+    paragraphs: Optional[List[str]] = None
 
 class ClaimStatus(BaseModel):
     id: str
     text: str
-    status: str # "verified", "uncertain", "hallucinated"
+    status: str # "verified", "uncertain", "hallucinated", "pending" (not finished before the deadline)
     confidence: float
     source: Optional[str] = None
     sourceUrl: Optional[str] = None
     explanation: Optional[str] = None
+    # Set when this stands in for a check that failed (e.g. every LLM call rate-limited); not
+    # serialized, and never cached so the next request tries again
+    _fallback: bool = False
 
 class CitationStatus(BaseModel):
     id: str
@@ -20,8 +30,45 @@ class CitationStatus(BaseModel):
     exists: Optional[bool] = None
     url: Optional[str] = None
     checkingStatus: str = "complete"
+    _fallback: bool = False
+
+class ParagraphStatus(BaseModel):
+    hash: str
+    # True when the paragraph's results came from the store instead of being verified now
+    reused: bool
+    # How many of the response's claims/citations (in order) belong to this paragraph
+    claims: int
+    citations: int
 
 class VerificationResponse(BaseModel):
     claims: List[ClaimStatus]
     citations: List[CitationStatus]
     overallScore: int
+    # True when the deadline cut verification short (the score only covers completed claims)
+    partial: bool = False
+    # Per-stage milliseconds, only present when requested with X-Debug-Timing
+    timings: Optional[Dict[str, float]] = None
+    # Incremental mode only: one entry per paragraph, in text order
+    paragraphs: Optional[List[ParagraphStatus]] = None
+
+class BatchVerifyRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=5000)
+
+class BatchJobResponse(BaseModel):
+    jobId: str
+    status: str
+    total: int
+
+class JobItem(BaseModel):
+    position: int
+    status: str # "queued", "running", "done", "failed"
+    result: Optional[VerificationResponse] = None
+    error: Optional[str] = None
+
+class JobStatus(BaseModel):
+    jobId: str
+    status: str # "queued", "running", "complete"
+    total: int
+    completed: int
+    failed: int
+    items: List[JobItem]
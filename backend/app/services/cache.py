@@ -0,0 +1,348 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+import uuid
+from collections import OrderedDict
+from typing import Optional
+from ..core.config import settings
+from ..core.metrics import CACHE_LOOKUPS
+from ..core.utils import normalize_text
+from ..models.schemas import CitationStatus, ClaimStatus, VerificationResponse, VerifyRequest
+from .dedup import MinHashIndex
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after a per-entry TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.time():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        self._data[key] = (time.time() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one shared in-flight task.
+
+    With `cancel_abandoned`, the shared task is cancelled once every caller waiting on it has
+    been cancelled (e.g. all their clients disconnected) instead of running on for nobody.
+    """
+
+    def __init__(self, cancel_abandoned: bool = False):
+        self.cancel_abandoned = cancel_abandoned
+        self._inflight = {}
+        self._waiters = {}
+
+    async def do(self, key, fn):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.pop(key, None) if self._inflight.get(key) is t else None)
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # Shield so one cancelled caller doesn't cancel the work the others are waiting on
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self.cancel_abandoned and self._waiters[task] == 1:
+                task.cancel()
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def __contains__(self, key):
+        return key in self._inflight
+
+    def __len__(self):
+        return len(self._inflight)
+
+def mark_fallback(item):
+    """Flags a ClaimStatus/CitationStatus that stands in for a failed check; returns it."""
+    item._fallback = True
+    return item
+
+def cacheable(item) -> bool:
+    """Whether a claim or citation verdict may be stored: not a stand-in for a failed check
+    and not left "pending" by the deadline. Every cache of verdicts applies this."""
+    if item._fallback:
+        return False
+    status = item.status if isinstance(item, ClaimStatus) else item.checkingStatus
+    return (status or "").lower() != "pending"
+
+class VerdictCache:
+    """Two-tier (memory LRU + SQLite) cache of claim verdicts keyed on normalized claim text and language.
+
+    Exact misses fall back to a per-language MinHash index of recently stored claims, so
+    rewordings of an already verified claim reuse its verdict: a match needs DEDUP_THRESHOLD
+    similarity plus the same numbers, negation and superlatives (dedup.guard_terms).
+    """
+
+    def __init__(self, path: str, maxsize: int, ttls: dict, default_ttl: int,
+                 near_duplicate_threshold: float = 0.7, near_duplicate_size: int = 5000):
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.memory = TTLCache(maxsize=maxsize, ttl=default_ttl)
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.near_duplicate_size = near_duplicate_size
+        self.near_duplicates = {}
+        self._lock = threading.Lock()
+        self._db = None
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts (key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM verdicts WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Verdict cache disk tier disabled: {e}")
+            self._db = None
+
+    @staticmethod
+    def make_key(claim_text: str, language: str) -> str:
+        raw = f"{(language or 'en').lower()}|{normalize_text(claim_text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, claim_text: str, language: str = "en") -> Optional[ClaimStatus]:
+        """Returns a cached verdict as a new ClaimStatus (fresh id), or None on a miss."""
+        key = self.make_key(claim_text, language)
+        payload = self.memory.get(key)
+        if payload is not None:
+            CACHE_LOOKUPS.inc(cache="verdict", result="memory")
+        elif self._db is not None:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT payload, expires_at FROM verdicts WHERE key = ?", (key,)
+                ).fetchone()
+            if row and row[1] > time.time():
+                payload = json.loads(row[0])
+                self.memory.set(key, payload, ttl=row[1] - time.time())
+                CACHE_LOOKUPS.inc(cache="verdict", result="disk")
+
+        if payload is None:
+            payload = self._near_duplicate(claim_text, language)
+            if payload is not None:
+                CACHE_LOOKUPS.inc(cache="verdict", result="near_duplicate")
+
+        if payload is None:
+            CACHE_LOOKUPS.inc(cache="verdict", result="miss")
+            return None
+        return ClaimStatus(**{**payload, "id": str(uuid.uuid4()), "text": claim_text})
+
+    def _near_duplicate(self, claim_text: str, language: str):
+        index = self.near_duplicates.get((language or "en").lower())
+        match = index.query(claim_text) if index is not None else None
+        if match is None:
+            return None
+        key, (payload, expires_at), _ = match
+        if expires_at <= time.time():
+            index.remove(key)
+            return None
+        return payload
+
+    def set(self, claim_text: str, language: str, claim: ClaimStatus):
+        """Stores a verdict with a TTL chosen by its status (failed checks are not stored)."""
+        if not cacheable(claim):
+            return
+        key = self.make_key(claim_text, language)
+        ttl = self.ttls.get((claim.status or "").lower(), self.default_ttl)
+        payload = claim.model_dump()
+        self.memory.set(key, payload, ttl=ttl)
+        language = (language or "en").lower()
+        if language not in self.near_duplicates:
+            self.near_duplicates[language] = MinHashIndex(
+                threshold=self.near_duplicate_threshold, maxsize=self.near_duplicate_size
+            )
+        self.near_duplicates[language].add(key, claim_text, (payload, time.time() + ttl))
+        if self._db is None:
+            return
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO verdicts (key, payload, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(payload), time.time() + ttl),
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Verdict cache write failed: {e}")
+
+def content_hash(text: str) -> str:
+    """SHA-256 of text with its unicode form and whitespace normalized: reflowing the text
+    keeps the hash, any change to the words does not."""
+    text = " ".join(unicodedata.normalize("NFKC", text or "").split())
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class PayloadStore:
+    """Two-tier (memory LRU + SQLite) store of JSON payloads with per-entry TTLs. The SQLite
+    file is shared by every worker on the host; the memory tier is per process."""
+
+    def __init__(self, path: str, table: str, maxsize: int, ttl: float):
+        self.table = table
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._db = None
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute(f"DELETE FROM {table} WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"{table} store disk tier disabled: {e}")
+            self._db = None
+
+    def get_payload(self, key: str):
+        payload = self.memory.get(key)
+        if payload is None and self._db is not None:
+            with self._lock:
+                row = self._db.execute(
+                    f"SELECT payload, expires_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+            if row and row[1] > time.time():
+                payload = json.loads(row[0])
+                self.memory.set(key, payload, ttl=row[1] - time.time())
+        return payload
+
+    def set_payload(self, key: str, payload, ttl: float):
+        self.memory.set(key, payload, ttl=ttl)
+        if self._db is None:
+            return
+        try:
+            with self._lock:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, payload, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(payload), time.time() + ttl),
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"{self.table} store write failed: {e}")
+
+class ParagraphStore(PayloadStore):
+    """Content-addressed store for incremental verification: paragraph hash -> the claims and
+    citations found in it, with their verdicts.
+
+    An entry expires with the shortest verdict TTL among its claims, so a paragraph holding
+    an "uncertain" claim is re-verified as soon as that verdict would be.
+    """
+
+    def __init__(self, path: str, maxsize: int, ttls: dict, default_ttl: int):
+        super().__init__(path, "paragraph_results", maxsize, default_ttl)
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+
+    @staticmethod
+    def make_key(paragraph: str) -> str:
+        return content_hash(paragraph)
+
+    def get(self, key: str) -> Optional[dict]:
+        """Returns {"claims": [ClaimStatus], "citations": [CitationStatus]}, or None on a miss."""
+        payload = self.get_payload(key)
+        CACHE_LOOKUPS.inc(cache="paragraph", result="miss" if payload is None else "hit")
+        if payload is None:
+            return None
+        return {
+            "claims": [ClaimStatus(**c) for c in payload["claims"]],
+            "citations": [CitationStatus(**c) for c in payload["citations"]],
+        }
+
+    def set(self, key: str, claims: list, citations: list):
+        ttl = min(
+            (self.ttls.get((c.status or "").lower(), self.default_ttl) for c in claims),
+            default=max(self.ttls.values()),
+        )
+        payload = {"claims": [c.model_dump() for c in claims], "citations": [c.model_dump() for c in citations]}
+        self.set_payload(key, payload, ttl)
+
+class ResultCache(PayloadStore):
+    """Complete /verify responses keyed on the normalized request, each stored with its ETag."""
+
+    def __init__(self, path: str, maxsize: int, ttl: float):
+        super().__init__(path, "results", maxsize, ttl)
+        self.ttl = ttl
+
+    @staticmethod
+    def make_key(request: VerifyRequest) -> str:
+        # Everything in the request that changes the response; the deadline only decides
+        # whether a response is complete, and partial ones are never stored
+        options = json.dumps({
+            "incremental": request.incremental,
+            "paragraphs": [content_hash(p) for p in request.paragraphs or []],
+        }, sort_keys=True)
+        return content_hash(f"{options}\n{request.text}")
+
+    @staticmethod
+    def make_etag(response: VerificationResponse) -> str:
+        body = response.model_dump_json(exclude={"timings"})
+        return '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+
+    def get(self, key: str):
+        """Returns (VerificationResponse, etag), or None on a miss."""
+        payload = self.get_payload(key)
+        if payload is None:
+            return None
+        return VerificationResponse(**payload["response"]), payload["etag"]
+
+    def set(self, key: str, response: VerificationResponse) -> str:
+        etag = self.make_etag(response)
+        self.set_payload(key, {"response": response.model_dump(exclude={"timings"}), "etag": etag}, self.ttl)
+        return etag
+
+verdict_cache = VerdictCache(
+    path=os.path.join(settings.CACHE_DIR, "verdicts.sqlite3"),
+    maxsize=settings.VERDICT_CACHE_SIZE,
+    ttls={
+        "verified": settings.VERDICT_TTL_VERIFIED,
+        "hallucinated": settings.VERDICT_TTL_HALLUCINATED,
+        "uncertain": settings.VERDICT_TTL_UNCERTAIN,
+    },
+    default_ttl=settings.VERDICT_TTL_UNCERTAIN,
+    near_duplicate_threshold=settings.DEDUP_THRESHOLD,
+    near_duplicate_size=settings.DEDUP_INDEX_SIZE,
+)
+
+paragraph_store = ParagraphStore(
+    path=os.path.join(settings.CACHE_DIR, "paragraphs.sqlite3"),
+    maxsize=settings.PARAGRAPH_CACHE_SIZE,
+    ttls=verdict_cache.ttls,
+    default_ttl=settings.VERDICT_TTL_UNCERTAIN,
+)
+
+result_cache = ResultCache(
+    path=os.path.join(settings.CACHE_DIR, "results.sqlite3"),
+    maxsize=settings.RESULT_CACHE_SIZE,
+    ttl=settings.RESULT_CACHE_TTL,
+)
@@ -0,0 +1,380 @@
+"""Identifier-aware citation checks: DOIs, arXiv ids, ISBNs, PubMed ids and URLs.
+
+A citation carrying one of these identifiers is decided without search or an LLM call:
+- an identifier that fails its format or check digit cannot point at a real work;
+- a known one is answered from the local reference store;
+- unknown ones are looked up through a pluggable CitationResolver. Lookups that arrive
+  together (all citations of a request) are coalesced into one batched resolver call.
+Citations without an identifier, or that the resolver can't decide, keep the search + LLM path.
+"""
+import asyncio
+import ipaddress
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional
+from urllib.parse import urlsplit
+import httpx
+from ..core.config import settings
+from .extraction import ARXIV, DOI, ISBN, PMID
+
+URL = re.compile(r"\bhttps?://[^\s<>\"'()\[\]]+")
+
+class Identifier(NamedTuple):
+    kind: str    # "doi", "arxiv", "isbn", "pmid" or "url"
+    value: str   # normalized form (lowercased DOI, ISBN digits, ...)
+    valid: bool  # passes its format rules and check digit
+
+def isbn_digits(text: str, start: int) -> str:
+    """Reads an ISBN's digits after `start`, skipping hyphens and spaces and stopping after 13
+    digits (978/979 prefix) or 10, so a following year or page number isn't swallowed."""
+    digits = ""
+    for ch in text[start:start + 20]:
+        if ch in " -":
+            continue
+        if not (ch.isdigit() or ch in "Xx"):
+            break
+        digits += ch.upper()
+        if len(digits) == 13 or (len(digits) == 10 and not digits.startswith(("978", "979"))):
+            break
+    return digits
+
+def isbn_valid(digits: str) -> bool:
+    if len(digits) == 10:
+        if not digits[:9].isdigit() or not (digits[9].isdigit() or digits[9] == "X"):
+            return False
+        values = [int(d) for d in digits[:9]] + [10 if digits[9] == "X" else int(digits[9])]
+        return sum((10 - i) * v for i, v in enumerate(values)) % 11 == 0
+    if len(digits) == 13 and digits.isdigit() and digits[:3] in ("978", "979"):
+        return sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits)) % 10 == 0
+    return False
+
+def arxiv_valid(arxiv_id: str) -> bool:
+    if "/" in arxiv_id:
+        # Old scheme (archive/YYMMNNN), used from August 1991 to March 2007
+        yymm = arxiv_id.split("/")[1][:4]
+        year, month = int(yymm[:2]), int(yymm[2:])
+        in_range = (year >= 91 and (year, month) >= (91, 8)) or (year, month) <= (7, 3)
+        return 1 <= month <= 12 and in_range
+    yymm, number = arxiv_id.split(".")
+    year, month = int(yymm[:2]), int(yymm[2:])
+    if not 1 <= month <= 12 or (year, month) < (7, 4):
+        return False
+    # Sequence numbers grew from four to five digits in January 2015
+    return len(number) == (5 if (year, month) >= (15, 1) else 4)
+
+def url_valid(url: str) -> bool:
+    host = urlsplit(url).hostname or ""
+    labels = host.split(".")
+    return len(labels) >= 2 and all(labels) and labels[-1].isalpha() and len(labels[-1]) >= 2
+
+async def public_url(url: str) -> bool:
+    """True when `url` is http(s) and every address its host resolves to is publicly routable,
+    so probing it cannot reach loopback, private-network, link-local or metadata services."""
+    parts = urlsplit(url)
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError:
+        return False
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return False
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except OSError:
+        return False
+    addresses = {ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos}
+    return bool(addresses) and all(address.is_global and not address.is_multicast for address in addresses)
+
+def find_identifier(text: str) -> Optional[Identifier]:
+    """The first identifier in a citation, checked in order of specificity (a doi.org URL is a
+    DOI, not a plain URL); None for free-text citations."""
+    match = DOI.search(text)
+    if match:
+        return Identifier("doi", match.group(1).lower(), True)
+    match = ARXIV.search(text)
+    if match:
+        arxiv_id = match.group(1)
+        return Identifier("arxiv", arxiv_id, arxiv_valid(arxiv_id))
+    match = ISBN.search(text)
+    if match:
+        digits = isbn_digits(text, match.end())
+        return Identifier("isbn", digits, isbn_valid(digits))
+    match = PMID.search(text)
+    if match:
+        pmid = match.group(1) or match.group(2)
+        return Identifier("pmid", str(int(pmid)), int(pmid) > 0)
+    match = URL.search(text)
+    if match:
+        url = match.group().rstrip(".,;:!?")
+        return Identifier("url", url, url_valid(url))
+    return None
+
+def canonical_url(identifier: Identifier) -> Optional[str]:
+    if identifier.kind == "doi":
+        return f"https://doi.org/{identifier.value}"
+    if identifier.kind == "arxiv":
+        return f"https://arxiv.org/abs/{identifier.value}"
+    if identifier.kind == "pmid":
+        return f"https://pubmed.ncbi.nlm.nih.gov/{identifier.value}/"
+    if identifier.kind == "url":
+        return identifier.value
+    return None
+
+class ReferenceStore:
+    """SQLite index of identifiers already resolved: (kind, value) -> exists, url, title, with a
+    long TTL for references that were found and a short one for those that were not."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = None
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS refs (kind TEXT NOT NULL, value TEXT NOT NULL, found INTEGER NOT NULL,"
+                " url TEXT, title TEXT, expires_at REAL NOT NULL, PRIMARY KEY (kind, value))"
+            )
+            self._db.execute("DELETE FROM refs WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Reference store disabled: {e}")
+            self._db = None
+
+    def get(self, identifier: Identifier) -> Optional[dict]:
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT found, url, title, expires_at FROM refs WHERE kind = ? AND value = ?",
+                (identifier.kind, identifier.value),
+            ).fetchone()
+        if row is None or row[3] <= time.time():
+            return None
+        return {"exists": bool(row[0]), "url": row[1], "title": row[2]}
+
+    def set(self, identifier: Identifier, reference: dict):
+        if self._db is None:
+            return
+        ttl = settings.REFERENCE_TTL_FOUND if reference["exists"] else settings.REFERENCE_TTL_MISSING
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO refs (kind, value, found, url, title, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (identifier.kind, identifier.value, int(reference["exists"]), reference.get("url"),
+                     reference.get("title"), time.time() + ttl),
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Reference store write failed: {e}")
+
+class CitationResolver(ABC):
+    """Looks up a batch of identifiers. `resolve` returns {identifier: {"exists", "url", "title"}}
+    for the identifiers it could decide; the ones it leaves out stay unknown."""
+
+    @abstractmethod
+    async def resolve(self, identifiers: list) -> dict:
+        ...
+
+class StubResolver(CitationResolver):
+    """Offline resolver for tests and benchmarks: answers from a fixed {(kind, value): reference} table."""
+
+    def __init__(self, known: dict = None):
+        self.known = known or {}
+        self.batches = []
+
+    async def resolve(self, identifiers: list) -> dict:
+        self.batches.append(list(identifiers))
+        return {i: self.known[(i.kind, i.value)] for i in identifiers if (i.kind, i.value) in self.known}
+
+class HttpResolver(CitationResolver):
+    """Public metadata APIs, one request per identifier kind and batch: Crossref (DOIs), the
+    arXiv API, PubMed E-utilities (PMIDs) and Open Library (ISBNs). Only answers a source is
+    authoritative for count as "not found" (arXiv, PubMed, a 404/410); a DOI missing from
+    Crossref stays unknown.
+
+    Cited URLs come from user text, so they are only probed when `probe_urls` is on: a HEAD
+    request each, sent only to hosts that resolve to public addresses, with every redirect
+    hop checked the same way. Otherwise they stay unknown."""
+
+    MAX_REDIRECTS = 5
+
+    def __init__(self, timeout: float, probe_urls: bool = False):
+        self.timeout = timeout
+        self.probe_urls = probe_urls
+
+    async def resolve(self, identifiers: list) -> dict:
+        by_kind = {}
+        for identifier in identifiers:
+            if identifier.kind == "url" and not self.probe_urls:
+                continue
+            by_kind.setdefault(identifier.kind, []).append(identifier)
+        lookups = {
+            "doi": self._crossref, "arxiv": self._arxiv, "pmid": self._pubmed, "isbn": self._openlibrary, "url": self._urls,
+        }
+        resolved = {}
+        async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
+            results = await asyncio.gather(
+                *[lookups[kind](client, batch) for kind, batch in by_kind.items()], return_exceptions=True
+            )
+        for kind, result in zip(by_kind, results):
+            if isinstance(result, Exception):
+                print(f"Citation lookup for {kind} failed: {result!r}")
+            else:
+                resolved.update(result)
+        return resolved
+
+    async def _crossref(self, client, identifiers):
+        # A comma would split the filter; such DOIs stay unknown
+        batch = [i for i in identifiers if "," not in i.value]
+        response = await client.get("https://api.crossref.org/works", params={
+            "filter": ",".join(f"doi:{i.value}" for i in batch), "rows": len(batch), "select": "DOI,title",
+        })
+        response.raise_for_status()
+        found = {
+            item.get("DOI", "").lower(): (item.get("title") or [None])[0]
+            for item in response.json().get("message", {}).get("items", [])
+        }
+        return {i: {"exists": True, "url": canonical_url(i), "title": found[i.value]} for i in batch if i.value in found}
+
+    async def _arxiv(self, client, identifiers):
+        response = await client.get("https://export.arxiv.org/api/query", params={
+            "id_list": ",".join(i.value for i in identifiers), "max_results": len(identifiers),
+        })
+        response.raise_for_status()
+        atom = "{http://www.w3.org/2005/Atom}"
+        titles = {}
+        for entry in ElementTree.fromstring(response.text).iter(f"{atom}entry"):
+            entry_id = entry.findtext(f"{atom}id") or ""
+            title = " ".join((entry.findtext(f"{atom}title") or "").split())
+            if "/abs/" in entry_id and title:
+                titles[re.sub(r"v\d+$", "", entry_id.split("/abs/", 1)[1])] = title
+        return {
+            i: {"exists": i.value in titles, "url": canonical_url(i) if i.value in titles else None, "title": titles.get(i.value)}
+            for i in identifiers
+        }
+
+    async def _pubmed(self, client, identifiers):
+        response = await client.get("https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi", params={
+            "db": "pubmed", "id": ",".join(i.value for i in identifiers), "retmode": "json",
+        })
+        response.raise_for_status()
+        result = response.json().get("result", {})
+        resolved = {}
+        for i in identifiers:
+            summary = result.get(i.value)
+            if summary is None:
+                continue
+            exists = "error" not in summary
+            resolved[i] = {"exists": exists, "url": canonical_url(i) if exists else None, "title": summary.get("title")}
+        return resolved
+
+    async def _openlibrary(self, client, identifiers):
+        response = await client.get("https://openlibrary.org/api/books", params={
+            "bibkeys": ",".join(f"ISBN:{i.value}" for i in identifiers), "format": "json", "jscmd": "data",
+        })
+        response.raise_for_status()
+        books = response.json()
+        return {
+            i: {"exists": True, "url": books[f"ISBN:{i.value}"].get("url"), "title": books[f"ISBN:{i.value}"].get("title")}
+            for i in identifiers if f"ISBN:{i.value}" in books
+        }
+
+    async def _urls(self, client, identifiers):
+        async def check(identifier):
+            url = identifier.value
+            for _ in range(self.MAX_REDIRECTS + 1):
+                # The host is resolved again when connecting, so a rebinding DNS server can still
+                # slip past this check; that is why probing is opt-in
+                if not await public_url(url):
+                    return None
+                try:
+                    response = await client.head(url, follow_redirects=False)
+                except httpx.HTTPError:
+                    return None
+                location = response.headers.get("location")
+                if not response.is_redirect or not location:
+                    break
+                url = str(response.url.join(location))
+            else:
+                return None
+            if response.status_code < 400:
+                return {"exists": True, "url": str(response.url), "title": None}
+            if response.status_code in (404, 410):
+                return {"exists": False, "url": None, "title": None}
+            return None
+
+        results = await asyncio.gather(*[check(i) for i in identifiers])
+        return {i: r for i, r in zip(identifiers, results) if r is not None}
+
+class CitationChecker:
+    """Decides identifier citations from their structure, the reference store or the resolver.
+    Concurrent lookups within `batch_window` seconds share one resolver call."""
+
+    def __init__(self, store: ReferenceStore, resolver: CitationResolver, batch_window: float = 0.02):
+        self.store = store
+        self.resolver = resolver
+        self.batch_window = batch_window
+        self._loop = None
+        self._pending = {}  # identifier -> future shared by everyone waiting on it
+        self._batch = []
+
+    async def check(self, citation: str) -> Optional[dict]:
+        """Returns {"exists", "url", "title", "via"} for a citation this stage can decide, else
+        None (free text, or an identifier nobody could resolve)."""
+        identifier = find_identifier(citation)
+        if identifier is None:
+            return None
+        if not identifier.valid:
+            return {"exists": False, "url": None, "title": None, "via": "invalid_identifier"}
+        known = self.store.get(identifier)
+        if known is not None:
+            return {**known, "via": "known"}
+        reference = await self._resolve(identifier)
+        if reference is None:
+            return None
+        return {**reference, "via": "resolved"}
+
+    async def _resolve(self, identifier: Identifier) -> Optional[dict]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Pending lookups are bound to one event loop
+            self._loop, self._pending, self._batch = loop, {}, []
+        future = self._pending.get(identifier)
+        if future is None:
+            future = self._pending[identifier] = loop.create_future()
+            self._batch.append(identifier)
+            if len(self._batch) == 1:
+                loop.call_later(self.batch_window, lambda: asyncio.ensure_future(self._flush()))
+        # Shield so one cancelled caller doesn't fail the lookup for the others
+        return await asyncio.shield(future)
+
+    async def _flush(self):
+        batch, self._batch = self._batch, []
+        try:
+            resolved = await asyncio.wait_for(self.resolver.resolve(batch), timeout=settings.CITATION_RESOLVER_TIMEOUT)
+        except Exception as e:
+            print(f"Citation resolver failed for {len(batch)} identifier(s): {e!r}")
+            resolved = {}
+        for identifier in batch:
+            reference = resolved.get(identifier)
+            if reference is not None:
+                self.store.set(identifier, reference)
+            future = self._pending.pop(identifier, None)
+            if future is not None and not future.done():
+                future.set_result(reference)
+
+def make_resolver(name: str) -> CitationResolver:
+    if name == "http":
+        return HttpResolver(timeout=settings.CITATION_RESOLVER_TIMEOUT, probe_urls=settings.CITATION_PROBE_URLS)
+    return StubResolver()
+
+citation_checker = CitationChecker(
+    store=ReferenceStore(os.path.join(settings.CACHE_DIR, "references.sqlite3")),
+    resolver=make_resolver(settings.CITATION_RESOLVER),
+    batch_window=settings.CITATION_BATCH_WINDOW,
+)
@@ -0,0 +1,150 @@
+import random
+import re
+import zlib
+from collections import OrderedDict, defaultdict
+from ..core.utils import normalize_text
+
+# Function words carry no meaning for near-duplicate detection. Negations are deliberately
+# absent so "X is flat" and "X is not flat" never collapse into one claim.
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "being", "of", "in", "on", "at",
+    "to", "for", "by", "with", "from", "as", "and", "or", "that", "this", "these", "those", "it",
+    "its", "has", "have", "had", "which", "who", "whom", "about", "into", "than", "also",
+}
+
+# Interchangeable words in extracted claims, folded to one form so paraphrases share shingles
+# ("the highest peak in the world" ~ "the tallest mountain on Earth")
+SYNONYMS = {
+    "highest": "tallest", "largest": "biggest", "greatest": "biggest", "peak": "mountain",
+    "world": "earth", "planet": "earth", "over": "more",
+}
+
+_PRIME = (1 << 61) - 1
+
+NEGATIONS = {"not", "no", "never", "none", "nor", "cannot", "isn", "wasn", "aren", "weren", "doesn", "didn", "don", "won"}
+
+# Superlatives decide what a claim says ("longest" vs "widest river") while sharing all other
+# words, so they are guarded like numbers; these "-est" words are not superlatives
+NOT_SUPERLATIVES = {
+    "forest", "interest", "harvest", "request", "protest", "contest", "suggest", "honest", "modest",
+    "arrest", "invest", "digest", "manifest", "earnest", "conquest", "inquest", "bequest",
+    "northwest", "southwest", "midwest", "everest",
+}
+
+def claim_tokens(text: str) -> list:
+    tokens = re.findall(r"\w+", normalize_text(text))
+    # Crude plural folding ("mountains" ~ "mountain")
+    tokens = [
+        t[:-1] if len(t) > 3 and t.endswith("s") and not t.isdigit() else t
+        for t in tokens if len(t) > 1 and t not in STOPWORDS
+    ]
+    return [SYNONYMS.get(t, t) for t in tokens]
+
+def shingles(text: str) -> set:
+    """Content-word set; word order is ignored so reordered paraphrases still match."""
+    return set(claim_tokens(text))
+
+def _superlative(token: str) -> bool:
+    return token in ("best", "worst", "most", "least") or (
+        len(token) >= 6 and token.endswith("est") and token not in NOT_SUPERLATIVES
+    )
+
+def guard_terms(text: str) -> tuple:
+    """What must agree exactly for two similar claims to count as duplicates: the numbers as
+    written, negation and the superlatives. Everything else only has to be similar."""
+    tokens = set(re.findall(r"\w+", normalize_text(text)))
+    return (
+        frozenset(re.findall(r"\d+(?:[.,]\d+)?", text)),
+        bool(tokens & NEGATIONS),
+        frozenset(t for t in shingles(text) if _superlative(t)),
+    )
+
+class MinHashIndex:
+    """Locality-sensitive hashing index over MinHash signatures of short texts.
+
+    Signatures are split into `bands` bands; texts sharing any band become candidates and
+    are accepted when their estimated Jaccard similarity of content words (in any order, with
+    plurals, function words and common synonyms folded) reaches `threshold` and their guard
+    terms are equal, so a rewording matches but "X is Y" never matches "X is not Y", another
+    number or another superlative. Claims differing in one other content word ("space" vs
+    "Moon") can still match at the default threshold; raise it to trade recall for that.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.7, maxsize: int = 5000):
+        rng = random.Random(20240613)
+        self.params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (signature, guard terms, value)
+        self._buckets = defaultdict(set)
+
+    def signature(self, text: str) -> tuple:
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles(text)] or [0]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self.params)
+
+    def _band_keys(self, signature: tuple):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    @staticmethod
+    def similarity(sig_a: tuple, sig_b: tuple) -> float:
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+    def add(self, key, text: str, value=None):
+        self.remove(key)
+        signature = self.signature(text)
+        self._entries[key] = (signature, guard_terms(text), value)
+        for band_key in self._band_keys(signature):
+            self._buckets[band_key].add(key)
+        while len(self._entries) > self.maxsize:
+            self.remove(next(iter(self._entries)))
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band_key in self._band_keys(entry[0]):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def query(self, text: str):
+        """Returns (key, value, similarity) of the closest near-duplicate, or None."""
+        signature = self.signature(text)
+        guards = guard_terms(text)
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates |= self._buckets.get(band_key, set())
+        best = None
+        for key in candidates:
+            other_signature, other_guards, value = self._entries[key]
+            if other_guards != guards:
+                continue
+            score = self.similarity(signature, other_signature)
+            if score >= self.threshold and (best is None or score > best[2]):
+                best = (key, value, score)
+        return best
+
+    def __len__(self):
+        return len(self._entries)
+
+def group_near_duplicates(texts: list, threshold: float = 0.7) -> list:
+    """Groups indices of near-duplicate texts; the first index of each group is its representative."""
+    index = MinHashIndex(threshold=threshold, maxsize=max(len(texts), 1))
+    groups = []
+    group_of = {}
+    for i, text in enumerate(texts):
+        match = index.query(text)
+        if match is not None:
+            group = group_of[match[0]]
+        else:
+            group = len(groups)
+            groups.append([])
+        groups[group].append(i)
+        group_of[i] = group
+        index.add(i, text)
+    return groups
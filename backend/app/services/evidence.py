@@ -0,0 +1,144 @@
+import os
+from urllib.parse import urlsplit
+from .dedup import claim_tokens
+from .extraction import split_sentences
+from .query_builder import idf
+
+DOMAIN_AUTHORITY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "domain_authority.txt")
+
+# Authority of domains missing from the table, and of passages from the local evidence index
+UNKNOWN_AUTHORITY = 0.5
+LOCAL_AUTHORITY = 0.8
+
+class DomainTrie:
+    """Domain-suffix trie over reversed labels ("com" -> "reuters"). A lookup returns the value
+    of the longest listed suffix, so "edition.cnn.com" finds "cnn.com" and "data.census.gov"
+    finds "gov" in one walk instead of a scan over every listed domain."""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, domain: str, value):
+        node = self.root
+        for label in reversed(domain.lower().strip(".").split(".")):
+            node = node.setdefault(label, {})
+        node[None] = value
+
+    def lookup(self, host: str, default=None):
+        node, value = self.root, default
+        for label in reversed(host.lower().strip(".").split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            value = node.get(None, value)
+        return value
+
+_authority = None
+_excluded = []
+
+def authority_table() -> DomainTrie:
+    """The bundled domain-authority table as a suffix trie (loaded on first use)."""
+    global _authority, _excluded
+    if _authority is None:
+        trie = DomainTrie()
+        excluded = []
+        try:
+            with open(DOMAIN_AUTHORITY_PATH, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip() or line.startswith("#"):
+                        continue
+                    domain, _, score = line.strip().partition(" ")
+                    trie.insert(domain, float(score))
+                    if float(score) == 0:
+                        excluded.append(domain)
+        except (OSError, ValueError) as e:
+            print(f"Domain authority table unavailable, every source counts as unknown: {e}")
+        _authority, _excluded = trie, excluded
+    return _authority
+
+def excluded_domains() -> list:
+    """Domains never used as evidence (authority 0), e.g. social media and forums."""
+    authority_table()
+    return _excluded
+
+def hostname(url: str) -> str:
+    if not url or url == "#":
+        return ""
+    if "://" not in url:
+        url = f"//{url}"
+    return urlsplit(url).hostname or ""
+
+def domain_authority(url: str) -> float:
+    host = hostname(url)
+    return authority_table().lookup(host, UNKNOWN_AUTHORITY) if host else UNKNOWN_AUTHORITY
+
+def authority_label(score: float) -> str:
+    if score >= 0.75:
+        return "high"
+    return "medium" if score >= 0.45 else "low"
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text
+    return max(1, len(text) // 4)
+
+def rank_evidence(claim: str, search_result: dict, token_budget: int, max_sentences: int,
+                  low_authority: float) -> dict:
+    """Trims a search result ({title, body, href, results}) down to the evidence worth sending
+    to the model.
+
+    Every sentence of every source is scored by the IDF-weighted share of the claim's terms it
+    contains, scaled by the source's authority; the best sentences are kept until
+    `token_budget` or `max_sentences` is reached and regrouped per source in reading order.
+    When no sentence shares a term with the claim (e.g. the evidence is in another language),
+    the opening sentences of the most authoritative sources are kept instead. The returned
+    `authority` is the best authority among the sources and `low_authority` is set when every
+    source scores below `low_authority`.
+    """
+    sources = search_result.get("results") if search_result else None
+    if not sources:
+        return search_result
+
+    weights = {t: idf(t) for t in set(claim_tokens(claim))}
+    total_weight = sum(weights.values()) or 1.0
+    candidates = []  # (score, source index, sentence index, sentence)
+    authorities = []
+    for s, source in enumerate(sources):
+        authority = source.get("authority", domain_authority(source.get("url", "")))
+        authorities.append(authority)
+        for n, sentence in enumerate(split_sentences(source.get("text") or "")):
+            # Scraped pages can hold whole paragraphs without punctuation
+            sentence = sentence[:token_budget * 4]
+            overlap = sum(weights.get(t, 0.0) for t in set(claim_tokens(sentence))) / total_weight
+            candidates.append((overlap * (0.5 + 0.5 * authority), s, n, sentence))
+    if not any(score > 0 for score, *_ in candidates):
+        candidates = [(authorities[s] - n / 100, s, n, sentence) for _, s, n, sentence in candidates]
+    else:
+        candidates = [c for c in candidates if c[0] > 0]
+
+    kept, used = [], 0
+    for candidate in sorted(candidates, key=lambda c: c[0], reverse=True):
+        cost = estimate_tokens(candidate[3])
+        if len(kept) >= max_sentences:
+            break
+        if kept and used + cost > token_budget:
+            continue
+        kept.append(candidate)
+        used += cost
+
+    by_source = {}
+    for _, s, n, sentence in sorted(kept, key=lambda c: (c[1], c[2])):
+        by_source.setdefault(s, []).append(sentence)
+    lines = []
+    for s, sentences in by_source.items():
+        source = sources[s]
+        where = hostname(source.get("url", "")) or "local reference"
+        lines.append(f"- [{source.get('title')}] ({where}, {authority_label(authorities[s])} authority) {' '.join(sentences)}")
+
+    best = sources[kept[0][1]] if kept else sources[0]
+    return {
+        "title": best.get("title") or search_result.get("title"),
+        "body": "\n".join(lines),
+        "href": best.get("url") or search_result.get("href"),
+        "authority": max(authorities),
+        "low_authority": max(authorities) < low_authority,
+    }
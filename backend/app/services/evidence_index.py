@@ -0,0 +1,334 @@
+"""Local evidence store: an on-disk BM25 inverted index over passages of reference documents.
+
+Layout of the index directory:
+    index.sqlite3     passages (title, url, text), the term lexicon and corpus statistics
+    doclens.bin       passage lengths, one uint32 per passage id (memory-mapped)
+    seg-NNNNN.bin     postings segments, (passage id, term frequency) uint32 pairs (memory-mapped)
+
+Every add_documents() call writes one new immutable segment, so documents can be added
+incrementally while the server is running; compact() merges the segments into one.
+
+Fill it from a document dump (JSONL lines with "title", "url" and "text", or plain .txt files):
+
+    python -m app.services.evidence_index add wiki-snapshot.jsonl notes/*.txt
+    python -m app.services.evidence_index compact
+    python -m app.services.evidence_index search "Eiffel Tower height"
+"""
+import heapq
+import json
+import math
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import threading
+from collections import Counter, defaultdict
+from ..core.config import settings
+from .dedup import claim_tokens
+from .evidence import LOCAL_AUTHORITY
+from .extraction import split_into_chunks
+
+POSTING = struct.Struct("<II")
+DOCLEN = struct.Struct("<I")
+
+class EvidenceIndex:
+    """BM25 (k1, b) retrieval over passages; postings and passage lengths are read through
+    mmap so only the pages a query touches are resident."""
+
+    def __init__(self, path: str, passage_chars: int = 1200, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.passage_chars = passage_chars
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._maps = {}  # file name -> (file, mmap, mapped size)
+        self._generation = None  # (passages, segments) the maps were made for
+        os.makedirs(path, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(path, "index.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS passages (
+                id INTEGER PRIMARY KEY,
+                title TEXT,
+                url TEXT,
+                text TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS lexicon (
+                term TEXT NOT NULL,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                count INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS lexicon_term ON lexicon (term);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        """)
+        self._db.commit()
+
+    def _meta(self, key: str) -> int:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_meta(self, key: str, value: int):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def __len__(self):
+        return self._meta("passages")
+
+    def _mapped(self, name: str):
+        path = os.path.join(self.path, name)
+        entry = self._maps.get(name)
+        if entry is not None and os.path.getsize(path) != entry[2]:
+            # Appended to since it was mapped (doclens.bin after an add in another process)
+            self._close_map(name)
+            entry = None
+        if entry is None:
+            f = open(path, "rb")
+            size = os.fstat(f.fileno()).st_size
+            entry = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b"", size)
+            self._maps[name] = entry
+        return entry[1]
+
+    def _close_map(self, name: str):
+        f, mapped, _ = self._maps.pop(name)
+        if isinstance(mapped, mmap.mmap):
+            mapped.close()
+        f.close()
+
+    def _close_maps(self):
+        for name in list(self._maps):
+            self._close_map(name)
+
+    def _refresh_maps(self, passages: int):
+        """Drops every map when the index changed since they were made, e.g. when the CLI added
+        or compacted segments from another process while the server kept its maps open."""
+        generation = (passages, self._meta("segments"))
+        if generation != self._generation:
+            self._close_maps()
+            self._generation = generation
+
+    def add_documents(self, documents) -> int:
+        """Indexes an iterable of {"title", "url", "text"} dicts as one new segment; returns the passage count."""
+        passages = []
+        for doc in documents:
+            text = (doc.get("text") or "").strip()
+            if text:
+                for passage in split_into_chunks(text, self.passage_chars):
+                    passages.append((doc.get("title") or "", doc.get("url") or "", passage))
+        if not passages:
+            return 0
+
+        with self._lock:
+            first_id = self._meta("passages")
+            segment = self._meta("segments") + 1
+            postings = defaultdict(list)
+            lengths = []
+            for n, (title, _, text) in enumerate(passages):
+                tokens = claim_tokens(f"{title} {text}")
+                lengths.append(len(tokens))
+                for term, tf in Counter(tokens).items():
+                    postings[term].append((first_id + n, tf))
+
+            lexicon = []
+            with open(os.path.join(self.path, f"seg-{segment:05d}.bin"), "wb") as f:
+                offset = 0
+                for term in sorted(postings):
+                    entries = postings[term]
+                    f.write(b"".join(POSTING.pack(doc_id, tf) for doc_id, tf in entries))
+                    lexicon.append((term, segment, offset, len(entries)))
+                    offset += len(entries) * POSTING.size
+            with open(os.path.join(self.path, "doclens.bin"), "ab") as f:
+                f.write(b"".join(DOCLEN.pack(length) for length in lengths))
+
+            self._db.executemany(
+                "INSERT INTO passages (id, title, url, text) VALUES (?, ?, ?, ?)",
+                [(first_id + n, title, url, text) for n, (title, url, text) in enumerate(passages)],
+            )
+            self._db.executemany("INSERT INTO lexicon (term, segment, offset, count) VALUES (?, ?, ?, ?)", lexicon)
+            self._set_meta("passages", first_id + len(passages))
+            self._set_meta("total_length", self._meta("total_length") + sum(lengths))
+            self._set_meta("segments", segment)
+            self._db.commit()
+            # doclens.bin grew; remap it on the next search
+            self._close_maps()
+        return len(passages)
+
+    def compact(self):
+        """Merges every postings segment into a single one."""
+        with self._lock:
+            segment = self._meta("segments") + 1
+            rows = self._db.execute("SELECT term, segment, offset, count FROM lexicon ORDER BY term, segment").fetchall()
+            if len({row[1] for row in rows}) <= 1:
+                return
+            old_segments = {row[1] for row in rows}
+            lexicon = []
+            with open(os.path.join(self.path, f"seg-{segment:05d}.bin"), "wb") as f:
+                offset = 0
+                current, count = None, 0
+                for term, old_segment, old_offset, old_count in rows:
+                    if term != current:
+                        if current is not None:
+                            lexicon.append((current, segment, offset, count))
+                            offset += count * POSTING.size
+                        current, count = term, 0
+                    data = self._mapped(f"seg-{old_segment:05d}.bin")
+                    # Segments hold ascending passage ids, so concatenating keeps postings sorted
+                    f.write(data[old_offset:old_offset + old_count * POSTING.size])
+                    count += old_count
+                if current is not None:
+                    lexicon.append((current, segment, offset, count))
+            self._db.execute("DELETE FROM lexicon")
+            self._db.executemany("INSERT INTO lexicon (term, segment, offset, count) VALUES (?, ?, ?, ?)", lexicon)
+            self._set_meta("segments", segment)
+            self._db.commit()
+            self._close_maps()
+            for old_segment in old_segments:
+                os.remove(os.path.join(self.path, f"seg-{old_segment:05d}.bin"))
+
+    def search(self, query: str, top_k: int = 3) -> list:
+        """Returns up to top_k (score, passage dict) pairs, best first.
+
+        Scores are BM25 divided by the score of an average-length passage containing every
+        query term once (capped at 1.0), so they are comparable across queries: 1.0 means the
+        whole query is covered, and each missing term pulls the score down by its IDF share.
+        """
+        terms = list(dict.fromkeys(claim_tokens(query)))
+        if not terms:
+            return []
+        with self._lock:
+            passages = self._meta("passages")
+            if not passages:
+                return []
+            self._refresh_maps(passages)
+            avg_length = self._meta("total_length") / passages
+            placeholders = ",".join("?" * len(terms))
+            rows = self._db.execute(
+                f"SELECT term, segment, offset, count FROM lexicon WHERE term IN ({placeholders})", terms
+            ).fetchall()
+            doclens = self._mapped("doclens.bin")
+
+            df = Counter()
+            for term, _, _, count in rows:
+                df[term] += count
+            idf = {t: math.log(1 + (passages - df[t] + 0.5) / (df[t] + 0.5)) for t in terms}
+            full_coverage = sum(idf.values())
+
+            scores = defaultdict(float)
+            for term, segment, offset, count in rows:
+                data = self._mapped(f"seg-{segment:05d}.bin")
+                end = offset + count * POSTING.size
+                if end > len(data):
+                    print(f"Evidence index: postings of {term!r} run past seg-{segment:05d}.bin, skipped")
+                    continue
+                for doc_id, tf in POSTING.iter_unpack(data[offset:end]):
+                    if (doc_id + 1) * DOCLEN.size > len(doclens):
+                        continue
+                    length = DOCLEN.unpack_from(doclens, doc_id * DOCLEN.size)[0]
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] += idf[term] * tf * (self.k1 + 1) / (tf + norm)
+
+            best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+            results = []
+            for doc_id, score in best:
+                row = self._db.execute("SELECT title, url, text FROM passages WHERE id = ?", (doc_id,)).fetchone()
+                if row is None:
+                    continue
+                title, url, text = row
+                results.append((min(1.0, score / full_coverage), {"id": doc_id, "title": title, "url": url, "text": text}))
+        return results
+
+    def close(self):
+        with self._lock:
+            self._close_maps()
+            self._db.close()
+
+def search_evidence(query: str) -> dict:
+    """Best local evidence for a query in the search-result shape ({title, body, href}), or {}
+    when the index is empty or the best passage scores below EVIDENCE_MIN_SCORE."""
+    index = get_evidence_index()
+    if index is None:
+        return {}
+    hits = index.search(query, top_k=settings.EVIDENCE_TOP_K)
+    if not hits or hits[0][0] < settings.EVIDENCE_MIN_SCORE:
+        return {}
+    top = hits[0][1]
+    passages = [p for score, p in hits if score >= settings.EVIDENCE_MIN_SCORE]
+    return {
+        "title": top["title"] or "Local reference",
+        "body": "\n".join(f"- [{p['title']}] {p['text']}" for p in passages),
+        "href": top["url"] or "#",
+        "results": [
+            {"title": p["title"] or "Local reference", "url": p["url"], "text": p["text"], "authority": LOCAL_AUTHORITY}
+            for p in passages
+        ],
+    }
+
+_evidence_index = None
+
+def get_evidence_index():
+    """The shared index, opened on first use; None when no index has been built."""
+    global _evidence_index
+    if _evidence_index is None:
+        if not os.path.exists(os.path.join(settings.EVIDENCE_INDEX_DIR, "index.sqlite3")):
+            return None
+        try:
+            _evidence_index = EvidenceIndex(settings.EVIDENCE_INDEX_DIR)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Local evidence index unavailable: {e}")
+            return None
+    return _evidence_index
+
+def reset_evidence_index():
+    """Closes the shared index so the next get_evidence_index() opens it afresh."""
+    global _evidence_index
+    index, _evidence_index = _evidence_index, None
+    if index is not None:
+        try:
+            index.close()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Closing the local evidence index failed: {e}")
+
+def _read_documents(paths):
+    for path in paths:
+        if path.endswith(".jsonl"):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        else:
+            with open(path, encoding="utf-8") as f:
+                yield {"title": os.path.splitext(os.path.basename(path))[0], "url": "", "text": f.read()}
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Manage the local BM25 evidence index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="index JSONL dumps ({title, url, text} per line) or .txt files")
+    add.add_argument("files", nargs="+")
+    add.add_argument("--batch", type=int, default=5000, help="documents per segment")
+    commands.add_parser("compact", help="merge all segments into one")
+    search = commands.add_parser("search", help="show the best passages for a query")
+    search.add_argument("query")
+    args = parser.parse_args(argv)
+
+    index = EvidenceIndex(settings.EVIDENCE_INDEX_DIR)
+    if args.command == "add":
+        batch = []
+        total = 0
+        for doc in _read_documents(args.files):
+            batch.append(doc)
+            if len(batch) >= args.batch:
+                total += index.add_documents(batch)
+                batch = []
+        total += index.add_documents(batch)
+        print(f"Indexed {total} passages ({len(index)} total) into {settings.EVIDENCE_INDEX_DIR}")
+    elif args.command == "compact":
+        index.compact()
+        print("Compacted.")
+    else:
+        for score, passage in index.search(args.query, top_k=5):
+            print(f"{score:.3f}  {passage['title']}  {passage['url']}\n       {passage['text'][:160]}")
+    index.close()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,211 @@
+import re
+from collections import Counter
+from ..core.utils import normalize_text
+from .dedup import STOPWORDS
+from .query_builder import term_frequencies
+
+# Sentence boundaries for Latin scripts and the Devanagari danda
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?।])\s+")
+
+SUPERLATIVES = {
+    "first", "last", "largest", "smallest", "biggest", "tallest", "highest", "lowest", "longest",
+    "shortest", "oldest", "youngest", "fastest", "slowest", "most", "least", "best", "worst",
+    "only", "record", "never", "always", "every", "all",
+}
+
+# Citation patterns for the local extractor
+DOI = re.compile(r"\b(?:doi:\s*|https?://(?:dx\.)?doi\.org/)?(10\.\d{4,9}/[^\s\"'<>,;]+[^\s\"'<>,;.)])", re.I)
+ARXIV = re.compile(
+    r"\barxiv(?:\.org/(?:abs|pdf)/|:\s*|\s+)(\d{4}\.\d{4,5}|[a-z][a-z-]*(?:\.[a-z]{2})?/\d{7})(?:v\d+)?",
+    re.I,
+)
+ISBN = re.compile(r"\bISBN(?:-1[03])?:?\s*(?=\d)")
+PMID = re.compile(r"\bPMID:?\s*(\d{1,8})\b|\bpubmed\.ncbi\.nlm\.nih\.gov/(\d{1,8})")
+ET_AL = re.compile(r"\b[A-Z][\w'’-]+ et al\.?(?:,?\s*\(?(?:1[6-9]|20)\d{2}[a-z]?\)?)?")
+AUTHOR_YEAR = re.compile(
+    r"\(?\b[A-Z][a-z'’-]+(?:\s+(?:and|&)\s+[A-Z][a-z'’-]+)?,?\s+\(?(?:1[6-9]|20)\d{2}[a-z]?\)"
+    r"|\([A-Z][a-z'’-]+(?:\s+(?:and|&)\s+[A-Z][a-z'’-]+)?,\s*(?:1[6-9]|20)\d{2}[a-z]?\)"
+)
+JOURNAL = re.compile(
+    r"\b(?:(?:the\s+)?(?:[A-Z][a-z]+\s+)*Journal of(?:\s+(?:the\s+)?[A-Z][a-z]+)+"
+    r"|Proceedings of(?:\s+(?:the\s+)?[A-Z][a-z]+)+"
+    r"|New England Journal of Medicine|NEJM|The Lancet|Lancet|JAMA|BMJ|PLOS(?:\s+[A-Z][a-z]+)?|arXiv"
+    r"|(?<=in )(?:Nature|Science|Cell)(?:\s+[A-Z][a-z]+)?)\b"
+)
+
+OPINION_MARKERS = re.compile(r"\b(?:I|we) (?:think|believe|feel|guess)\b|\bin my (?:opinion|view)\b|\bshould\b", re.I)
+
+# A period after these doesn't end a sentence ("Smith et al. (2019)", "e.g. ...", "Dr. Rao")
+ABBREVIATIONS = re.compile(
+    r"(?:\bet al|\be\.g|\bi\.e|\bcf|\bvs|\bapprox|\bDr|\bMrs?|\bMs|\bProf|\bSt|\bNo|\bFig|\bInc|\bLtd|\bJr|\bSr|\b[A-Z])\.$"
+)
+
+def split_sentences(text: str) -> list:
+    sentences = []
+    for piece in SENTENCE_BOUNDARY.split(text):
+        piece = piece.strip()
+        if not piece:
+            continue
+        if sentences and ABBREVIATIONS.search(sentences[-1]):
+            sentences[-1] = f"{sentences[-1]} {piece}"
+        else:
+            sentences.append(piece)
+    return sentences
+
+def split_into_chunks(text: str, max_chars: int) -> list:
+    """Splits text into chunks of at most max_chars, cutting only at paragraph or sentence boundaries."""
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+        else:
+            # A single sentence longer than max_chars is kept whole rather than cut mid-sentence
+            pieces.extend(split_sentences(paragraph))
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def split_paragraphs(text: str, min_chars: int) -> list:
+    """Splits text into paragraphs at blank lines (at line breaks when it has none). Pieces
+    shorter than min_chars, such as headings and list items, are joined to the ones after them."""
+    pieces = re.split(r"\n\s*\n", text)
+    if len(pieces) == 1:
+        pieces = text.split("\n")
+    paragraphs = []
+    current = ""
+    for piece in pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        current = f"{current}\n{piece}" if current else piece
+        if len(current) >= min_chars:
+            paragraphs.append(current)
+            current = ""
+    if current:
+        paragraphs.append(current)
+    return paragraphs
+
+def checkworthiness(claim: str) -> float:
+    """Heuristic score for how worth checking a claim is (numbers, dates, names, superlatives)."""
+    words = claim.split()
+    score = 0.0
+    if re.search(r"\d", claim):
+        score += 2.0
+    if re.search(r"\b(1[5-9]|20)\d{2}\b", claim):
+        score += 1.0
+    if "%" in claim or re.search(r"\bper ?cent\b", claim, re.I):
+        score += 1.0
+    # Capitalized words after the first one are a cheap proxy for named entities
+    score += min(2.0, 0.5 * sum(1 for w in words[1:] if w[:1].isupper()))
+    if any(w.strip(".,;:!?\"'").lower() in SUPERLATIVES for w in words):
+        score += 1.0
+    if len(words) < 5:
+        score -= 1.0
+    return score
+
+def merge_extractions(extractions: list, max_claims: int, max_citations: int):
+    """Merges per-chunk (language, claims, citations) results into one ranked, deduplicated set.
+
+    Claims are ranked by check-worthiness plus a bonus for appearing in several chunks;
+    the language is the most common one across chunks.
+    """
+    languages = Counter(lang for lang, _, _ in extractions if lang)
+    language = languages.most_common(1)[0][0] if languages else "en"
+
+    claims = {}
+    citations = {}
+    for position, (_, chunk_claims, chunk_citations) in enumerate(extractions):
+        for claim in chunk_claims:
+            key = normalize_text(claim)
+            if key in claims:
+                claims[key]["count"] += 1
+            else:
+                claims[key] = {"text": claim, "count": 1, "position": position}
+        for citation in chunk_citations:
+            citations.setdefault(normalize_text(citation), citation)
+
+    ranked = sorted(
+        claims.values(),
+        key=lambda c: (-(checkworthiness(c["text"]) + (c["count"] - 1)), c["position"]),
+    )
+    return language, [c["text"] for c in ranked[:max_claims]], list(citations.values())[:max_citations]
+
+def _clean_reference(span: str) -> str:
+    span = span.strip(" ,")
+    if span.startswith("(") and span.endswith(")"):
+        span = span[1:-1]
+    # Close a parenthesis left open by the match boundary: "Smith et al. (2019"
+    if span.count("(") > span.count(")"):
+        span += ")"
+    return span.strip()
+
+def find_citations(sentence: str) -> list:
+    """Citation-like spans in a sentence: DOIs, arXiv ids, ISBNs, PMIDs, "X et al. (year)",
+    author-year references and journal names (joined to the reference they belong to)."""
+    found = [f"doi:{m.group(1)}" for m in DOI.finditer(sentence)]
+    found += [f"arXiv:{m.group(1)}" for m in ARXIV.finditer(sentence)]
+    found += [f"ISBN {sentence[m.end():m.end() + 20].split(maxsplit=1)[0].rstrip('.,;)')}" for m in ISBN.finditer(sentence)]
+    found += [f"PMID {m.group(1) or m.group(2)}" for m in PMID.finditer(sentence)]
+    references = [_clean_reference(m.group()) for m in ET_AL.finditer(sentence)]
+    references += [
+        _clean_reference(m.group()) for m in AUTHOR_YEAR.finditer(sentence)
+        if not any(_clean_reference(m.group()) in r or r in m.group() for r in references)
+    ]
+    journals = [re.sub(r"^the\s+", "", m.group(), flags=re.I) for m in JOURNAL.finditer(sentence)]
+    if references:
+        suffix = f", {journals[0]}" if journals else ""
+        found += [r + suffix for r in references]
+    elif journals and not found:
+        found.append(sentence.strip())
+    return found
+
+def looks_english(text: str) -> bool:
+    """True when nearly every word is a known English word and some are function words."""
+    words = re.findall(r"[^\W\d_]+", text.lower())
+    if len(words) < 3:
+        return False
+    table = term_frequencies()
+    known = sum(1 for w in words if w in table)
+    return known / len(words) >= 0.7 and any(w in STOPWORDS for w in words)
+
+def extract_locally(text: str, max_claims: int = 6, max_citations: int = 4):
+    """Rule-based extraction for short English texts, returning (language, claims, citations).
+
+    Each sentence is a claim when it scores clearly check-worthy (numbers, dates, names,
+    superlatives) and is not a question or an opinion; citations come from DOI, "et al.",
+    author-year and journal-name patterns. Returns None whenever the text is not clearly
+    English or any sentence is borderline, so the caller falls back to the LLM.
+    """
+    if not looks_english(text):
+        return None
+    sentences = split_sentences(text)
+    if not sentences or len(sentences) > max_claims:
+        return None
+    claims = []
+    citations = []
+    for sentence in sentences:
+        sentence_citations = find_citations(sentence)
+        citations.extend(c for c in sentence_citations if c not in citations)
+        if sentence.endswith("?") or OPINION_MARKERS.search(sentence):
+            continue
+        score = checkworthiness(sentence)
+        if score >= 2.0:
+            claims.append(sentence)
+        elif score > 0 and not sentence_citations:
+            # Borderline: let the model decide
+            return None
+    if not claims and not citations:
+        return None
+    return "en", claims[:max_claims], citations[:max_citations]
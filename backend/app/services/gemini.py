@@ -1,10 +1,121 @@
-import google.generativeai as genai
-from google.api_core import exceptions as google_exceptions
-from groq import Groq
-import os
-import time
 import asyncio
+import hashlib
+import importlib
+import time
+from collections import deque
+from functools import lru_cache
 from ..core.config import settings
+from ..core.deadline import remaining
+from ..core.errors import LLMError, classify_error, RATE_LIMIT
+from ..core.metrics import LLM_CALLS, RATE_LIMITED, FALLBACKS, registry, timed
+from ..core.json_repair import loads_lenient
+from .scheduler import LLMScheduler, estimate_tokens, llm_priority
+from .state import MemoryStateBackend, StateBackend, state_backend
+
+GEMINI_MODEL = 'gemini-3-flash-preview' # Using Gemini 3 Flash Preview
+
+# google.generativeai and groq are imported when a client is first built (or by the warm-up
+# after startup), not with this module: they account for most of the backend's import time.
+
+# How often a call queued for a Gemini key re-checks whether waiting can still pay off (seconds)
+QUEUE_CHECK_INTERVAL = 0.25
+
+def is_rate_limited(e: Exception) -> bool:
+    return classify_error(e) == RATE_LIMIT
+
+def failed_on(e: Exception, *providers: str) -> Exception:
+    """Tags `e` with the provider(s) that actually failed: a Gemini call can be answered by Groq
+    (queue redirect or hedge), and the caller's circuit breakers should blame the right one."""
+    e.providers = providers
+    return e
+
+def is_valid_json(text: str) -> bool:
+    try:
+        loads_lenient(text)
+        return True
+    except ValueError:
+        return False
+
+@lru_cache(maxsize=None)
+def json_generation_config(schema=None):
+    """Gemini JSON mode, constrained to `schema.response_schema` when structured output is on."""
+    import google.generativeai as genai
+    response_schema = getattr(schema, "response_schema", None) if settings.STRUCTURED_OUTPUT else None
+    return genai.GenerationConfig(response_mime_type="application/json", response_schema=response_schema)
+
+class LatencyWindow:
+    """Rolling window of recent call latencies (seconds) for percentile estimates."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.samples = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float):
+        """Returns the pct (0-1) latency percentile, or None until enough samples exist."""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+class KeySlot:
+    """One Gemini API key with its own client-bound model. Its cooldown and failure count live
+    in `state`, so a key benched by one worker is benched for all of them."""
+
+    def __init__(self, key_id, api_key: str, state: StateBackend = None):
+        self.key_id = key_id
+        self.api_key = api_key
+        self.state = state or MemoryStateBackend()
+        # Named by the key itself, so workers agree even if they list the keys in another order
+        self.state_key = "gemini:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+        self.in_flight = 0
+        self.calls = 0
+        self._model = None
+
+    @property
+    def label(self) -> str:
+        return "MASTER" if self.key_id == "master" else f"#{self.key_id + 1}"
+
+    @property
+    def model(self):
+        # Each key gets its own client instead of the process-global genai.configure(),
+        # so calls on different keys can run concurrently without racing each other. The SDK
+        # has no public per-model client, so this uses its internals; the version is pinned
+        # in requirements.txt for that reason.
+        if self._model is None:
+            import google.generativeai as genai
+            from google.generativeai.client import _ClientManager
+            clients = _ClientManager()
+            clients.configure(api_key=self.api_key)
+            self._model = genai.GenerativeModel(GEMINI_MODEL)
+            self._model._client = clients.get_default_client("generative")
+            self._model._async_client = clients.get_default_client("generative_async")
+        return self._model
+
+    @property
+    def cooldown_until(self) -> float:
+        return self.state.cooldown(self.state_key)
+
+    @property
+    def consecutive_failures(self) -> int:
+        return self.state.failures(self.state_key)
+
+    def is_healthy(self, now: float = None) -> bool:
+        return (now or time.time()) >= self.cooldown_until
+
+    def mark_success(self):
+        self.state.reset_failures(self.state_key)
+
+    def mark_rate_limited(self, seconds: float):
+        self.state.add_failure(self.state_key)
+        self.state.set_cooldown(self.state_key, time.time() + seconds)
+
+    def mark_failure(self):
+        """Non-rate-limit errors only bench a key once they repeat."""
+        if self.state.add_failure(self.state_key) >= 3:
+            self.state.set_cooldown(self.state_key, time.time() + settings.GEMINI_KEY_COOLDOWN)
 
 class GeminiManager:
     def __init__(self):
@@ -15,81 +126,260 @@ class GeminiManager:
         # Support for a "Master Key" that is always active/fallback (e.g. a paid tier key)
         self.master_key = settings.GEMINI_MASTER_KEY
         
-        # Groq Fallback - Used when Gemini is completely unavailable
+        # Groq Fallback - Used when Gemini is completely unavailable (client built on first use)
         self.groq_key = settings.GROQ_API_KEY
-        self.groq_client = Groq(api_key=self.groq_key) if self.groq_key else None
+        self._groq_client = None
+
+        # Recent call latencies per provider; drive the hedge threshold
+        self.latency = {"gemini": LatencyWindow(), "groq": LatencyWindow()}
         
-        # Track cooldowns for each key to avoid repeated 429 errors
-        self.key_cooldowns = {i: 0 for i in range(len(self.keys))}
-        self.current_key_index = 0
-        self.using_master = False
-        self.model = None
-        self.refresh_model()
-
-    def refresh_model(self):
-        """Configures the generative AI model with the currently active key."""
-        key = self.master_key if self.using_master else (self.keys[self.current_key_index] if self.keys else None)
-        if not key:
+        # One slot (client + cooldown/health) per key; all healthy keys serve calls concurrently.
+        # Cooldowns and rate-limit buckets are kept in the state backend shared by all workers.
+        self.slots = {i: KeySlot(i, key, state_backend) for i, key in enumerate(self.keys)}
+        if self.master_key:
+            self.slots["master"] = KeySlot("master", self.master_key, state_backend)
+        if not self.slots:
             print("Warning: No Gemini API keys found!")
-            return
-            
-        print(f"Using Gemini API Key {'MASTER' if self.using_master else f'#{self.current_key_index + 1}'}")
-        genai.configure(api_key=key)
-        self.model = genai.GenerativeModel('gemini-3-flash-preview') # Using Gemini 3 Flash Preview
-
-    def switch_key(self):
-        """Rotates to the next available API key that is not on cooldown."""
-        # If we have a master key and we aren't using it yet, switch to it as a last resort
-        if self.master_key and not self.using_master:
-            # Check if all regular keys are on cooldown
-            all_on_cooldown = all(time.time() < self.key_cooldowns[i] for i in range(len(self.keys)))
-            if all_on_cooldown or not self.keys:
-                print("All regular keys exhausted. Switching to MASTER KEY (Always Active).")
-                self.using_master = True
-                self.refresh_model()
-                return True
-
-        if not self.keys:
-            return False
-            
-        # Mark current regular key as on cooldown (60s is standard for Gemini free tier)
-        if not self.using_master:
-            self.key_cooldowns[self.current_key_index] = time.time() + 60
-        
-        # Find next regular key not on cooldown
-        for _ in range(len(self.keys)):
-            self.current_key_index = (self.current_key_index + 1) % len(self.keys)
-            if time.time() > self.key_cooldowns[self.current_key_index]:
-                self.using_master = False
-                print(f"SWITCHING API KEY: Now using index {self.current_key_index}")
-                self.refresh_model()
-                return True
-        
-        # If still no regular key, and we have a master key, use it
+
+        # Rate-limit-aware queue for every Gemini call in the process
+        self.scheduler = LLMScheduler(state_backend)
+        for i in range(len(self.keys)):
+            self.scheduler.add_key(i, settings.GEMINI_KEY_RPM, settings.GEMINI_KEY_TPM, state_key=self.slots[i].state_key)
         if self.master_key:
-            self.using_master = True
-            self.refresh_model()
-            return True
-            
-        print("All API keys are currently rate-limited/on cooldown.")
-        return False
+            self.scheduler.add_key("master", settings.GEMINI_MASTER_RPM, settings.GEMINI_MASTER_TPM, fallback=True,
+                                   state_key=self.slots["master"].state_key)
+
+    @property
+    def groq_client(self):
+        if self._groq_client is None and self.groq_key:
+            from groq import AsyncGroq
+            self._groq_client = AsyncGroq(api_key=self.groq_key)
+        return self._groq_client
+
+    @groq_client.setter
+    def groq_client(self, client):
+        self._groq_client = client
+
+    def import_sdks(self):
+        """Imports the provider SDKs that are in use (blocking; safe to run in a worker thread)."""
+        if self.slots:
+            importlib.import_module("google.generativeai")
+        if self.groq_key:
+            importlib.import_module("groq")
+
+    def build_clients(self):
+        """Builds every key's model and the Groq client ahead of the first call. Runs on the
+        event loop: the async Gemini clients bind to it."""
+        for slot in self.slots.values():
+            slot.model
+        self.groq_client
+
+    def readiness(self) -> dict:
+        """Per-provider readiness for /ready: configured, clients already built, able to serve."""
+        healthy = sum(slot.is_healthy() for slot in self.slots.values())
+        return {
+            "gemini": {
+                "configured": bool(self.slots),
+                "loaded": bool(self.slots) and all(slot._model is not None for slot in self.slots.values()),
+                "healthyKeys": healthy,
+                "keys": self.health(),
+                "ready": healthy > 0,
+            },
+            "groq": {
+                "configured": bool(self.groq_key),
+                "loaded": self._groq_client is not None,
+                "ready": bool(self.groq_key),
+            },
+        }
 
-    async def call_groq_async(self, prompt: str):
-        """Calls Groq Llama 3 as a high-speed fallback."""
+    def has_healthy_key(self) -> bool:
+        now = time.time()
+        return any(slot.is_healthy(now) for slot in self.slots.values())
+
+    def health(self) -> list:
+        """Per-key health for /ready, labelled #1, #2, ... (MASTER) rather than by key."""
+        now = time.time()
+        return [
+            {
+                "key": slot.label,
+                "healthy": slot.is_healthy(now),
+                "cooldownRemaining": max(0.0, round(slot.cooldown_until - now, 1)),
+                "inFlight": slot.in_flight,
+                "calls": slot.calls,
+                "consecutiveFailures": slot.consecutive_failures,
+            }
+            for slot in self.slots.values()
+        ]
+
+    async def generate_text(self, prompt: str, priority: int = None, expect_json: bool = False, schema=None) -> str:
+        """Runs a prompt on whichever key the shared scheduler picks and returns the response text.
+
+        When the expected queue wait exceeds GROQ_WAIT_THRESHOLD (or the time left before the
+        request deadline) and Groq is configured, the prompt goes to Groq instead of waiting
+        for a Gemini key. With HEDGE_ENABLED, JSON prompts that outlive Gemini's recent
+        latency percentile are also sent to Groq and the first valid JSON answer wins. The queue priority defaults to the caller's
+        llm_priority context (interactive unless running inside a batch worker). JSON prompts
+        run in JSON mode on both providers, constrained to `schema` on Gemini.
+        """
+        if not self.slots:
+            raise ValueError("Gemini model not initialized. Check your API keys.")
+        if priority is None:
+            priority = llm_priority.get()
+        tokens = estimate_tokens(prompt)
+        max_wait = self.max_queue_wait()
+        if self.groq_client and self.scheduler.expected_wait(tokens) > max_wait:
+            FALLBACKS.inc(kind="groq_queue_redirect")
+            return await self.call_groq_async(prompt, json_mode=expect_json)
+        config = json_generation_config(schema) if expect_json else None
+        if settings.HEDGE_ENABLED and expect_json and self.groq_client:
+            return await self._generate_hedged(prompt, tokens, priority, config)
+        return await self._call_gemini(prompt, tokens, priority, config)
+
+    def max_queue_wait(self):
+        """Longest a call should queue for a Gemini key: GROQ_WAIT_THRESHOLD when Groq can take
+        it instead, capped by the request deadline (None = wait as long as it takes)."""
+        left = remaining()
+        if not self.groq_client:
+            return left
+        return settings.GROQ_WAIT_THRESHOLD if left is None else min(settings.GROQ_WAIT_THRESHOLD, left)
+
+    async def _acquire_key(self, tokens: int, priority: int):
+        """Queues for a Gemini key. Keys can all get benched while a call is already queued, so
+        the call gives up (RATE_LIMIT, letting the caller fall back to Groq) once it has waited
+        max_queue_wait() or as soon as no key can free up within the time it has left."""
+        max_wait = self.max_queue_wait()
+        acquire = asyncio.ensure_future(self.scheduler.acquire(tokens, priority=priority))
+        if max_wait is None:
+            return await acquire
+        give_up_at = time.monotonic() + max_wait
+        try:
+            while True:
+                left = give_up_at - time.monotonic()
+                done, _ = await asyncio.wait({acquire}, timeout=max(0.0, min(QUEUE_CHECK_INTERVAL, left)))
+                if done:
+                    return acquire.result()
+                left = give_up_at - time.monotonic()
+                if left <= 0 or self.scheduler.time_to_capacity(tokens) > left:
+                    raise LLMError(f"No Gemini key can free up within {max(left, 0):.1f}s", RATE_LIMIT)
+        finally:
+            acquire.cancel()
+
+    async def _call_gemini(self, prompt: str, tokens: int, priority: int, config=None) -> str:
+        with timed("scheduler_wait"):
+            key_id = await self._acquire_key(tokens, priority)
+        slot = self.slots[key_id]
+        slot.in_flight += 1
+        slot.calls += 1
+        started = time.monotonic()
+        try:
+            if config is None:
+                response = await slot.model.generate_content_async(prompt)
+            else:
+                response = await slot.model.generate_content_async(prompt, generation_config=config)
+            text = response.text
+        except Exception as e:
+            if is_rate_limited(e):
+                LLM_CALLS.inc(provider="gemini", key=slot.label, outcome="rate_limited")
+                RATE_LIMITED.inc(provider="gemini", key=slot.label)
+                # 60s is standard for the Gemini free tier
+                print(f"Gemini API Key {slot.label} rate limited; cooling down {settings.GEMINI_KEY_COOLDOWN}s")
+                slot.mark_rate_limited(settings.GEMINI_KEY_COOLDOWN)
+                self.scheduler.penalize(key_id, settings.GEMINI_KEY_COOLDOWN)
+            else:
+                LLM_CALLS.inc(provider="gemini", key=slot.label, outcome="error")
+                slot.mark_failure()
+                if not slot.is_healthy():
+                    self.scheduler.penalize(key_id, settings.GEMINI_KEY_COOLDOWN)
+            raise
+        finally:
+            slot.in_flight -= 1
+        self.latency["gemini"].record(time.monotonic() - started)
+        LLM_CALLS.inc(provider="gemini", key=slot.label, outcome="ok")
+        slot.mark_success()
+        return text
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on Gemini before hedging: early enough that a typical Groq answer
+        lands by Gemini's HEDGE_PERCENTILE latency, but never before Gemini's median."""
+        gemini = self.latency["gemini"]
+        slow = gemini.percentile(settings.HEDGE_PERCENTILE)
+        if slow is None:
+            return settings.HEDGE_DEFAULT_DELAY
+        groq = self.latency["groq"].percentile(0.5)
+        if groq is None:
+            return slow
+        return max(gemini.percentile(0.5), slow - groq)
+
+    async def _generate_hedged(self, prompt: str, tokens: int, priority: int, config=None) -> str:
+        primary = asyncio.ensure_future(self._call_gemini(prompt, tokens, priority, config))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay())
+            if done:
+                return primary.result()
+
+            print("HEDGE: Gemini is slow, racing the prompt on Groq...")
+            FALLBACKS.inc(kind="hedge")
+            tasks.add(asyncio.ensure_future(self.call_groq_async(prompt, json_mode=True)))
+            pending = set(tasks)
+            fallback_text = None
+            errors = {}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        errors["gemini" if task is primary else "groq"] = task.exception()
+                        continue
+                    text = task.result()
+                    if is_valid_json(text):
+                        return text
+                    fallback_text = text
+            if fallback_text is not None:
+                return fallback_text
+            # Both failed: surface Gemini's error, blaming both providers
+            raise failed_on(errors["gemini"], *errors)
+        finally:
+            # Whoever lost the race is cancelled
+            for task in tasks:
+                task.cancel()
+
+    async def call_groq_async(self, prompt: str, json_mode: bool = False):
+        """Calls Groq Llama 3 as a high-speed fallback (in JSON object mode with `json_mode`)."""
         if not self.groq_client:
             raise ValueError("Groq API key not configured")
             
         print("FALLBACK: Using Groq (Llama 3) for verification...")
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None, 
-            lambda: self.groq_client.chat.completions.create(
+        started = time.monotonic()
+        options = {"response_format": {"type": "json_object"}} if json_mode and settings.STRUCTURED_OUTPUT else {}
+        try:
+            response = await self.groq_client.chat.completions.create(
                 messages=[{"role": "user", "content": prompt}],
                 model="llama-3.3-70b-versatile",
                 temperature=0.1,
-                max_tokens=1000
+                max_tokens=1000,
+                **options
             )
-        )
+        except Exception as e:
+            outcome = "rate_limited" if is_rate_limited(e) else "error"
+            LLM_CALLS.inc(provider="groq", key="groq", outcome=outcome)
+            if outcome == "rate_limited":
+                RATE_LIMITED.inc(provider="groq", key="groq")
+            raise failed_on(e, "groq")
+        self.latency["groq"].record(time.monotonic() - started)
+        LLM_CALLS.inc(provider="groq", key="groq", outcome="ok")
         return response.choices[0].message.content
 
 gemini_manager = GeminiManager()
+
+registry.gauge(
+    "trustguard_key_healthy", "1 if the Gemini key is out of cooldown.", ["key"],
+    lambda: [((slot.label,), int(slot.is_healthy())) for slot in gemini_manager.slots.values()],
+)
+registry.gauge(
+    "trustguard_key_in_flight", "Gemini calls currently running per key.", ["key"],
+    lambda: [((slot.label,), slot.in_flight) for slot in gemini_manager.slots.values()],
+)
+registry.gauge(
+    "trustguard_scheduler_pending", "LLM calls queued in the scheduler waiting for a key.", [],
+    lambda: [((), gemini_manager.scheduler.pending())],
+)
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+from .scheduler import llm_priority, PRIORITY_BATCH
+
+class JobQueue:
+    """Durable SQLite queue of batch verification items, shared by every worker process.
+
+    Items move queued -> running -> done/failed. Claiming an item leases it to this queue's
+    owner for lease_seconds; the worker renews the lease while it runs, and recover()
+    re-queues only running items whose lease has expired (their worker died), up to
+    max_attempts tries per item.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3, lease_seconds: float = 60.0):
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                total INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_items (
+                job_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                updated_at REAL,
+                owner TEXT,
+                lease_until REAL,
+                PRIMARY KEY (job_id, position)
+            );
+            CREATE INDEX IF NOT EXISTS job_items_status ON job_items (status);
+        """)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(job_items)")}
+        for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                # Queue files created before leases existed
+                self._db.execute(f"ALTER TABLE job_items ADD COLUMN {column} {kind}")
+        self._db.commit()
+
+    def submit(self, texts: list) -> str:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT INTO jobs (id, created_at, total) VALUES (?, ?, ?)", (job_id, now, len(texts)))
+            self._db.executemany(
+                "INSERT INTO job_items (job_id, position, text, updated_at) VALUES (?, ?, ?, ?)",
+                [(job_id, i, text, now) for i, text in enumerate(texts)],
+            )
+            self._db.commit()
+        return job_id
+
+    def recover(self) -> int:
+        """Re-queues running items whose lease has expired; gives up on repeat offenders. Items
+        from queue files without leases (lease_until NULL) count as expired."""
+        now = time.time()
+        expired = "status = 'running' AND (lease_until IS NULL OR lease_until < ?)"
+        with self._lock:
+            self._db.execute(
+                "UPDATE job_items SET status = 'failed', error = 'Gave up after repeated crashes', owner = NULL, "
+                f"lease_until = NULL, updated_at = ? WHERE {expired} AND attempts >= ?", (now, now, self.max_attempts)
+            )
+            count = self._db.execute(
+                f"UPDATE job_items SET status = 'queued', owner = NULL, lease_until = NULL, updated_at = ? WHERE {expired}",
+                (now, now),
+            ).rowcount
+            self._db.commit()
+        return count
+
+    def claim_next(self):
+        """Leases the oldest queued item to this owner, marks it running and returns
+        (job_id, position, text), or None. The single UPDATE is atomic across processes."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "UPDATE job_items SET status = 'running', attempts = attempts + 1, owner = ?, lease_until = ?, updated_at = ? "
+                "WHERE rowid = (SELECT i.rowid FROM job_items i JOIN jobs j ON j.id = i.job_id "
+                "WHERE i.status = 'queued' ORDER BY j.created_at, i.position LIMIT 1) AND status = 'queued' "
+                "RETURNING job_id, position, text",
+                (self.owner, now + self.lease_seconds, now),
+            ).fetchone()
+            self._db.commit()
+        return row
+
+    def renew(self, job_id: str, position: int) -> bool:
+        """Extends this owner's lease on a running item; False when the lease was lost."""
+        now = time.time()
+        with self._lock:
+            renewed = self._db.execute(
+                "UPDATE job_items SET lease_until = ? WHERE job_id = ? AND position = ? AND status = 'running' AND owner = ?",
+                (now + self.lease_seconds, job_id, position, self.owner),
+            ).rowcount
+            self._db.commit()
+        return bool(renewed)
+
+    def release(self) -> int:
+        """Re-queues the items this owner is running (graceful shutdown) without using up a try."""
+        with self._lock:
+            count = self._db.execute(
+                "UPDATE job_items SET status = 'queued', attempts = MAX(attempts - 1, 0), owner = NULL, lease_until = NULL, "
+                "updated_at = ? WHERE status = 'running' AND owner = ?", (time.time(), self.owner)
+            ).rowcount
+            self._db.commit()
+        return count
+
+    def finish(self, job_id: str, position: int, result: Optional[dict] = None, error: Optional[str] = None) -> bool:
+        """Records this owner's outcome for a running item; False (nothing written) when its
+        lease was lost and the item now belongs to another worker."""
+        with self._lock:
+            finished = self._db.execute(
+                "UPDATE job_items SET status = ?, result = ?, error = ?, updated_at = ?, owner = NULL, lease_until = NULL "
+                "WHERE job_id = ? AND position = ? AND status = 'running' AND owner = ?",
+                ("failed" if error else "done", json.dumps(result) if result is not None else None,
+                 error, time.time(), job_id, position, self.owner),
+            ).rowcount
+            self._db.commit()
+        return bool(finished)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._db.execute("SELECT total FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            rows = self._db.execute(
+                "SELECT position, status, result, error FROM job_items WHERE job_id = ? ORDER BY position", (job_id,)
+            ).fetchall()
+        items = [
+            {"position": p, "status": s, "result": json.loads(r) if r else None, "error": e}
+            for p, s, r, e in rows
+        ]
+        completed = sum(1 for i in items if i["status"] == "done")
+        failed = sum(1 for i in items if i["status"] == "failed")
+        if completed + failed == job[0]:
+            status = "complete"
+        elif any(i["status"] != "queued" for i in items):
+            status = "running"
+        else:
+            status = "queued"
+        return {"jobId": job_id, "status": status, "total": job[0], "completed": completed, "failed": failed, "items": items}
+
+class JobWorkerPool:
+    """Worker coroutines draining the JobQueue through `handler(text) -> dict`.
+
+    Batch work runs at PRIORITY_BATCH in the LLM scheduler and workers hold off on new
+    items while interactive calls are queued, so batch jobs never starve the extension.
+    """
+
+    def __init__(self, queue: JobQueue, handler, workers: int, poll_interval: float, interactive_backlog):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.interactive_backlog = interactive_backlog
+        self._tasks = []
+        self._recovered_at = 0.0
+
+    def _recover(self):
+        """Re-queues items of workers that died, at most once per lease period."""
+        self._recovered_at = time.monotonic()
+        try:
+            recovered = self.queue.recover()
+        except sqlite3.Error as e:
+            print(f"Batch queue recovery failed, retrying later: {e}")
+            return
+        if recovered:
+            print(f"Resuming {recovered} batch item(s) whose worker stopped.")
+
+    def start(self):
+        self._recover()
+        self._tasks = [asyncio.ensure_future(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            self.queue.release()
+        except sqlite3.Error as e:
+            print(f"Could not hand batch items back, they resume once their lease expires: {e}")
+
+    async def _run(self):
+        llm_priority.set(PRIORITY_BATCH)
+        while True:
+            try:
+                worked = await self._work_one()
+            except Exception as e:
+                # e.g. "database is locked" with several processes on one queue file; the
+                # worker backs off and carries on instead of dying
+                print(f"Batch worker error, retrying in {self.poll_interval}s: {e!r}")
+                worked = False
+            if not worked:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _work_one(self) -> bool:
+        """Claims and runs one item; False when there was nothing to do."""
+        if self.interactive_backlog() > 0:
+            return False
+        item = self.queue.claim_next()
+        if item is None:
+            if time.monotonic() - self._recovered_at >= self.queue.lease_seconds:
+                self._recover()
+            return False
+        job_id, position, text = item
+        heartbeat = asyncio.ensure_future(self._renew(job_id, position))
+        try:
+            result, error = await self.handler(text), None
+        except asyncio.CancelledError:
+            # Shutting down: stop() hands the item back to the queue
+            raise
+        except Exception as e:
+            print(f"Batch item {job_id}#{position} failed: {e}")
+            result, error = None, str(e)
+        finally:
+            heartbeat.cancel()
+        if not self.queue.finish(job_id, position, result=result, error=error):
+            print(f"Batch item {job_id}#{position} lost its lease; keeping the other worker's outcome")
+        return True
+
+    async def _renew(self, job_id: str, position: int):
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                renewed = self.queue.renew(job_id, position)
+            except sqlite3.Error as e:
+                # Try again on the next beat; the lease lasts three of them
+                print(f"Renewing the lease of batch item {job_id}#{position} failed: {e}")
+                continue
+            if not renewed:
+                print(f"Batch item {job_id}#{position} lost its lease")
+                return
@@ -0,0 +1,201 @@
+import contextvars
+import random
+import time
+from pydantic import ValidationError
+from ..core.config import settings
+from ..core.deadline import remaining
+from ..core.errors import (
+    LLMError, MalformedResponseError, classify_error,
+    RATE_LIMIT, MALFORMED, PERMANENT,
+)
+from ..core.json_repair import loads_lenient
+from ..core.metrics import FALLBACKS, LLM_PARSES, backoff_sleep, registry
+from .gemini import gemini_manager
+
+class RetryBudget:
+    """Retries shared by every LLM call of one request, so an outage costs a request a bounded
+    number of retries instead of (calls x retries)."""
+
+    def __init__(self, retries: int):
+        self.remaining = retries
+
+    def spend(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+# The budget of the request being served; unset outside a request (each call then gets its own)
+retry_budget = contextvars.ContextVar("retry_budget", default=None)
+
+def new_request_budget() -> RetryBudget:
+    """Starts a fresh retry budget for the current request context."""
+    budget = RetryBudget(settings.LLM_RETRY_BUDGET)
+    retry_budget.set(budget)
+    return budget
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures. While open the provider is
+    skipped without being called; after `reset_timeout` one probe call is let through
+    (half-open) and its outcome closes or re-opens the circuit."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.reset()
+
+    def reset(self):
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+        # Half-open: a single probe at a time (a probe that never reports back expires)
+        if now - self.probe_started < self.reset_timeout:
+            return False
+        self.probe_started = now
+        return True
+
+    def record_success(self):
+        if self.state != "closed":
+            print(f"Circuit for {self.name} closed again.")
+        self.reset()
+
+    def release(self):
+        """The call says nothing about the provider (one of its keys was rate-limited): a
+        half-open circuit lets the next probe through instead of waiting out reset_timeout."""
+        self.probe_started = 0.0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"Circuit for {self.name} opened after {self.failures} failure(s); skipping it for {self.reset_timeout}s.")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+breakers = {
+    name: CircuitBreaker(name, settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_TIMEOUT)
+    for name in ("gemini", "groq")
+}
+
+registry.gauge(
+    "trustguard_circuit_state", "Provider circuit breaker state (0 closed, 1 half-open, 2 open).", ["provider"],
+    lambda: [((name,), {"closed": 0, "half_open": 1, "open": 2}[b.state]) for name, b in breakers.items()],
+)
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff, so retrying requests don't wake up in lockstep."""
+    return random.uniform(0, min(settings.BACKOFF_MAX, settings.BACKOFF_BASE * 2 ** attempt))
+
+def parse_json(text: str, stage: str = "unknown", schema=None):
+    """Decodes a JSON reply (repairing common malformations locally) and, with `schema`,
+    validates it into that Pydantic model. Raises MalformedResponseError otherwise."""
+    try:
+        data, repaired = loads_lenient(text)
+    except ValueError as e:
+        LLM_PARSES.inc(stage=stage, outcome="unparseable")
+        raise MalformedResponseError(f"Invalid JSON from model: {e}") from e
+    if schema is not None:
+        try:
+            data = schema.model_validate(data)
+        except ValidationError as e:
+            LLM_PARSES.inc(stage=stage, outcome="invalid")
+            raise MalformedResponseError(f"Reply does not match {schema.__name__}: {e.error_count()} error(s)") from e
+    LLM_PARSES.inc(stage=stage, outcome="repaired" if repaired else "ok")
+    return data
+
+def _available(provider: str) -> bool:
+    if provider == "gemini":
+        return bool(gemini_manager.slots) and gemini_manager.has_healthy_key()
+    return gemini_manager.groq_client is not None
+
+async def _invoke(provider: str, prompt: str, expect_json: bool, schema) -> str:
+    if provider == "gemini":
+        return await gemini_manager.generate_text(prompt, expect_json=expect_json, schema=schema)
+    return await gemini_manager.call_groq_async(prompt, json_mode=expect_json)
+
+async def call_llm(prompt: str, stage: str, schema=None, parse=None, optional: bool = False):
+    """Runs a prompt through Gemini, then Groq, and returns the decoded reply.
+
+    JSON is the default: both providers are put in JSON mode (Gemini also gets `schema`'s
+    response_schema), and the reply is decoded by parse_json into a `schema` instance (or
+    plain JSON without one). A `parse` function instead asks for free text and returns
+    `parse(response_text)`.
+
+    - Rate limits retry at once on the next healthy Gemini key (the limited key is benched);
+      they only count against the Gemini circuit once no key is left.
+    - Failures count against the provider that actually failed: a Gemini call that Groq
+      served (queue redirect or hedge) and that failed there counts against Groq.
+    - Malformed answers are retried on the same provider.
+    - Transient and permanent errors move on to the next provider.
+    - Providers whose circuit is open are skipped without a call.
+    - When every provider failed, the call sleeps a jittered exponential backoff and starts over.
+    Every retry spends the request's RetryBudget; LLMError is raised once it is exhausted,
+    or as soon as the next backoff would overrun the request deadline.
+    `optional` calls (e.g. query generation) make one pass over the providers and never wait.
+    """
+    budget = retry_budget.get() or RetryBudget(settings.LLM_CALL_RETRIES)
+    expect_json = parse is None
+    if expect_json:
+        def parse(text):
+            return parse_json(text, stage, schema)
+    last_error, last_kind = None, None
+    attempt = 0
+    while True:
+        for provider in ("gemini", "groq"):
+            while _available(provider) and breakers[provider].allow():
+                if provider == "groq" and last_error is not None:
+                    FALLBACKS.inc(kind="groq_fallback")
+                failed = (provider,)
+                try:
+                    text = await _invoke(provider, prompt, expect_json, schema)
+                except Exception as e:
+                    last_error, last_kind = e, classify_error(e)
+                    # A Gemini call may have been handed to Groq (queue redirect or hedge)
+                    failed = getattr(e, "providers", failed)
+                    for name in failed:
+                        if name == "gemini" and last_kind == RATE_LIMIT and gemini_manager.has_healthy_key():
+                            # Only that key is limited (it has been benched); other keys can still serve
+                            breakers[name].release()
+                        else:
+                            breakers[name].record_failure()
+                    if provider not in failed:
+                        # The prompt never reached this provider: the call says nothing about it
+                        breakers[provider].release()
+                else:
+                    breakers[provider].record_success()
+                    try:
+                        return parse(text)
+                    except Exception as e:
+                        last_error, last_kind = e, MALFORMED
+                print(f"LLM call for {stage} failed on {'/'.join(failed)} ({last_kind}): {last_error}")
+                retry_here = last_kind == MALFORMED or (last_kind == RATE_LIMIT and "gemini" in failed)
+                if optional or not retry_here or not budget.spend():
+                    break
+
+        # Retrying won't fix a bad request or missing credentials
+        if optional or last_kind == PERMANENT or not budget.spend():
+            break
+        delay = backoff_delay(attempt)
+        left = remaining()
+        if left is not None and delay >= left:
+            print(f"Not backing off for {stage}: the request deadline is {left:.1f}s away.")
+            break
+        attempt += 1
+        print(f"All LLM providers failed for {stage}; backing off {delay:.1f}s...")
+        await backoff_sleep(delay, stage)
+
+    if last_error is None:
+        raise LLMError("No LLM provider is available (keys cooling down or circuits open)", RATE_LIMIT)
+    FALLBACKS.inc(kind="llm_gave_up")
+    raise LLMError(str(last_error), last_kind) from last_error
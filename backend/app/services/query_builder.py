@@ -0,0 +1,104 @@
+import os
+import re
+from .dedup import STOPWORDS
+
+TERM_FREQUENCIES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "term_frequencies.txt")
+
+# Zipf value assumed for words missing from the table (rarer than anything in it)
+UNKNOWN_ZIPF = 3.0
+# Words at least this common carry almost no information for a search engine
+COMMON_ZIPF = 5.8
+
+MONTHS = {
+    "january", "february", "march", "april", "may", "june", "july", "august",
+    "september", "october", "november", "december",
+}
+
+QUERY_STOPWORDS = STOPWORDS | {
+    "not", "no", "never", "some", "many", "most", "more", "very", "such", "there", "their", "they",
+    "he", "she", "his", "her", "we", "our", "you", "your", "can", "could", "would", "should",
+    "will", "may", "might", "do", "does", "did", "approximately", "roughly", "about", "around",
+    "according", "reportedly", "claim", "claims", "said", "says", "known",
+}
+
+# Numbers (1,234 / 3.5 / 40% / 1990s) and words with inner hyphens/apostrophes. Word characters
+# are "anything but space, digits and punctuation" so combining marks (e.g. Devanagari vowel
+# signs, which \w does not match) stay inside their word.
+_WORD_CHAR = r"[^\s\d.,;:!?()\[\]{}\"“”‘’«»/\\|<>@#$%^&*+=~`।॥_'-]"
+_TOKEN = re.compile(rf"\d+(?:[.,]\d+)*%?s?|{_WORD_CHAR}+(?:[-'’]{_WORD_CHAR}+)*")
+
+_frequencies = None
+
+def term_frequencies() -> dict:
+    """word -> Zipf frequency from the bundled table (loaded on first use)."""
+    global _frequencies
+    if _frequencies is None:
+        table = {}
+        try:
+            with open(TERM_FREQUENCIES_PATH, encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("#"):
+                        continue
+                    word, _, zipf = line.partition(" ")
+                    table[word] = float(zipf)
+        except (OSError, ValueError) as e:
+            print(f"Term frequency table unavailable, query builder falls back to stopwords only: {e}")
+        _frequencies = table
+    return _frequencies
+
+def idf(word: str) -> float:
+    """Inverse-frequency weight: rare words score high, everyday words near zero."""
+    return 8.0 - term_frequencies().get(word.lower(), UNKNOWN_ZIPF)
+
+def _is_month(tokens: list, i: int) -> bool:
+    lower = tokens[i].group().lower()
+    if lower != "may":
+        return lower in MONTHS
+    # "may" is usually the verb: it's only a date next to a day number or year ("May 2020", "4 May")
+    return any(t.group()[0].isdigit() for t in tokens[max(0, i - 1):i] + tokens[i + 1:i + 2])
+
+def _units(text: str) -> list:
+    """Splits a claim into query units: (text, kind, position). Consecutive capitalized
+    words form one proper-noun unit ("Mount Everest")."""
+    units = []
+    proper = []
+    tokens = list(_TOKEN.finditer(text))
+    for position, match in enumerate(tokens):
+        token = match.group()
+        lower = token.lower()
+        sentence_start = position == 0 or text[:match.start()].rstrip()[-1:] in ".!?:"
+        is_capitalized = token[:1].isupper() and lower not in QUERY_STOPWORDS
+        # A capitalized sentence opener only counts as a name when it isn't an everyday word
+        if is_capitalized and (proper or not sentence_start or term_frequencies().get(lower, UNKNOWN_ZIPF) < 4.5):
+            proper.append((token, position))
+            continue
+        if proper:
+            units.append((" ".join(t for t, _ in proper), "proper", proper[0][1]))
+            proper = []
+        if token[0].isdigit() or _is_month(tokens, position):
+            units.append((token, "number", position))
+        elif lower not in QUERY_STOPWORDS and len(lower) > 1:
+            units.append((token, "word", position))
+    if proper:
+        units.append((" ".join(t for t, _ in proper), "proper", proper[0][1]))
+    return units
+
+def build_search_query(claim: str, max_terms: int = 8) -> str:
+    """Builds a keyword search query for a claim without calling a model.
+
+    Proper nouns, numbers and dates are always kept; the remaining content words are
+    ranked by IDF from the bundled term-frequency table, everyday words are dropped, and
+    the best `max_terms` units are returned in their original order.
+    """
+    units = _units(claim)
+    keep = [u for u in units if u[1] != "word"]
+    words = [u for u in units if u[1] == "word" and term_frequencies().get(u[0].lower(), UNKNOWN_ZIPF) < COMMON_ZIPF]
+    words.sort(key=lambda u: idf(u[0]), reverse=True)
+    chosen = keep[:max_terms] + words[:max(0, max_terms - len(keep))]
+    seen = set()
+    terms = []
+    for text, _, _ in sorted(chosen, key=lambda u: u[2]):
+        if text.lower() not in seen:
+            seen.add(text.lower())
+            terms.append(text)
+    return " ".join(terms) or claim.strip()
@@ -0,0 +1,158 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from typing import Optional
+from .state import MemoryStateBackend, StateBackend, TokenBucket
+
+# Lower values are served first. Interactive requests use the default; batch workers
+# set PRIORITY_BATCH on their context so every LLM call they make queues behind interactive ones.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+llm_priority = contextvars.ContextVar("llm_priority", default=PRIORITY_INTERACTIVE)
+
+def estimate_tokens(prompt: str, max_output_tokens: int = 1000) -> int:
+    """Rough token estimate for a call: ~4 characters per prompt token plus the output allowance."""
+    return len(prompt) // 4 + max_output_tokens
+
+class LLMScheduler:
+    """Process-wide queue of pending LLM calls, dispatched to whichever API key has capacity.
+
+    Each key has a requests/min and a tokens/min bucket. Waiters are served in priority
+    order (lower first, FIFO within a priority). Fallback keys (e.g. the master key) are
+    only used when no regular key has capacity right now. Bucket levels and cooldowns are
+    kept in `state`, so schedulers in several worker processes sharing a backend draw from
+    the same per-key limits.
+    """
+
+    def __init__(self, state: StateBackend = None):
+        self.state = state or MemoryStateBackend()
+        self.keys = {}
+        self.state_keys = {}
+        self.fallback_keys = set()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._loop = None
+        self._wakeup = None
+        self._dispatcher = None
+
+    def add_key(self, key_id, rpm: int, tpm: int, fallback: bool = False, state_key: str = None):
+        """`state_key` names the key in the state backend; it must be the same in every worker."""
+        name = state_key or f"key:{key_id}"
+        self.state_keys[key_id] = name
+        self.keys[key_id] = (TokenBucket.per_minute(f"{name}:rpm", rpm), TokenBucket.per_minute(f"{name}:tpm", tpm))
+        if fallback:
+            self.fallback_keys.add(key_id)
+
+    def penalize(self, key_id, seconds: float):
+        """Takes a key out of rotation for `seconds` (e.g. after a 429)."""
+        if key_id in self.keys:
+            self.state.set_cooldown(self.state_keys[key_id], time.time() + seconds)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    def _key_wait(self, key_id, tokens: int, now: float):
+        """Returns (seconds until the key could serve `tokens`, its request bucket level)."""
+        requests, token_bucket = self.keys[key_id]
+        blocked = max(0.0, self.state.cooldown(self.state_keys[key_id]) - now)
+        request_level, token_level = self.state.levels([requests, token_bucket])
+        wait = max(blocked, requests.wait_time(request_level, 1), token_bucket.wait_time(token_level, tokens))
+        return wait, request_level
+
+    def _pick_key(self, tokens: int, consume: bool = True):
+        """Returns (key_id, 0) for a key with capacity now (drawing from its buckets when
+        `consume`), else (None, seconds until one frees up)."""
+        now = time.time()
+        best_wait = float("inf")
+        for fallback in (False, True):
+            ready = []
+            for key_id in self.keys:
+                if (key_id in self.fallback_keys) != fallback:
+                    continue
+                wait, request_level = self._key_wait(key_id, tokens, now)
+                if wait == 0:
+                    ready.append((request_level, key_id))
+                best_wait = min(best_wait, wait)
+            # Spread load: prefer the key with the most request headroom left
+            for _, key_id in sorted(ready, key=lambda r: r[0], reverse=True):
+                if not consume:
+                    return key_id, 0.0
+                requests, token_bucket = self.keys[key_id]
+                # Another worker may have drawn from the key since it was checked
+                wait = self.state.take([(requests, 1), (token_bucket, tokens)])
+                if wait == 0:
+                    return key_id, 0.0
+                best_wait = min(best_wait, wait)
+        return None, best_wait
+
+    async def acquire(self, tokens: int, priority: int = 0):
+        """Waits in the global queue until a key has capacity, consumes it and returns the key id."""
+        if not self.keys:
+            return None
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Queue state is bound to one event loop
+            self._loop = loop
+            self._waiters = []
+            self._wakeup = asyncio.Event()
+            self._dispatcher = None
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), tokens, future))
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        return await future
+
+    async def _dispatch(self):
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():  # caller was cancelled
+                heapq.heappop(self._waiters)
+                continue
+            key_id, wait = self._pick_key(tokens)
+            if key_id is not None:
+                heapq.heappop(self._waiters)
+                future.set_result(key_id)
+                continue
+            # Sleep until a key frees up, or until a new (possibly higher priority) waiter arrives
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=min(wait, 5.0))
+            except asyncio.TimeoutError:
+                pass
+
+    def pending(self, max_priority: Optional[int] = None) -> int:
+        """Number of queued calls, optionally only those at or above a priority (<= max_priority)."""
+        return sum(
+            1 for priority, _, _, future in self._waiters
+            if not future.done() and (max_priority is None or priority <= max_priority)
+        )
+
+    def time_to_capacity(self, tokens: int = 1000) -> float:
+        """Seconds until any key could serve a call of `tokens`, ignoring the queue."""
+        return self._pick_key(tokens, consume=False)[1] if self.keys else 0.0
+
+    def expected_wait(self, tokens: int = 1000) -> float:
+        """Estimated seconds a new call would wait for a key, given the calls already queued."""
+        if not self.keys:
+            return 0.0
+        now = time.time()
+        position = self.pending() + 1
+        ready = 0
+        rate = 0.0
+        blocked_until = []
+        for key_id, (requests, token_bucket) in self.keys.items():
+            cooldown = self.state.cooldown(self.state_keys[key_id])
+            if cooldown > now:
+                blocked_until.append(cooldown)
+                continue
+            request_level, token_level = self.state.levels([requests, token_bucket])
+            ready += int(min(request_level, token_level / max(tokens, 1)))
+            rate += min(requests.rate, token_bucket.rate / max(tokens, 1))
+        if ready >= position:
+            return 0.0
+        if rate == 0:
+            # Every key is blocked; wait for the first one to come back
+            return min(blocked_until) - now
+        return (position - ready) / rate
@@ -1,70 +1,202 @@
 import asyncio
-from duckduckgo_search import DDGS
+import importlib
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 from ..core.config import settings
+from ..core.metrics import CACHE_LOOKUPS, SEARCHES, timed
+from ..core.utils import normalize_text
+from .cache import TTLCache, SingleFlight
+from .evidence import domain_authority, excluded_domains
+from .evidence_index import get_evidence_index, reset_evidence_index, search_evidence
 
-try:
-    from tavily import TavilyClient
-    tavily_available = True
-except ImportError:
-    tavily_available = False
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
 
-# Initialize Tavily Client
-tavily_client = None
-if tavily_available and settings.TAVILY_API_KEY:
-    tavily_client = TavilyClient(api_key=settings.TAVILY_API_KEY)
+# Domains to avoid for fact-checking (authority 0 in app/data/domain_authority.txt)
+EXCLUDED_DOMAINS = excluded_domains()
 
-def search_web(query: str) -> dict:
+# DuckDuckGo has no async client, so it runs on its own small pool (one reusable DDGS
+# session per thread) instead of competing with everything else for the default executor.
+_ddg_executor = ThreadPoolExecutor(max_workers=settings.DDG_MAX_WORKERS, thread_name_prefix="ddg-search")
+_ddg_local = threading.local()
+# Local index lookups get their own bounded pool too, so a burst of claims cannot fill the
+# default executor (the index serves one query at a time anyway)
+_local_executor = ThreadPoolExecutor(max_workers=settings.LOCAL_SEARCH_MAX_WORKERS, thread_name_prefix="local-search")
+
+# Shared keep-alive HTTP pool and concurrency limit (both are bound to the running event loop)
+_http_client = None
+_search_slots = None
+_bound_loop = None
+
+def _loop_resources():
+    global _http_client, _search_slots, _bound_loop
+    loop = asyncio.get_running_loop()
+    if _bound_loop is not loop:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.SEARCH_CONCURRENCY,
+                max_keepalive_connections=settings.SEARCH_CONCURRENCY,
+            ),
+            timeout=httpx.Timeout(settings.TAVILY_TIMEOUT),
+        )
+        _search_slots = asyncio.Semaphore(settings.SEARCH_CONCURRENCY)
+        _bound_loop = loop
+    return _http_client, _search_slots
+
+async def close_http_client():
+    """Closes the shared HTTP pool (call on shutdown)."""
+    global _http_client, _bound_loop
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _bound_loop = None
+
+async def search_tavily(query: str) -> dict:
+    """Searches Tavily (High Quality) over the shared async HTTP pool."""
+    client, slots = _loop_resources()
+    print(f"Searching Tavily for: {query[:50]}...")
+    async with slots:
+        response = await client.post(
+            TAVILY_SEARCH_URL,
+            headers={"Authorization": f"Bearer {settings.TAVILY_API_KEY}"},
+            json={
+                "query": query,
+                # Tavily is optimized for LLM context
+                "search_depth": "advanced",
+                "max_results": 5,
+                "exclude_domains": EXCLUDED_DOMAINS,
+            },
+        )
+    response.raise_for_status()
+    results = response.json().get("results") or []
+    if not results:
+        return {}
+    print(f"Tavily found {len(results)} results.")
+    # Combine top 5 results for much richer context
+    combined_body = "\n".join([f"- [{r.get('title')}] {r.get('content', '')}" for r in results[:5]])
+    return {
+        "title": results[0].get('title', 'Multiple Sources'),
+        "body": combined_body,
+        "href": results[0].get('url', '#'),
+        # Per-source text for evidence ranking
+        "results": [{"title": r.get('title'), "url": r.get('url', ''), "text": r.get('content', '')} for r in results[:5]],
+    }
+
+def _ddg_text(query: str) -> list:
+    ddgs = getattr(_ddg_local, "ddgs", None)
+    if ddgs is None:
+        # Imported on first use to keep it out of startup
+        from duckduckgo_search import DDGS
+        ddgs = _ddg_local.ddgs = DDGS(timeout=int(settings.DDG_TIMEOUT))
+    # Get more results to filter
+    return list(ddgs.text(query, max_results=10))
+
+async def search_duckduckgo(query: str) -> dict:
+    """Searches DuckDuckGo on its dedicated executor."""
+    _, slots = _loop_resources()
+    print(f"Searching DuckDuckGo for: {query[:50]}...")
+    async with slots:
+        raw_results = await asyncio.wait_for(
+            asyncio.get_running_loop().run_in_executor(_ddg_executor, _ddg_text, query),
+            timeout=settings.DDG_TIMEOUT,
+        )
+    # Filter out excluded domains
+    results = [r for r in raw_results if domain_authority(r.get('href', '')) > 0]
+    if not results:
+        return {}
+    print(f"Found {len(results)} filtered results for: {query[:30]}")
+    # Combine top 3 results for better evidence
+    combined_body = "\n".join([f"- {r.get('body', '')}" for r in results[:3]])
+    return {
+        "title": results[0].get('title', 'Multiple Sources'),
+        "body": combined_body,
+        "href": results[0].get('href', '#'),
+        "results": [{"title": r.get('title'), "url": r.get('href', ''), "text": r.get('body', '')} for r in results[:5]],
+    }
+
+async def search_web(query: str) -> dict:
     """Searches Tavily (High Quality) or DuckDuckGo (Fallback) and returns results."""
-    # Domains to avoid for fact-checking
-    EXCLUDED_DOMAINS = ["quora.com", "reddit.com", "facebook.com", "twitter.com", "x.com", "instagram.com", "pinterest.com", "tumblr.com"]
-    
     # Try Tavily first if available
-    if tavily_client:
+    if settings.TAVILY_API_KEY:
         try:
-            print(f"Searching Tavily for: {query[:50]}...")
-            # Tavily is optimized for LLM context
-            response = tavily_client.search(
-                query, 
-                search_depth="advanced", 
-                max_results=5,
-                exclude_domains=EXCLUDED_DOMAINS
-            )
-            if response and response.get('results'):
-                results = response['results']
-                print(f"Tavily found {len(results)} results.")
-                # Combine top 5 results for much richer context
-                combined_body = "\n".join([f"- [{r.get('title')}] {r.get('content', '')}" for r in results[:5]])
-                return {
-                    "title": results[0].get('title', 'Multiple Sources'),
-                    "body": combined_body,
-                    "href": results[0].get('url', '#')
-                }
+            result = await search_tavily(query)
+            SEARCHES.inc(provider="tavily", outcome="ok" if result else "empty")
+            if result:
+                return result
         except Exception as e:
-            print(f"Tavily Search Error: {e}")
+            SEARCHES.inc(provider="tavily", outcome="error")
+            print(f"Tavily Search Error: {e!r}")
 
     # Fallback to DuckDuckGo
-    print(f"Searching DuckDuckGo for: {query[:50]}...")
     try:
-        with DDGS() as ddgs:
-            # Get more results to filter
-            raw_results = list(ddgs.text(query, max_results=10))
-            # Filter out excluded domains
-            results = [r for r in raw_results if not any(domain in r.get('href', '').lower() for domain in EXCLUDED_DOMAINS)]
-            
-            if results:
-                print(f"Found {len(results)} filtered results for: {query[:30]}")
-                # Combine top 3 results for better evidence
-                combined_body = "\n".join([f"- {r.get('body', '')}" for r in results[:3]])
-                return {
-                    "title": results[0].get('title', 'Multiple Sources'),
-                    "body": combined_body,
-                    "href": results[0].get('href', '#')
-                }
+        result = await search_duckduckgo(query)
+        SEARCHES.inc(provider="duckduckgo", outcome="ok" if result else "empty")
+        if result:
+            return result
     except Exception as e:
-        print(f"Search Error for query '{query}': {e}")
+        SEARCHES.inc(provider="duckduckgo", outcome="error")
+        print(f"Search Error for query '{query}': {e!r}")
     print(f"No results found for: {query[:30]}")
     return {}
 
+# Results are cached per (provider, normalized query); identical in-flight lookups share one upstream call
+search_cache = TTLCache(maxsize=settings.SEARCH_CACHE_SIZE, ttl=settings.SEARCH_CACHE_TTL)
+_search_flight = SingleFlight()
+
+def active_provider() -> str:
+    return "tavily" if settings.TAVILY_API_KEY else "duckduckgo"
+
+def warm_up_search():
+    """Loads what the active search provider needs ahead of the first search (blocking)."""
+    if active_provider() == "duckduckgo":
+        importlib.import_module("duckduckgo_search")
+
+def search_readiness() -> dict:
+    provider = active_provider()
+    return {
+        "provider": provider,
+        "loaded": provider == "tavily" or "duckduckgo_search" in sys.modules,
+        "ready": True,
+    }
+
+async def search_local(query: str) -> dict:
+    """Looks the query up in the local evidence index (off the event loop). A failing lookup
+    is counted as an error and the index is reopened for the next query; the caller goes on
+    to web search."""
+    if get_evidence_index() is None:
+        return {}
+    try:
+        with timed("local_search"):
+            result = await asyncio.get_running_loop().run_in_executor(_local_executor, search_evidence, query)
+    except Exception as e:
+        print(f"ERROR: local evidence search failed, reopening the index: {e!r}")
+        SEARCHES.inc(provider="local", outcome="error")
+        reset_evidence_index()
+        return {}
+    SEARCHES.inc(provider="local", outcome="ok" if result else "empty")
+    return result
+
 async def search_web_async(query: str) -> dict:
-    """Searches DuckDuckGo and returns the first result (Async)."""
-    return await asyncio.to_thread(search_web, query)
+    """Searches for evidence (Async): the local evidence index first, then the web, served
+    from the result cache when possible."""
+    local = await search_local(query)
+    if local:
+        print(f"Local evidence found for: {query[:50]}")
+        return local
+
+    key = (active_provider(), normalize_text(query))
+    cached = search_cache.get(key)
+    if cached is not None:
+        CACHE_LOOKUPS.inc(cache="search", result="hit")
+        print(f"Search cache hit for: {query[:50]}")
+        return cached
+    CACHE_LOOKUPS.inc(cache="search", result="miss")
+
+    async def fetch():
+        result = await search_web(query)
+        search_cache.set(key, result, ttl=None if result else settings.SEARCH_CACHE_EMPTY_TTL)
+        return result
+
+    with timed("search"):
+        return await _search_flight.do(key, fetch)
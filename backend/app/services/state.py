@@ -0,0 +1,278 @@
+"""Key health and rate-limit state shared by every worker process.
+
+A uvicorn worker that gets a 429 on a Gemini key is only useful to the others if they stop
+using that key too, so cooldowns, failure counts and the per-key token buckets live behind a
+StateBackend instead of in each process:
+
+    MemoryStateBackend  - one process (a single worker, benchmarks)
+    SQLiteStateBackend  - every worker on one host, through a WAL-mode file
+
+Times are wall-clock (time.time()) so every process reads them the same way. A
+Redis-compatible store can implement the same methods: a hash per key for the cooldown
+(HSET only when later) and failure count (HINCRBY), and a Lua script for `take`, which has
+to refill, check and consume all the buckets of one call atomically.
+"""
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Tuple
+from ..core.config import settings
+
+class TokenBucket(NamedTuple):
+    """A bucket of up to `capacity` tokens refilling at `rate` tokens per second. Only the
+    definition lives here; its level is kept by a StateBackend under `name`."""
+    name: str
+    capacity: float
+    rate: float
+
+    @classmethod
+    def per_minute(cls, name: str, capacity: float) -> "TokenBucket":
+        return cls(name, float(capacity), capacity / 60.0)
+
+    def refill(self, level, updated: float, now: float) -> float:
+        """Level at `now` given the stored level (None for a bucket never drawn from)."""
+        if level is None:
+            return self.capacity
+        return min(self.capacity, level + max(0.0, now - updated) * self.rate)
+
+    def wait_time(self, level: float, amount: float) -> float:
+        """Seconds until `amount` tokens are available at `level` (0 if they are available now)."""
+        amount = min(amount, self.capacity)
+        return 0.0 if level >= amount else (amount - level) / self.rate
+
+def _draw(draws: list, levels: list):
+    """Returns (wait, new levels): the levels after taking every draw, or unchanged with the
+    wait until all of them fit."""
+    wait = max((bucket.wait_time(level, amount) for (bucket, amount), level in zip(draws, levels)), default=0.0)
+    if wait > 0:
+        return wait, levels
+    return 0.0, [level - min(amount, bucket.capacity) for (bucket, amount), level in zip(draws, levels)]
+
+class StateBackend(ABC):
+    """Storage for per-key cooldowns, failure counts and token-bucket levels."""
+
+    @abstractmethod
+    def cooldown(self, key: str) -> float:
+        """Wall-clock time until which `key` is out of rotation (0 when it is not)."""
+
+    @abstractmethod
+    def set_cooldown(self, key: str, until: float):
+        """Benches `key` until `until`; an existing later cooldown is kept."""
+
+    @abstractmethod
+    def failures(self, key: str) -> int:
+        """Consecutive failures of `key` since its last success."""
+
+    @abstractmethod
+    def add_failure(self, key: str) -> int:
+        """Counts a failure of `key` and returns its consecutive failures."""
+
+    @abstractmethod
+    def reset_failures(self, key: str):
+        """Clears the failure count of `key` after a success."""
+
+    @abstractmethod
+    def levels(self, buckets: List[TokenBucket]) -> List[float]:
+        """Current token levels of `buckets`, refilled up to now."""
+
+    @abstractmethod
+    def take(self, draws: List[Tuple[TokenBucket, float]]) -> float:
+        """Atomically takes `amount` from every (bucket, amount) when all of them have it and
+        returns 0; otherwise takes nothing and returns the seconds until they would."""
+
+class MemoryStateBackend(StateBackend):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cooldowns = {}
+        self._failures = {}
+        self._buckets = {}  # name -> (level, updated)
+
+    def cooldown(self, key: str) -> float:
+        return self._cooldowns.get(key, 0.0)
+
+    def set_cooldown(self, key: str, until: float):
+        with self._lock:
+            self._cooldowns[key] = max(until, self._cooldowns.get(key, 0.0))
+
+    def failures(self, key: str) -> int:
+        return self._failures.get(key, 0)
+
+    def add_failure(self, key: str) -> int:
+        with self._lock:
+            self._failures[key] = self._failures.get(key, 0) + 1
+            return self._failures[key]
+
+    def reset_failures(self, key: str):
+        self._failures.pop(key, None)
+
+    def _levels(self, buckets, now):
+        levels = []
+        for bucket in buckets:
+            level, updated = self._buckets.get(bucket.name, (None, now))
+            levels.append(bucket.refill(level, updated, now))
+        return levels
+
+    def levels(self, buckets):
+        with self._lock:
+            return self._levels(buckets, time.time())
+
+    def take(self, draws):
+        now = time.time()
+        with self._lock:
+            wait, levels = _draw(draws, self._levels([bucket for bucket, _ in draws], now))
+            if wait == 0:
+                for (bucket, _), level in zip(draws, levels):
+                    self._buckets[bucket.name] = (level, now)
+            return wait
+
+class SQLiteStateBackend(StateBackend):
+    """State in a WAL-mode SQLite file that every worker on the host opens. Bucket draws run in
+    BEGIN IMMEDIATE transactions, so two workers cannot both spend the same tokens.
+
+    Reads (key picking, health checks, gauges) are served from an in-memory copy of both
+    tables, re-read at most every `refresh_interval` seconds, so the event loop does not wait
+    on the file for them. Cooldown and failure-count writes update that copy at once and
+    reach the file from a single writer thread; other workers see them within one interval.
+    `take` always goes to the database, and fails closed: while the database errors (busy,
+    locked), draws are refused for `error_wait` seconds rather than let through unmetered.
+    """
+
+    def __init__(self, path: str, timeout: float = 1.0, refresh_interval: float = 0.5, error_wait: float = 1.0):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.refresh_interval = refresh_interval
+        self.error_wait = error_wait
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="key-state")
+        # Writes queued and writes done; each counter has a single writer thread
+        self._writes_queued = 0
+        self._writes_done = 0
+        self._refreshed_at = float("-inf")
+        self._cooldowns = {}
+        self._failures = {}
+        self._buckets = {}  # name -> (level, updated), as last read or written
+        # Autocommit mode: transactions are opened explicitly in _transaction
+        self._db = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS keys (key TEXT PRIMARY KEY, cooldown_until REAL NOT NULL DEFAULT 0,"
+            " failures INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)")
+
+    def _transaction(self, work, default, write: bool = False):
+        with self._lock:
+            try:
+                self._db.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+                result = work(self._db)
+                self._db.execute("COMMIT")
+                return result
+            except sqlite3.Error as e:
+                print(f"Shared key state unavailable: {e}")
+                return default
+            finally:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+
+    def _write(self, work):
+        """Queues a write transaction for the writer thread (the in-memory copy is already updated)."""
+        def write():
+            try:
+                self._transaction(work, None, write=True)
+            finally:
+                self._writes_done += 1
+        self._writes_queued += 1
+        self._writer.submit(write)
+
+    def flush(self):
+        """Waits until the queued writes have reached the database."""
+        self._writer.submit(lambda: None).result()
+
+    def _refresh(self):
+        """Re-reads both tables when the in-memory copy is older than refresh_interval."""
+        # A re-read before queued writes land would undo them in the copy
+        if self._writes_queued != self._writes_done or time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        def read(db):
+            return (db.execute("SELECT key, cooldown_until, failures FROM keys").fetchall(),
+                    db.execute("SELECT name, level, updated FROM buckets").fetchall())
+        rows = self._transaction(read, None)
+        # Also on an error, so a broken file is not retried on every call; the last copy is kept
+        self._refreshed_at = time.monotonic()
+        if rows is not None:
+            keys, buckets = rows
+            self._cooldowns = {key: until for key, until, _ in keys}
+            self._failures = {key: failures for key, _, failures in keys}
+            self._buckets = {name: (level, updated) for name, level, updated in buckets}
+
+    def cooldown(self, key: str) -> float:
+        self._refresh()
+        return self._cooldowns.get(key, 0.0)
+
+    def set_cooldown(self, key: str, until: float):
+        self._cooldowns[key] = max(until, self._cooldowns.get(key, 0.0))
+        self._write(lambda db: db.execute(
+            "INSERT INTO keys (key, cooldown_until) VALUES (?, ?)"
+            " ON CONFLICT(key) DO UPDATE SET cooldown_until = MAX(cooldown_until, excluded.cooldown_until)",
+            (key, until),
+        ))
+
+    def failures(self, key: str) -> int:
+        self._refresh()
+        return self._failures.get(key, 0)
+
+    def add_failure(self, key: str) -> int:
+        # Counted locally at once; failures other workers added since the last refresh show
+        # up on the next one
+        failures = self._failures.get(key, 0) + 1
+        self._failures[key] = failures
+        self._write(lambda db: db.execute(
+            "INSERT INTO keys (key, failures) VALUES (?, 1) ON CONFLICT(key) DO UPDATE SET failures = failures + 1",
+            (key,),
+        ))
+        return failures
+
+    def reset_failures(self, key: str):
+        # Runs after every successful call; nothing to write in the usual case
+        if self._failures.get(key, 0) == 0:
+            return
+        self._failures[key] = 0
+        self._write(lambda db: db.execute("UPDATE keys SET failures = 0 WHERE key = ?", (key,)))
+
+    def levels(self, buckets):
+        self._refresh()
+        now = time.time()
+        return [bucket.refill(*self._buckets.get(bucket.name, (None, now)), now) for bucket in buckets]
+
+    def take(self, draws):
+        def take(db):
+            now = time.time()
+            names = [bucket.name for bucket, _ in draws]
+            rows = db.execute(
+                f"SELECT name, level, updated FROM buckets WHERE name IN ({','.join('?' * len(names))})", names
+            ).fetchall()
+            stored = {name: (level, updated) for name, level, updated in rows}
+            self._buckets.update(stored)
+            wait, levels = _draw(draws, [bucket.refill(*stored.get(bucket.name, (None, now)), now) for bucket, _ in draws])
+            if wait == 0:
+                drawn = {bucket.name: (level, now) for (bucket, _), level in zip(draws, levels)}
+                db.executemany(
+                    "INSERT OR REPLACE INTO buckets (name, level, updated) VALUES (?, ?, ?)",
+                    [(name, level, updated) for name, (level, updated) in drawn.items()],
+                )
+                self._buckets.update(drawn)
+            return wait
+        return self._transaction(take, self.error_wait, write=True)
+
+def make_state_backend(name: str, path: str, refresh_interval: float = 0.5) -> StateBackend:
+    if name == "sqlite":
+        try:
+            return SQLiteStateBackend(path, refresh_interval=refresh_interval)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Shared key state disabled, each worker keeps its own: {e}")
+    return MemoryStateBackend()
+
+state_backend = make_state_backend(settings.STATE_BACKEND, settings.STATE_PATH, settings.STATE_REFRESH_INTERVAL)
@@ -0,0 +1,85 @@
+"""Background warm-up after startup and the readiness report behind GET /ready.
+
+Provider clients and lookup tables are built on first use, so the app imports and binds its
+port quickly on a cold start. The warm-up makes that first use in a worker thread right
+after startup, so the first real request does not pay for it either.
+"""
+import asyncio
+import time
+from typing import Optional
+from ..core.config import settings
+from .evidence import authority_table
+from .evidence_index import get_evidence_index
+from .gemini import gemini_manager
+from .query_builder import term_frequencies
+from .search import search_readiness, warm_up_search
+
+# (name, loader, runs in a worker thread) in the order the warm-up runs them. Blocking work
+# (SDK imports, reading tables) goes to a thread; the Gemini clients are built on the loop.
+WARMUP_STEPS = [
+    ("provider_sdks", gemini_manager.import_sdks, True),
+    ("search", warm_up_search, True),
+    ("evidence_index", get_evidence_index, True),
+    ("term_frequencies", term_frequencies, True),
+    ("domain_authority", authority_table, True),
+    ("llm_clients", gemini_manager.build_clients, False),
+]
+
+class WarmUp:
+    """Runs WARMUP_STEPS once in the background; a failing step is reported and skipped."""
+
+    def __init__(self, steps: list):
+        self.steps = steps
+        self.status = "idle"  # idle -> running -> done
+        self.timings = {}
+        self.errors = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self):
+        self.status = "running"
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            for name, load, in_thread in self.steps:
+                step_started = time.perf_counter()
+                try:
+                    if in_thread:
+                        await loop.run_in_executor(None, load)
+                    else:
+                        load()
+                except Exception as e:
+                    print(f"Warm-up step {name} failed: {e!r}")
+                    self.errors[name] = str(e)
+                self.timings[name] = round(time.perf_counter() - step_started, 3)
+        finally:
+            self.status = "done"
+        print(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+    def start(self):
+        if settings.WARMUP_ON_STARTUP and self._task is None:
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def report(self) -> dict:
+        return {"status": self.status, "seconds": self.timings, "errors": self.errors}
+
+warmup = WarmUp(WARMUP_STEPS)
+
+def readiness() -> dict:
+    """Ready once the warm-up (if any) has finished and at least one LLM provider can serve."""
+    providers = {
+        **gemini_manager.readiness(),
+        "search": search_readiness(),
+        "evidenceIndex": {"available": get_evidence_index() is not None},
+    }
+    llm_ready = providers["gemini"]["ready"] or providers["groq"]["ready"]
+    return {
+        "ready": llm_ready and warmup.status != "running",
+        "warmUp": warmup.report(),
+        "providers": providers,
+    }
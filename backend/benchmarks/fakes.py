@@ -0,0 +1,187 @@
+"""Local stand-ins for Gemini, Groq, Tavily and DuckDuckGo used by the benchmark suite.
+
+Every fake draws its latency from a configurable log-normal distribution and can inject
+rate-limit (429) errors and malformed JSON at configurable rates. `install()` plugs them
+in where the backend talks to real providers: the per-key model slots and Groq client of
+`gemini_manager`, and the uncached `search_web` behind `search_web_async`.
+"""
+import asyncio
+import json
+import random
+import re
+from dataclasses import dataclass, field
+from google.api_core import exceptions as google_exceptions
+
+@dataclass
+class Latency:
+    """Log-normal latency: `median` seconds with spread `sigma` (0 = constant)."""
+    median: float
+    sigma: float = 0.4
+
+    def sample(self, rng: random.Random) -> float:
+        return self.median * rng.lognormvariate(0, self.sigma) if self.sigma else self.median
+
+@dataclass
+class Profile:
+    gemini_latency: Latency = field(default_factory=lambda: Latency(1.2))
+    groq_latency: Latency = field(default_factory=lambda: Latency(0.6))
+    search_latency: Latency = field(default_factory=lambda: Latency(0.8))
+    rate_limit_rate: float = 0.0
+    malformed_rate: float = 0.0
+    # Calls each Gemini key serves before it starts answering 429 (None = unlimited)
+    key_quota: int = None
+    keys: int = 3
+    key_rpm: int = 1000
+    groq: bool = True
+    seed: int = 7
+
+@dataclass
+class Counters:
+    gemini_calls: int = 0
+    groq_calls: int = 0
+    searches: int = 0
+    rate_limited: int = 0
+    malformed: int = 0
+
+    def reset(self):
+        self.gemini_calls = self.groq_calls = self.searches = self.rate_limited = self.malformed = 0
+
+counters = Counters()
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+def _quoted_text(prompt: str) -> str:
+    match = re.search(r'Text: "(.*)"\s*$', prompt, re.S)
+    return match.group(1) if match else ""
+
+def answer(prompt: str, rng: random.Random) -> str:
+    """A plausible, well-formed answer for each prompt the pipeline sends."""
+    if '"language"' in prompt and '"claims"' in prompt:
+        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", _quoted_text(prompt)) if len(s.strip()) > 20]
+        return json.dumps({
+            "language": "en",
+            "claims": sentences[:6],
+            "citations": [s for s in sentences if "et al." in s][:4],
+        })
+    if '"queries"' in prompt:
+        count = len(re.findall(r"^\s*\d+\. ", prompt, re.M))
+        return json.dumps({"queries": [{"index": i, "query": f"query {i} {rng.random():.6f}"} for i in range(count)]})
+    if '"results"' in prompt:
+        count = len(re.findall(r"^\s*\[\d+\] Claim", prompt, re.M))
+        return json.dumps({"results": [_verdict(rng, index=i) for i in range(count)]})
+    if "Citation Validator" in prompt:
+        return json.dumps({"isReal": rng.random() < 0.8, "confidence": round(rng.random(), 2)})
+    if "search engine query" in prompt:
+        return f"search query {rng.random():.6f}"
+    return json.dumps(_verdict(rng))
+
+def _verdict(rng: random.Random, **extra) -> dict:
+    return {
+        **extra,
+        "status": rng.choice(["verified", "verified", "uncertain", "hallucinated"]),
+        "confidence": round(rng.uniform(0.5, 1.0), 2),
+        "explanation": "Benchmark verdict.",
+    }
+
+class FakeGeminiModel:
+    def __init__(self, profile: Profile, rng: random.Random):
+        self.profile = profile
+        self.rng = rng
+        self.served = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        counters.gemini_calls += 1
+        await asyncio.sleep(self.profile.gemini_latency.sample(self.rng))
+        self.served += 1
+        quota_spent = self.profile.key_quota is not None and self.served > self.profile.key_quota
+        if quota_spent or self.rng.random() < self.profile.rate_limit_rate:
+            counters.rate_limited += 1
+            raise google_exceptions.ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+        if self.rng.random() < self.profile.malformed_rate:
+            counters.malformed += 1
+            return _Response("Sure! Here is the JSON you asked for: {status: verified")
+        return _Response(answer(prompt, self.rng))
+
+class _FakeGroqCompletions:
+    def __init__(self, profile: Profile, rng: random.Random):
+        self.profile = profile
+        self.rng = rng
+
+    async def create(self, messages, **kwargs):
+        counters.groq_calls += 1
+        await asyncio.sleep(self.profile.groq_latency.sample(self.rng))
+        if self.rng.random() < self.profile.malformed_rate:
+            counters.malformed += 1
+            content = "not json"
+        else:
+            content = answer(messages[-1]["content"], self.rng)
+        message = type("Message", (), {"content": content})()
+        return type("Completion", (), {"choices": [type("Choice", (), {"message": message})()]})()
+
+class FakeGroqClient:
+    def __init__(self, profile: Profile, rng: random.Random):
+        self.chat = type("Chat", (), {"completions": _FakeGroqCompletions(profile, rng)})()
+
+SOURCES = [
+    ("Encyclopedia Entry", "https://en.wikipedia.org/wiki/Benchmark"),
+    ("News Report", "https://www.reuters.com/world/benchmark"),
+    ("Personal Blog", "https://someone.blogspot.com/2020/benchmark"),
+]
+FILLER = [
+    "The page opens with a general introduction to the subject.",
+    "Several historians have written about the period in detail.",
+    "Navigation menus, related links and cookie notices follow.",
+    "Readers also viewed a number of unrelated articles.",
+    "The remaining paragraphs discuss background material at length.",
+]
+
+def make_fake_search(profile: Profile, rng: random.Random):
+    async def search_web(query: str) -> dict:
+        counters.searches += 1
+        await asyncio.sleep(profile.search_latency.sample(rng))
+        # Tavily-shaped: a few sources, each a page excerpt with one relevant sentence
+        results = [
+            {"title": title, "url": url, "text": " ".join(FILLER) + f" Reference text about {query}. " + " ".join(FILLER[:3])}
+            for title, url in SOURCES
+        ]
+        return {
+            "title": results[0]["title"],
+            "body": "\n".join(f"- [{r['title']}] {r['text']}" for r in results),
+            "href": results[0]["url"],
+            "results": results,
+        }
+    return search_web
+
+def install(profile: Profile):
+    """Swaps every provider the backend uses for fakes driven by `profile`."""
+    from app.core.config import settings
+    from app.services import search
+    from app.services.citations import StubResolver, citation_checker
+    from app.services.gemini import gemini_manager, KeySlot
+    from app.services.llm import breakers
+    from app.services.scheduler import LLMScheduler
+    from app.services.state import MemoryStateBackend
+
+    rng = random.Random(profile.seed)
+    gemini_manager.slots = {}
+    # Fresh key state per scenario, so one scenario's cooldowns don't leak into the next
+    state = MemoryStateBackend()
+    gemini_manager.scheduler = LLMScheduler(state)
+    for i in range(profile.keys):
+        slot = KeySlot(i, f"fake-key-{i}", state)
+        slot._model = FakeGeminiModel(profile, rng)
+        gemini_manager.slots[i] = slot
+        gemini_manager.scheduler.add_key(i, profile.key_rpm, settings.GEMINI_KEY_TPM, state_key=slot.state_key)
+    # The Groq client is built lazily from groq_key, so clear the key too when Groq is off
+    gemini_manager.groq_key = "fake-groq-key" if profile.groq else ""
+    gemini_manager.groq_client = FakeGroqClient(profile, rng) if profile.groq else None
+    # What the server's startup warm-up does, so the first measured request doesn't pay for it
+    gemini_manager.import_sdks()
+    search.search_web = make_fake_search(profile, rng)
+    # Identifier citations are resolved offline (none are known, so they fall back to search + LLM)
+    citation_checker.resolver = StubResolver()
+    for breaker in breakers.values():
+        breaker.reset()
+    counters.reset()
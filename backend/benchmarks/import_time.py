@@ -0,0 +1,93 @@
+"""Cold-start import time of the backend entry point.
+
+Imports `main` in fresh interpreters under `python -X importtime` and reports the median
+total, the slowest direct imports and any provider SDK that got imported eagerly (those are
+meant to load on first use or in the startup warm-up). From the backend/ directory:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 7 --budget-ms 800   # exit 1 over budget or on an eager SDK import
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported lazily by the backend; finding one of these at import time is a regression
+LAZY_MODULES = ["google.generativeai", "groq", "duckduckgo_search"]
+
+def parse_importtime(stderr: str) -> list:
+    """Returns (depth, cumulative_us, module) for each `-X importtime` line, in output order."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, int(cumulative), name.strip()))
+    return rows
+
+def measure(module: str) -> dict:
+    env = dict(os.environ, CACHE_DIR=os.environ.get("CACHE_DIR") or tempfile.mkdtemp(prefix="trustguard-import-"))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    index = max(i for i, row in enumerate(rows) if row[2] == module and row[0] == 0)
+    # Direct imports of `module` are the depth-1 rows printed since the previous top-level row
+    children = []
+    for depth, cumulative, name in reversed(rows[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((name, cumulative))
+    loaded = {name for _, _, name in rows}
+    return {
+        "total_ms": rows[index][1] / 1000,
+        "children": {name: cumulative / 1000 for name, cumulative in children},
+        "eager": [m for m in LAZY_MODULES if m in loaded],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import time of the TrustGuard backend")
+    parser.add_argument("--module", default="main", help="module to import (default: the app entry point)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="how many of the slowest direct imports to list")
+    parser.add_argument("--budget-ms", type=float, help="fail when the median import time exceeds this")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    total = statistics.median(run["total_ms"] for run in runs)
+    children = {
+        name: round(statistics.median(run["children"].get(name, 0.0) for run in runs), 1)
+        for name in runs[0]["children"]
+    }
+    slowest = dict(sorted(children.items(), key=lambda item: item[1], reverse=True)[:args.top])
+    eager = sorted({m for run in runs for m in run["eager"]})
+    over_budget = args.budget_ms is not None and total > args.budget_ms
+
+    if args.json:
+        json.dump({"module": args.module, "runs": args.runs, "median_ms": round(total, 1),
+                   "slowest_imports_ms": slowest, "eager_imports": eager, "over_budget": over_budget}, sys.stdout, indent=2)
+        print()
+    else:
+        print(f"import {args.module}: median {total:.1f} ms over {args.runs} runs")
+        for name, ms in slowest.items():
+            print(f"  {name:<40}{ms:>10.1f} ms")
+        if eager:
+            print(f"Imported eagerly (should load on first use): {', '.join(eager)}")
+        if over_budget:
+            print(f"Over budget: {total:.1f} ms > {args.budget_ms:.1f} ms")
+    if eager or over_budget:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Offline benchmark scenarios for the verification pipeline.
+
+Runs /api/verify's handler in-process against the fakes in benchmarks/fakes.py, so no
+API keys or network are needed. From the backend/ directory:
+
+    python -m benchmarks.run                              # every scenario
+    python -m benchmarks.run --scenario concurrent --clients 20 --requests 5
+    python -m benchmarks.run --time-scale 0.1 --json      # 10x faster fakes, JSON report
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Keep benchmark caches away from the real ones (settings are read at import time)
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="trustguard-bench-"))
+
+from .fakes import Latency, Profile, counters, install
+
+SUBJECTS = ["The Eiffel Tower", "Mount Everest", "The Amazon River", "The Great Wall", "Lake Baikal", "The Sahara"]
+FACTS = [
+    "is {n} metres tall", "was first surveyed in {y}", "spans roughly {n} kilometres",
+    "attracts about {n} thousand visitors every year", "was named a heritage site in {y}",
+]
+
+def make_text(rng: random.Random, sentences: int = 5) -> str:
+    parts = [
+        f"{rng.choice(SUBJECTS)} {rng.choice(FACTS).format(n=rng.randint(10, 9000), y=rng.randint(1800, 2020))}."
+        for _ in range(sentences)
+    ]
+    if rng.random() < 0.5:
+        parts.append(f"This was reported by Smith et al. ({rng.randint(1990, 2023)}) in the Journal of Geography.")
+    return " ".join(parts)
+
+def scaled(profile: Profile, factor: float) -> Profile:
+    for name in ("gemini_latency", "groq_latency", "search_latency"):
+        latency = getattr(profile, name)
+        setattr(profile, name, Latency(latency.median * factor, latency.sigma))
+    return profile
+
+SCENARIOS = {
+    # name: (description, profile factory, default clients, default requests per client)
+    "single": ("One client, sequential requests", lambda: Profile(), 1, 10),
+    "concurrent": ("N concurrent clients", lambda: Profile(), 10, 3),
+    "flaky": ("Concurrent clients, 10% 429s and 5% malformed JSON", lambda: Profile(rate_limit_rate=0.1, malformed_rate=0.05), 10, 3),
+    "exhaustion": ("Keys run out of quota mid-run (Groq fallback)", lambda: Profile(keys=3, key_quota=5, key_rpm=10), 5, 3),
+}
+
+def reset_caches():
+    from app.services.cache import verdict_cache
+    from app.services.search import search_cache
+    verdict_cache.memory.clear()
+    verdict_cache.near_duplicates.clear()
+    if verdict_cache._db is not None:
+        verdict_cache._db.execute("DELETE FROM verdicts")
+        verdict_cache._db.commit()
+    search_cache.clear()
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct * len(ordered)))] if ordered else 0.0
+
+async def run_scenario(profile: Profile, clients: int, requests: int, seed: int) -> dict:
+    from app.api.endpoints import run_verification
+    from app.models.schemas import VerifyRequest
+
+    install(profile)
+    reset_caches()
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        for _ in range(requests):
+            started = time.perf_counter()
+            try:
+                await run_verification(VerifyRequest(text=make_text(rng)))
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(clients)])
+    wall = time.perf_counter() - started
+    total = clients * requests
+    return {
+        "requests": total,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(total / wall, 3) if wall else 0.0,
+        "p50_s": round(percentile(latencies, 0.50), 3),
+        "p95_s": round(percentile(latencies, 0.95), 3),
+        "p99_s": round(percentile(latencies, 0.99), 3),
+        "llm_calls_per_request": round((counters.gemini_calls + counters.groq_calls) / total, 2),
+        "gemini_calls": counters.gemini_calls,
+        "groq_calls": counters.groq_calls,
+        "searches": counters.searches,
+        "injected_429s": counters.rate_limited,
+        "injected_malformed": counters.malformed,
+    }
+
+def print_table(results: dict):
+    columns = ["requests", "errors", "throughput_rps", "p50_s", "p95_s", "p99_s", "llm_calls_per_request", "groq_calls", "injected_429s"]
+    print(f"{'scenario':<12}" + "".join(f"{c:>23}" for c in columns))
+    for name, result in results.items():
+        print(f"{name:<12}" + "".join(f"{result[c]:>23}" for c in columns))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline TrustGuard backend benchmarks")
+    parser.add_argument("--scenario", choices=["all", *SCENARIOS], default="all")
+    parser.add_argument("--clients", type=int, help="concurrent clients (overrides the scenario default)")
+    parser.add_argument("--requests", type=int, help="requests per client (overrides the scenario default)")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiply every fake latency by this factor")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the backend's own log output")
+    args = parser.parse_args(argv)
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = {}
+    for name in names:
+        description, make_profile, clients, requests = SCENARIOS[name]
+        profile = scaled(make_profile(), args.time_scale)
+        log = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with log:
+            results[name] = asyncio.run(run_scenario(profile, args.clients or clients, args.requests or requests, args.seed))
+        results[name]["description"] = description
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        print_table(results)
+
+if __name__ == "__main__":
+    main()
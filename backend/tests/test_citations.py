@@ -0,0 +1,101 @@
+import asyncio
+import httpx
+import pytest
+from app.services.citations import (CitationChecker, HttpResolver, Identifier, ReferenceStore, StubResolver, arxiv_valid,
+                                    find_identifier, isbn_valid, public_url)
+
+@pytest.mark.parametrize("digits, valid", [
+    ("0306406152", True),
+    ("080442957X", True),
+    ("9780306406157", True),
+    ("9791090636071", True),
+    ("0306406153", False),       # wrong check digit
+    ("08044295X7", False),       # X only allowed as the check digit
+    ("9780306406158", False),
+    ("9770306406157", False),    # ISBN-13 must start with 978 or 979
+    ("030640615", False),
+])
+def test_isbn_check_digits(digits, valid):
+    assert isbn_valid(digits) == valid
+
+@pytest.mark.parametrize("arxiv_id, valid", [
+    ("0704.0001", True),
+    ("1412.9999", True),
+    ("1501.00001", True),
+    ("1501.0001", False),        # five-digit numbers from 2015
+    ("1412.12345", False),
+    ("0703.0001", False),        # new scheme starts April 2007
+    ("1913.00001", False),
+    ("hep-th/9108001", True),
+    ("hep-th/9107001", False),   # old scheme starts August 1991
+    ("math/0703001", True),
+    ("math/0704001", False),
+])
+def test_arxiv_ids(arxiv_id, valid):
+    assert arxiv_valid(arxiv_id) == valid
+
+@pytest.mark.parametrize("citation, identifier", [
+    ("Smith, J. (2020). Title. Nature. https://doi.org/10.1038/NATURE12373.", Identifier("doi", "10.1038/nature12373", True)),
+    ("doi: 10.1000/xyz123, p. 4", Identifier("doi", "10.1000/xyz123", True)),
+    ("Vaswani et al. arXiv:1706.03762v5", Identifier("arxiv", "1706.03762", True)),
+    ("https://arxiv.org/abs/hep-th/9711200", Identifier("arxiv", "hep-th/9711200", True)),
+    ("arXiv:1501.0001", Identifier("arxiv", "1501.0001", False)),
+    ("Knuth, The Art of Computer Programming, ISBN 0-201-89683-4 (1997)", Identifier("isbn", "0201896834", True)),
+    ("ISBN-13: 978-0-306-40615-7, 2nd ed.", Identifier("isbn", "9780306406157", True)),
+    ("ISBN 978-0-306-40615-8", Identifier("isbn", "9780306406158", False)),
+    ("PMID: 00012345", Identifier("pmid", "12345", True)),
+    ("https://pubmed.ncbi.nlm.nih.gov/31452104/", Identifier("pmid", "31452104", True)),
+    ("PMID 0", Identifier("pmid", "0", False)),
+    ("See https://example.org/report.", Identifier("url", "https://example.org/report", True)),
+    ("http://intranet/page", Identifier("url", "http://intranet/page", False)),
+    ("Smith (2020) argued otherwise.", None),
+])
+def test_find_identifier(citation, identifier):
+    assert find_identifier(citation) == identifier
+
+def test_internal_addresses_are_not_public():
+    for url in ["http://127.0.0.1/", "http://localhost:8000/admin", "http://10.0.0.5/", "http://169.254.169.254/latest/meta-data",
+                "http://[::1]/", "http://[::ffff:192.168.0.1]/", "ftp://93.184.215.14/", "http://93.184.215.14:99999/"]:
+        assert not asyncio.run(public_url(url)), url
+    assert asyncio.run(public_url("https://93.184.215.14/page"))
+
+def test_urls_are_not_probed_by_default():
+    resolver = HttpResolver(timeout=1)
+    assert asyncio.run(resolver.resolve([Identifier("url", "http://127.0.0.1/", True)])) == {}
+
+def test_redirects_to_internal_hosts_are_not_followed():
+    seen = []
+
+    def handler(request):
+        seen.append(str(request.url))
+        return httpx.Response(302, headers={"location": "http://169.254.169.254/latest/meta-data"})
+
+    async def probe():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await HttpResolver(timeout=1, probe_urls=True)._urls(client, [Identifier("url", "http://93.184.215.14/a", True)])
+
+    assert asyncio.run(probe()) == {}
+    assert seen == ["http://93.184.215.14/a"]
+
+def test_concurrent_lookups_share_one_batch(tmp_path):
+    doi, arxiv = Identifier("doi", "10.1000/a1", True), Identifier("arxiv", "1706.03762", True)
+    resolver = StubResolver({
+        ("doi", doi.value): {"exists": True, "url": "https://doi.org/10.1000/a1", "title": "A"},
+        ("arxiv", arxiv.value): {"exists": True, "url": "https://arxiv.org/abs/1706.03762", "title": "B"},
+    })
+    checker = CitationChecker(ReferenceStore(str(tmp_path / "refs.sqlite3")), resolver, batch_window=0.01)
+    citations = ["doi:10.1000/a1", "https://doi.org/10.1000/a1", "arXiv:1706.03762", "PMID: 42", "ISBN 0306406153", "Smith (2020)"]
+
+    async def check_all():
+        return await asyncio.gather(*[checker.check(c) for c in citations])
+
+    results = asyncio.run(check_all())
+    assert len(resolver.batches) == 1
+    assert sorted(resolver.batches[0]) == sorted([doi, arxiv, Identifier("pmid", "42", True)])
+    assert [r and r["via"] for r in results] == ["resolved", "resolved", "resolved", None, "invalid_identifier", None]
+    assert results[0]["title"] == "A" and results[2]["title"] == "B"
+
+    # Found references are answered from the store; the unknown PMID is asked about again
+    results = asyncio.run(check_all())
+    assert [r and r["via"] for r in results] == ["known", "known", "known", None, "invalid_identifier", None]
+    assert resolver.batches[1] == [Identifier("pmid", "42", True)]
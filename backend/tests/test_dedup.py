@@ -0,0 +1,40 @@
+from app.services.dedup import MinHashIndex, group_near_duplicates
+
+def test_paraphrases_merge():
+    claims = [
+        "Mount Everest is the tallest mountain in the world",
+        "Mount Everest is Earth's highest peak",
+        "The Amazon rainforest produces 20 percent of the oxygen on Earth",
+        "The Amazon rainforest produces 20 percent of Earth's oxygen supply",
+        "The Great Wall of China is over 13000 miles long",
+        "The Great Wall of China is more than 13000 miles long",
+    ]
+    assert group_near_duplicates(claims) == [[0, 1], [2, 3], [4, 5]]
+
+def test_negation_stays_apart():
+    assert group_near_duplicates(["The Earth is flat", "The Earth is not flat"]) == [[0], [1]]
+    assert group_near_duplicates([
+        "Vaccines cause autism in young children", "Vaccines do not cause autism in young children",
+    ]) == [[0], [1]]
+
+def test_numbers_stay_apart():
+    assert group_near_duplicates(["Everest is 8849 metres tall", "Everest is 8848 metres tall"]) == [[0], [1]]
+
+def test_different_superlatives_stay_apart():
+    claims = [
+        "The Amazon is the longest river in South America",
+        "The Amazon is the widest river in South America",
+    ]
+    assert group_near_duplicates(claims) == [[0], [1]]
+
+def test_threshold_decides_how_similar_is_similar_enough():
+    a = "Albert Einstein developed the theory of relativity in Switzerland"
+    b = "Albert Einstein developed the theory of general relativity in Switzerland"
+    assert group_near_duplicates([a, b], threshold=0.7) == [[0, 1]]
+    assert group_near_duplicates([a, b], threshold=0.95) == [[0], [1]]
+
+def test_index_serves_rewordings_only():
+    index = MinHashIndex()
+    index.add("k", "The Amazon is the longest river in South America", "verdict")
+    assert index.query("South America's longest river is the Amazon")[0] == "k"
+    assert index.query("The Amazon is not the longest river in South America") is None
@@ -0,0 +1,24 @@
+from app.services.evidence_index import EvidenceIndex
+
+def test_search_sees_documents_added_by_another_process(tmp_path):
+    server = EvidenceIndex(str(tmp_path))
+    cli = EvidenceIndex(str(tmp_path))
+    cli.add_documents([{"title": "Eiffel Tower", "url": "", "text": "The Eiffel Tower is 330 metres tall."}])
+    assert server.search("Eiffel Tower height")  # maps doclens.bin and the first segment
+
+    cli.add_documents([{"title": "Great Wall", "url": "", "text": f"The Great Wall of China stretches far. {n}"} for n in range(50)])
+    hits = server.search("Great Wall of China")
+    assert hits and hits[0][1]["title"] == "Great Wall"
+
+    cli.compact()
+    assert server.search("Eiffel Tower")[0][1]["title"] == "Eiffel Tower"
+    cli.close()
+    server.close()
+
+def test_truncated_postings_are_skipped(tmp_path):
+    index = EvidenceIndex(str(tmp_path))
+    index.add_documents([{"title": "Moon", "url": "", "text": "The Moon orbits the Earth."}])
+    with open(tmp_path / "seg-00001.bin", "r+b") as f:
+        f.truncate(8)
+    index.search("Moon orbits Earth")  # must not raise struct.error
+    index.close()
@@ -0,0 +1,84 @@
+import asyncio
+import sqlite3
+from app.services.jobs import JobQueue, JobWorkerPool
+
+def test_two_processes_never_claim_the_same_item(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    first, second = JobQueue(path), JobQueue(path)
+    first.submit(["a", "b"])
+    claimed = [first.claim_next(), second.claim_next()]
+    assert sorted(item[2] for item in claimed) == ["a", "b"]
+    assert first.claim_next() is None and second.claim_next() is None
+
+def test_recover_only_requeues_expired_leases(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    live = JobQueue(path, lease_seconds=60)
+    dead = JobQueue(path, lease_seconds=-1)  # its leases are already expired
+    live.submit(["a"])
+    live.claim_next()
+    assert dead.recover() == 0  # another worker's live lease is left alone
+
+    dead.submit(["b"])
+    dead.claim_next()
+    assert live.recover() == 1
+    assert live.claim_next()[2] == "b"
+
+def test_release_hands_items_back(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job_id = queue.submit(["a"])
+    queue.claim_next()
+    assert queue.release() == 1
+    assert queue.get(job_id)["items"][0]["status"] == "queued"
+
+def test_queue_files_without_leases_are_migrated(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE jobs (id TEXT PRIMARY KEY, created_at REAL NOT NULL, total INTEGER NOT NULL);
+        CREATE TABLE job_items (job_id TEXT NOT NULL, position INTEGER NOT NULL, text TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued', attempts INTEGER NOT NULL DEFAULT 0, result TEXT,
+            error TEXT, updated_at REAL, PRIMARY KEY (job_id, position));
+        INSERT INTO jobs VALUES ('j', 0, 1);
+        INSERT INTO job_items (job_id, position, text, status, attempts) VALUES ('j', 0, 'a', 'running', 1);
+    """)
+    db.close()
+    queue = JobQueue(path)
+    assert queue.recover() == 1
+    assert queue.claim_next() == ("j", 0, "a")
+
+def test_a_worker_that_lost_its_lease_cannot_overwrite_the_result(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    slow = JobQueue(path, lease_seconds=-1)  # its lease is expired as soon as it claims
+    other = JobQueue(path)
+    job_id = slow.submit(["a"])
+    slow.claim_next()
+    other.recover()
+    other.claim_next()
+    assert other.finish(job_id, 0, result={"by": "other"})
+    assert not slow.finish(job_id, 0, result={"by": "slow"})
+    assert other.get(job_id)["items"][0]["result"] == {"by": "other"}
+
+def test_workers_survive_database_errors(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job_id = queue.submit(["a"])
+    claim_next = queue.claim_next
+    errors = [sqlite3.OperationalError("database is locked")]
+
+    def flaky_claim():
+        if errors:
+            raise errors.pop()
+        return claim_next()
+
+    monkeypatch.setattr(queue, "claim_next", flaky_claim)
+
+    async def handler(text):
+        return {"text": text}
+
+    async def run():
+        pool = JobWorkerPool(queue, handler, workers=1, poll_interval=0.01, interactive_backlog=lambda: 0)
+        pool.start()
+        await asyncio.sleep(0.2)
+        await pool.stop()
+
+    asyncio.run(run())
+    assert queue.get(job_id)["status"] == "complete"
@@ -0,0 +1,59 @@
+import pytest
+from app.core.json_repair import loads_lenient
+
+REPAIRS = [
+    # trailing commas
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+    ('[1, 2, 3,]', [1, 2, 3]),
+    ('{"a": 1,, "b": 2}', {"a": 1, "b": 2}),
+    # single quotes, unquoted keys, bare words and Python literals
+    ("{'status': 'verified', 'confidence': 0.9}", {"status": "verified", "confidence": 0.9}),
+    ("{'explanation': 'It\\'s true'}", {"explanation": "It's true"}),
+    ("{status: verified, ok: True, note: None}", {"status": "verified", "ok": True, "note": None}),
+    # missing commas between values
+    ('["a" "b"]', ["a", "b"]),
+    ('["a" "b" "c"]', ["a", "b", "c"]),
+    ('[1 2 3]', [1, 2, 3]),
+    ('[{"a": 1} {"b": 2}]', [{"a": 1}, {"b": 2}]),
+    # missing commas between members
+    ('{"a": "x" "b": 2}', {"a": "x", "b": 2}),
+    ('{"a": "x""b": 2}', {"a": "x", "b": 2}),
+    ('{"a": 1\n"b": 2}', {"a": 1, "b": 2}),
+    ('{"a": [1] "b": {"c": true} "d": null}', {"a": [1], "b": {"c": True}, "d": None}),
+    # quotes and newlines inside strings
+    ('{"e": "the "tallest" tower"}', {"e": 'the "tallest" tower'}),
+    ('{"e": "line one\nline two"}', {"e": "line one\nline two"}),
+    # truncated output
+    ('{"claims": ["one", "tw', {"claims": ["one", "tw"]}),
+    ('{"status": "verified", "confidence":', {"status": "verified", "confidence": None}),
+    ('{"results": [{"index": 0, "status": "verified"}, {"index": 1', {"results": [{"index": 0, "status": "verified"}, {"index": 1}]}),
+    ('["a" "b', ["a", "b"]),
+    # comments
+    ('{"a": 1, // the first\n "b": 2 /* second */}', {"a": 1, "b": 2}),
+]
+
+@pytest.mark.parametrize("text, expected", REPAIRS)
+def test_repairs(text, expected):
+    value, repaired = loads_lenient(text)
+    assert value == expected
+    assert repaired
+
+@pytest.mark.parametrize("text, expected", [
+    ('```json\n{"a": 1}\n```', {"a": 1}),
+    ('```\n[1, 2]\n```', [1, 2]),
+    ('Here is the result:\n```json\n{"a": 1}\n```\nHope this helps.', {"a": 1}),
+    ('Sure! {"a": 1} Let me know.', {"a": 1}),
+])
+def test_code_fences_and_prose_parse_without_repair(text, expected):
+    assert loads_lenient(text) == (expected, False)
+
+def test_repair_inside_code_fences():
+    assert loads_lenient("```json\n{'a': 1,}\n```") == ({"a": 1}, True)
+
+def test_valid_json_is_untouched():
+    assert loads_lenient('{"a": "x \\"y\\" z", "b": [1.5, -2e3]}') == ({"a": 'x "y" z', "b": [1.5, -2000.0]}, False)
+
+@pytest.mark.parametrize("text", ["", "   ", "no json here"])
+def test_unusable_replies_raise(text):
+    with pytest.raises(ValueError):
+        loads_lenient(text)
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from app.services import llm
+from app.services.gemini import LatencyWindow
+
+class RateLimited(Exception):
+    status_code = 429
+
+@pytest.fixture
+def breaker_failures(monkeypatch):
+    """Gemini alone answers, after three 429s; returns the failures recorded on its circuit."""
+    calls, failures = [], []
+
+    async def invoke(provider, prompt, expect_json, schema):
+        calls.append(provider)
+        if len(calls) <= 3:
+            raise RateLimited("429 quota exceeded")
+        return '{"ok": true}'
+
+    monkeypatch.setattr(llm, "_invoke", invoke)
+    monkeypatch.setattr(llm, "_available", lambda provider: provider == "gemini")
+    monkeypatch.setattr(llm.breakers["gemini"], "record_failure", lambda: failures.append(1))
+    llm.breakers["gemini"].reset()
+    yield failures
+    llm.breakers["gemini"].reset()
+
+def test_a_rate_limited_key_does_not_count_against_the_provider(breaker_failures, monkeypatch):
+    monkeypatch.setattr(llm.gemini_manager, "has_healthy_key", lambda: True)
+    assert asyncio.run(llm.call_llm("prompt", "test")) == {"ok": True}
+    assert breaker_failures == []
+
+def test_rate_limits_count_once_every_key_is_limited(breaker_failures, monkeypatch):
+    monkeypatch.setattr(llm.gemini_manager, "has_healthy_key", lambda: False)
+    asyncio.run(llm.call_llm("prompt", "test"))
+    assert len(breaker_failures) == 3
+
+class ServerError(Exception):
+    status_code = 503
+
+class FailingGroq:
+    """Groq client whose completions always fail with a 503."""
+
+    def __init__(self):
+        self.chat = self
+        self.completions = self
+
+    async def create(self, **kwargs):
+        raise ServerError("503 unavailable")
+
+@pytest.fixture
+def recorded_failures(monkeypatch):
+    """Routes gemini_manager's Groq calls to FailingGroq; returns the failures each circuit recorded."""
+    failures = {"gemini": 0, "groq": 0}
+    manager = llm.gemini_manager
+    monkeypatch.setattr(manager, "slots", {0: object()})
+    monkeypatch.setattr(manager, "groq_client", FailingGroq())
+    monkeypatch.setattr(llm, "_available", lambda provider: provider == "gemini")
+    for name, breaker in llm.breakers.items():
+        breaker.reset()
+        monkeypatch.setattr(breaker, "record_failure", lambda name=name: failures.__setitem__(name, failures[name] + 1))
+    yield failures
+    for breaker in llm.breakers.values():
+        breaker.reset()
+
+def test_a_redirected_call_that_fails_on_groq_counts_against_groq(recorded_failures, monkeypatch):
+    monkeypatch.setattr(llm.gemini_manager.scheduler, "expected_wait", lambda tokens: float("inf"))
+    with pytest.raises(llm.LLMError):
+        asyncio.run(llm.call_llm("prompt", "test", optional=True))
+    assert recorded_failures == {"gemini": 0, "groq": 1}
+
+def test_a_failed_hedge_counts_against_both_providers(recorded_failures, monkeypatch):
+    async def slow_failure(prompt, tokens, priority, config=None):
+        await asyncio.sleep(0.05)
+        raise ServerError("503 unavailable")
+
+    manager = llm.gemini_manager
+    monkeypatch.setattr(llm.settings, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(manager.scheduler, "expected_wait", lambda tokens: 0.0)
+    monkeypatch.setattr(manager, "hedge_delay", lambda: 0.0)
+    monkeypatch.setattr(manager, "_call_gemini", slow_failure)
+    with pytest.raises(llm.LLMError):
+        asyncio.run(llm.call_llm("prompt", "test", optional=True))
+    assert recorded_failures == {"gemini": 1, "groq": 1}
+
+def test_hedge_delay_leaves_time_for_groq():
+    manager = llm.gemini_manager
+    windows = manager.latency
+    try:
+        manager.latency = {"gemini": LatencyWindow(min_samples=10), "groq": LatencyWindow(min_samples=10)}
+        assert manager.hedge_delay() == llm.settings.HEDGE_DEFAULT_DELAY
+        for seconds in range(1, 11):
+            manager.latency["gemini"].record(float(seconds))
+        assert manager.hedge_delay() == 10.0      # Gemini's p90 until Groq has samples
+        for _ in range(10):
+            manager.latency["groq"].record(2.0)
+        assert manager.hedge_delay() == 8.0       # Groq's answer should land by Gemini's p90
+        manager.latency["groq"] = LatencyWindow(min_samples=10)
+        for _ in range(10):
+            manager.latency["groq"].record(9.0)
+        assert manager.hedge_delay() == 6.0       # never before Gemini's median
+    finally:
+        manager.latency = windows
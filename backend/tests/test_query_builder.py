@@ -0,0 +1,10 @@
+from app.services.query_builder import build_search_query
+
+def test_may_is_a_month_only_next_to_a_date():
+    assert build_search_query("The Treaty of Versailles was signed in May 1919.") == "Treaty Versailles signed May 1919"
+    assert build_search_query("Einstein died on 18 may in Princeton") == "Einstein died 18 may Princeton"
+    assert "may" not in build_search_query("Coffee may reduce the risk of liver cancer").lower().split()
+    assert "May" not in build_search_query("May cause drowsiness in adults").split()
+
+def test_other_months_are_always_kept():
+    assert build_search_query("Troops began the long march home", max_terms=1) == "march"
@@ -0,0 +1,12 @@
+from fastapi.testclient import TestClient
+from app.services.gemini import KeySlot, gemini_manager
+import main
+
+def test_ready_reports_per_key_health(monkeypatch):
+    slots = {0: KeySlot(0, "key-one"), 1: KeySlot(1, "key-two")}
+    slots[1].mark_rate_limited(60)
+    monkeypatch.setattr(gemini_manager, "slots", slots)
+    keys = TestClient(main.app).get("/ready").json()["providers"]["gemini"]["keys"]
+    assert [(k["key"], k["healthy"]) for k in keys] == [("#1", True), ("#2", False)]
+    assert 0 < keys[1]["cooldownRemaining"] <= 60
+    assert "key-two" not in str(keys)
@@ -0,0 +1,58 @@
+import sqlite3
+import threading
+import time
+from app.services.state import SQLiteStateBackend, TokenBucket
+
+def test_reads_are_served_from_memory_between_refreshes(tmp_path):
+    backend = SQLiteStateBackend(str(tmp_path / "state.sqlite3"), refresh_interval=60)
+    backend.cooldown("k")
+    backend._db.close()  # a read that reached the file would now fail
+    assert backend.cooldown("k") == 0.0
+    assert backend.levels([TokenBucket.per_minute("k:rpm", 10)]) == [10.0]
+
+def test_cooldowns_of_other_workers_show_up_after_a_refresh(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    mine, other = SQLiteStateBackend(path, refresh_interval=0.05), SQLiteStateBackend(path, refresh_interval=0.05)
+    assert mine.cooldown("k") == 0.0
+    until = time.time() + 30
+    other.set_cooldown("k", until)
+    assert other.cooldown("k") == until  # own writes are visible at once
+    other.flush()
+    time.sleep(0.06)
+    assert mine.cooldown("k") == until
+
+def test_take_stays_atomic_across_workers(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    bucket = TokenBucket("k:rpm", 2, 0.0001)
+    workers = [SQLiteStateBackend(path, refresh_interval=60) for _ in range(2)]
+    draws = [worker.take([(bucket, 1)]) for worker in workers + workers]
+    assert draws[:2] == [0.0, 0.0] and all(wait > 0 for wait in draws[2:])
+
+def test_take_fails_closed_while_the_database_is_locked(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    backend = SQLiteStateBackend(path, timeout=0.05)
+    lock = sqlite3.connect(path, isolation_level=None)
+    lock.execute("BEGIN EXCLUSIVE")
+    assert backend.take([(TokenBucket.per_minute("k:rpm", 10), 1)]) > 0
+    lock.execute("ROLLBACK")
+    assert backend.take([(TokenBucket.per_minute("k:rpm", 10), 1)]) == 0
+
+def test_failure_counts_are_written_off_the_calling_thread(tmp_path, monkeypatch):
+    backend = SQLiteStateBackend(str(tmp_path / "state.sqlite3"))
+    writers = []
+    transaction = backend._transaction
+
+    def recording(work, default, write=False):
+        if write:
+            writers.append(threading.current_thread())
+        return transaction(work, default, write)
+
+    monkeypatch.setattr(backend, "_transaction", recording)
+    backend.reset_failures("k")  # nothing to reset: no write at all
+    backend.flush()
+    assert writers == []
+    assert backend.add_failure("k") == 1
+    backend.reset_failures("k")
+    backend.flush()
+    assert len(writers) == 2 and threading.current_thread() not in writers
+    assert backend.failures("k") == 0
@@ -0,0 +1,83 @@
+import re
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from app.api import endpoints
+from app.core.errors import LLMError, RATE_LIMIT
+from app.models.llm import BatchVerdictReply, CitationReply, ExtractionReply, QueriesReply, VerdictReply
+import main
+
+class FakeLLM:
+    """Stands in for call_llm: every call is rate-limited while `failing`, otherwise it answers
+    each prompt with a well-formed "verified" reply."""
+
+    def __init__(self):
+        self.failing = True
+
+    async def __call__(self, prompt, stage, schema=None, parse=None, optional=False):
+        if self.failing:
+            raise LLMError("429 quota exceeded", RATE_LIMIT)
+        if schema is ExtractionReply:
+            text = re.search(r'Text: "(.*)"\s*$', prompt, re.S).group(1)
+            return ExtractionReply(claims=[s for s in re.split(r"(?<=\.)\s+", text) if len(s) > 20])
+        if schema is BatchVerdictReply:
+            count = len(re.findall(r"^\s*\[\d+\] Claim", prompt, re.M))
+            return BatchVerdictReply(results=[
+                {"index": i, "status": "verified", "confidence": 0.9, "explanation": "Supported."} for i in range(count)
+            ])
+        if schema is VerdictReply:
+            return VerdictReply(status="verified", confidence=0.9, explanation="Supported.")
+        if schema is CitationReply:
+            return CitationReply(isReal=True)
+        if schema is QueriesReply:
+            return QueriesReply(queries=[])
+        return parse("") if parse is not None else {}
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = FakeLLM()
+
+    async def no_results(query):
+        return {}
+
+    monkeypatch.setattr(endpoints, "call_llm", fake)
+    monkeypatch.setattr(endpoints, "search_web_async", no_results)
+    monkeypatch.setattr(endpoints.settings, "FAST_EXTRACTION", False)
+    return fake
+
+def unique_text():
+    # Fresh claims each run, so verdicts stored by earlier runs cannot answer them
+    tag = uuid.uuid4().hex[:8]
+    return (f"The bridge {tag} was opened to traffic in the spring of 1932. "
+            f"The tower {tag} is more than three hundred metres tall.")
+
+def test_failed_verification_is_not_cached(llm):
+    client = TestClient(main.app)
+    body = {"text": unique_text()}
+    failed = client.post("/api/verify", json=body)
+    assert failed.status_code == 200
+    assert "ETag" not in failed.headers
+    assert all(c["explanation"].startswith("Verification failed") for c in failed.json()["claims"])
+
+    llm.failing = False
+    recovered = client.post("/api/verify", json=body, headers={"If-None-Match": '"anything"'})
+    assert recovered.status_code == 200
+    assert recovered.json()["claims"] and all(c["status"] == "verified" for c in recovered.json()["claims"])
+    assert "ETag" in recovered.headers
+    assert client.post("/api/verify", json=body, headers={"If-None-Match": recovered.headers["ETag"]}).status_code == 304
+
+def test_failed_paragraphs_are_not_stored(llm):
+    client = TestClient(main.app)
+    text = unique_text()
+    body = {"text": text, "incremental": True, "paragraphs": [text]}
+    failed = client.post("/api/verify", json=body).json()
+    assert failed["paragraphs"] and not any(p["reused"] for p in failed["paragraphs"])
+
+    llm.failing = False
+    recovered = client.post("/api/verify", json=body).json()
+    assert not any(p["reused"] for p in recovered["paragraphs"])
+    assert recovered["claims"] and all(c["status"] == "verified" for c in recovered["claims"])
+    # Editing the text elsewhere reuses the paragraph now that it verified cleanly
+    added = "The canal was dug by hand over eleven long years."
+    edited = {"text": f"{text}\n\n{added}", "incremental": True, "paragraphs": [text, added]}
+    assert [p["reused"] for p in client.post("/api/verify", json=edited).json()["paragraphs"]] == [True, False]
@@ -42,6 +42,8 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
             method: "POST",
             headers: {
                 "Content-Type": "application/json",
+                // Ask the backend to answer with partial results before we give up on it
+                "X-Deadline-Ms": "40000",
             },
             body: JSON.stringify({ text: request.text }),
             signal: controller.signal
@@ -103,6 +103,7 @@
         .tg-status-verified { background: #064e3b; color: #34d399; }
         .tg-status-uncertain { background: #451a03; color: #fbbf24; }
         .tg-status-hallucinated { background: #450a0a; color: #f87171; }
+        .tg-status-pending { background: #1e293b; color: #94a3b8; }
         .tg-spinner {
             width: 30px; height: 30px;
             border: 3px solid rgba(56, 189, 248, 0.2);